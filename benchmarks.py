@@ -0,0 +1,698 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: benchmarks.py
+Suite de benchmarks para los caminos críticos de clases, db y graficos
+
+Uso:
+    python benchmarks.py                      # perfil rápido
+    python benchmarks.py --perfil completo    # casas hasta 1M habitaciones
+    python benchmarks.py --comparar resultados_benchmarks/base.json
+
+Cada ejecución guarda un JSON en resultados_benchmarks/ con el commit
+actual, de modo que se puedan comparar regresiones entre commits.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import db
+from clases import Casa, Habitacion, Material, SistemaConstruccion
+from datos import MATERIALES_PISO, MATERIALES_PARED, SISTEMAS_CONSTRUCCION
+
+DIRECTORIO_RESULTADOS = 'resultados_benchmarks'
+
+# Tamaños por perfil: habitaciones por casa y materiales por catálogo
+PERFILES = {
+    "rapido": {
+        "habitaciones": [10, 1_000, 10_000],
+        "materiales": [10, 1_000],
+        "habitaciones_db": [10, 100, 1_000],
+        "escrituras_db": [10, 100],
+        "habitaciones_dashboard": [10, 100],
+        "habitaciones_dashboard_embebido": [10, 200],
+        "casas_lote": 8,
+        "escenarios_simulacion": 100_000,
+        "casas_plantillas": [100, 1_000],
+        "unidades_especificaciones": [100, 1_000],
+        "pisos_proyecto": [(20, 8)],
+        "habitaciones_lote": 20,
+        "lineas_impuestos": [1_000_000],
+        "habitaciones_servicio": [10, 100],
+        "clientes_servicio": 8,
+        "escritores_concurrentes": 8,
+        "operaciones_por_escritor": 100,
+        "repeticiones": 3,
+    },
+    "completo": {
+        "habitaciones": [10, 1_000, 100_000, 1_000_000],
+        "materiales": [10, 1_000, 100_000],
+        "habitaciones_db": [10, 1_000, 10_000],
+        "escrituras_db": [10, 100, 1_000],
+        "habitaciones_dashboard": [10, 100, 1_000, 100_000],
+        "habitaciones_dashboard_embebido": [10, 200, 1_000],
+        "casas_lote": 64,
+        "escenarios_simulacion": 1_000_000,
+        "casas_plantillas": [100, 1_000, 10_000],
+        "unidades_especificaciones": [100, 1_000, 10_000],
+        "pisos_proyecto": [(20, 8), (60, 20)],
+        "habitaciones_lote": 50,
+        "lineas_impuestos": [1_000_000, 10_000_000],
+        "habitaciones_servicio": [10, 100, 1_000],
+        "clientes_servicio": 32,
+        "escritores_concurrentes": 8,
+        "operaciones_por_escritor": 1_000,
+        "repeticiones": 5,
+    },
+}
+
+
+# =============================================================================
+# GENERADORES DE DATOS SINTÉTICOS
+# =============================================================================
+
+def generar_catalogo_sintetico(cantidad_materiales, semilla=0):
+    """Genera materiales de piso/pared y sistemas sintéticos.
+
+    Los primeros elementos son los del catálogo real de datos.py, de modo que
+    las casas cargadas desde la base de datos resuelvan sus materiales.
+    """
+    rnd = random.Random(semilla)
+    reales = list(MATERIALES_PISO.values()) + list(MATERIALES_PARED.values())
+    materiales = [Material(m.nombre, m.precio_m2, m.tipo) for m in reales[:cantidad_materiales]]
+    for i in range(len(materiales), cantidad_materiales):
+        tipo = "piso" if i % 2 == 0 else "pared"
+        materiales.append(Material(f"Material {tipo} {i}", rnd.randint(10, 300) * 1000, tipo))
+    sistemas = [SistemaConstruccion(s.nombre, s.factor_costo, s.descripcion)
+                for s in SISTEMAS_CONSTRUCCION.values()]
+    return materiales, sistemas
+
+
+def generar_casa_sintetica(cantidad_habitaciones, cantidad_materiales=50, semilla=0):
+    """Genera una Casa con habitaciones de dimensiones y materiales aleatorios"""
+    rnd = random.Random(semilla)
+    materiales, sistemas = generar_catalogo_sintetico(cantidad_materiales, semilla)
+    pisos = [m for m in materiales if m.tipo == "piso"]
+    paredes = [m for m in materiales if m.tipo == "pared"] or pisos
+    casa = Casa(f"Casa sintética {cantidad_habitaciones}")
+    for i in range(cantidad_habitaciones):
+        habitacion = Habitacion(f"Habitación {i}",
+                                rnd.uniform(1.5, 6.0),
+                                rnd.uniform(1.5, 8.0),
+                                rnd.uniform(2.3, 3.0))
+        habitacion.asignar_material_piso(rnd.choice(pisos))
+        habitacion.asignar_material_paredes(rnd.choice(paredes))
+        habitacion.asignar_sistema_construccion(rnd.choice(sistemas))
+        casa.agregar_habitacion(habitacion)
+    return casa
+
+
+def poblar_db_sintetica(cantidad_habitaciones, cantidad_materiales, semilla=0):
+    """Crea las tablas en db.DB_PATH e inserta una casa sintética en bloque.
+
+    Returns:
+        id de la casa insertada
+    """
+    rnd = random.Random(semilla)
+    materiales, sistemas = generar_catalogo_sintetico(cantidad_materiales, semilla)
+    db.crear_tablas()
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO material (nombre, precio_m2, tipo) VALUES (?, ?, ?)",
+                       [(m.nombre, m.precio_m2, m.tipo) for m in materiales])
+    cursor.executemany("INSERT INTO sistema_construccion (nombre, factor_costo, descripcion) VALUES (?, ?, ?)",
+                       [(s.nombre, s.factor_costo, s.descripcion) for s in sistemas])
+    cursor.execute("INSERT INTO casa (nombre) VALUES (?)", (f"Casa sintética {cantidad_habitaciones}",))
+    casa_id = cursor.lastrowid
+    ids_materiales = [r[0] for r in cursor.execute("SELECT id FROM material")]
+    ids_sistemas = [r[0] for r in cursor.execute("SELECT id FROM sistema_construccion")]
+    cursor.executemany(
+        "INSERT INTO habitacion (nombre, ancho, largo, altura, id_casa) VALUES (?, ?, ?, ?, ?)",
+        [(f"Habitación {i}", rnd.uniform(1.5, 6.0), rnd.uniform(1.5, 8.0), rnd.uniform(2.3, 3.0), casa_id)
+         for i in range(cantidad_habitaciones)])
+    ids_habitaciones = [r[0] for r in cursor.execute("SELECT id FROM habitacion WHERE id_casa = ?", (casa_id,))]
+    cursor.executemany(
+        "INSERT INTO habitacion_material (id_habitacion, id_material_piso, id_material_paredes, id_sistema_construccion) VALUES (?, ?, ?, ?)",
+        [(id_hab, rnd.choice(ids_materiales), rnd.choice(ids_materiales), rnd.choice(ids_sistemas))
+         for id_hab in ids_habitaciones])
+    conn.commit()
+    conn.close()
+    return casa_id
+
+
+# =============================================================================
+# MEDICIÓN
+# =============================================================================
+
+def medir(funcion, repeticiones=3, preparar=None):
+    """Mide el tiempo de una función y devuelve mínimo, mediana y máximo en segundos.
+
+    Args:
+        funcion: Función sin argumentos a medir
+        repeticiones: Número de ejecuciones
+        preparar: Función opcional que se ejecuta antes de cada medición (no se mide)
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        "min": min(tiempos),
+        "mediana": statistics.median(tiempos),
+        "max": max(tiempos),
+        "repeticiones": repeticiones,
+    }
+
+
+class BaseDatosTemporal:
+    """Context manager que redirige db.DB_PATH a un archivo temporal"""
+
+    def __enter__(self):
+        self.directorio = tempfile.mkdtemp(prefix="bench_construccion_")
+        self.ruta_anterior = db.DB_PATH
+        db.DB_PATH = os.path.join(self.directorio, "bench.db")
+        return db.DB_PATH
+
+    def __exit__(self, *exc):
+        db.DB_PATH = self.ruta_anterior
+        shutil.rmtree(self.directorio, ignore_errors=True)
+        return False
+
+
+# =============================================================================
+# CASOS
+# =============================================================================
+
+def bench_estadisticas(perfil):
+    resultados = {}
+    for n in perfil["habitaciones"]:
+        casa = generar_casa_sintetica(n)
+        resultados[f"obtener_estadisticas[{n}]"] = medir(casa.obtener_estadisticas, perfil["repeticiones"])
+        resultados[f"obtener_resumen_completo[{n}]"] = medir(casa.obtener_resumen_completo, perfil["repeticiones"])
+        resultados[f"calcular_costos_lote[{n}]"] = medir(casa.calcular_costos_lote, perfil["repeticiones"])
+        resultados[f"analizar_sensibilidad[{n}]"] = medir(casa.analizar_sensibilidad, perfil["repeticiones"])
+        ultima = casa.habitaciones[-1]
+
+        def buscar_renombrar_eliminar():
+            # Índices por nombre: sin recorrer la lista de habitaciones
+            casa.obtener_habitacion(ultima.nombre)
+            nombre = ultima.nombre
+            casa.renombrar_habitacion(ultima, nombre + " (renombrada)")
+            casa.renombrar_habitacion(ultima, nombre)
+            casa.eliminar_habitacion(nombre)
+            casa.agregar_habitacion(ultima)
+
+        resultados[f"buscar_renombrar_eliminar[{n}]"] = medir(buscar_renombrar_eliminar, perfil["repeticiones"])
+    return resultados
+
+
+def bench_simulacion(perfil):
+    import simulacion
+
+    resultados = {}
+    escenarios = perfil["escenarios_simulacion"]
+    for n in perfil["habitaciones"]:
+        casa = generar_casa_sintetica(n)
+        motor = simulacion.SimulacionCostos(casa, simulacion.incertidumbre_relativa(casa), semilla=0)
+        resultados[f"SimulacionCostos.ejecutar[{n}x{escenarios}]"] = medir(
+            lambda: motor.ejecutar(escenarios), perfil["repeticiones"])
+    return resultados
+
+
+def bench_plantillas(perfil):
+    import plantillas
+
+    resultados = {}
+    barrido = plantillas.barrido_parametrico(sistemas=[None] + list(SISTEMAS_CONSTRUCCION))
+    resultados[f"barrido_parametrico[{len(barrido['costo'])}]"] = medir(
+        lambda: plantillas.barrido_parametrico(sistemas=[None] + list(SISTEMAS_CONSTRUCCION)), perfil["repeticiones"])
+    for n in perfil["casas_plantillas"]:
+        casas = [plantillas.crear_variante(barrido, i % len(barrido["costo"])) for i in range(n)]
+        with BaseDatosTemporal():
+            db.crear_tablas()
+            resultados[f"guardar_casas[{n}]"] = medir(lambda: plantillas.guardar_casas(casas), perfil["repeticiones"])
+    return resultados
+
+
+def bench_especificaciones(perfil):
+    """Edificio de n apartamentos iguales: una fila por habitación frente a una por especificación"""
+    import especificaciones
+    import plantillas
+
+    resultados = {}
+    for n in perfil["unidades_especificaciones"]:
+        agrupada = plantillas.crear_casa("Apartamento 2 alcobas", "Torre", unidades=n)
+        expandida = Casa("Torre")
+        for k in range(n):
+            for h in plantillas.crear_casa("Apartamento 2 alcobas").habitaciones:
+                h.nombre = f"Apto {k + 1} - {h.nombre}"
+                expandida.agregar_habitacion(h)
+        resultados[f"costo_expandido[{n}]"] = medir(
+            lambda: expandida.calcular_costos_lote().sum(), perfil["repeticiones"])
+        resultados[f"costo_agrupado[{n}]"] = medir(
+            lambda: agrupada.calcular_costos_lote().sum(), perfil["repeticiones"])
+        with BaseDatosTemporal():
+            db.crear_tablas()
+            id_casa, = plantillas.guardar_casas([expandida])
+            resultados[f"costos_por_especificacion[{n}]"] = medir(
+                lambda: especificaciones.costos_por_especificacion(id_casa), perfil["repeticiones"])
+    return resultados
+
+
+def bench_proyectos(perfil):
+    """Torre de pisos x unidades: ajustar el total tras cambiar una habitación frente a sumarlo todo"""
+    import proyectos
+    from clases import NodoProyecto
+
+    resultados = {}
+    for pisos, unidades in perfil["pisos_proyecto"]:
+        etiqueta = f"{pisos}x{unidades}"
+        proyecto = NodoProyecto("Proyecto")
+        torre = proyectos.crear_edificio("Torre", pisos, unidades, "Apartamento 2 alcobas", proyecto=proyecto)
+        casa = torre.hijos[-1].hijos[-1]
+        habitacion = casa.habitaciones[0]
+
+        def modificar_y_propagar():
+            habitacion.ancho += 0.01
+            casa.actualizar_habitacion(habitacion)
+            return proyecto.obtener_subtotales()["costo_total"]
+
+        def modificar_y_sumar():
+            habitacion.ancho += 0.01
+            return sum(c.calcular_costo_total() for c in proyecto.casas())
+
+        resultados[f"propagar_cambio[{etiqueta}]"] = medir(modificar_y_propagar, perfil["repeticiones"])
+        resultados[f"sumar_todo[{etiqueta}]"] = medir(modificar_y_sumar, perfil["repeticiones"])
+        with BaseDatosTemporal():
+            db.crear_tablas()
+            id_raiz = proyectos.guardar_proyecto(proyecto)
+            resultados[f"cargar_proyecto[{etiqueta}]"] = medir(
+                lambda: proyectos.cargar_proyecto(id_raiz), perfil["repeticiones"])
+    return resultados
+
+
+def bench_cargar_casa(perfil):
+    from interfaz import InterfazPrincipal
+    resultados = {}
+    for n in perfil["habitaciones_db"]:
+        for m in perfil["materiales"]:
+            with BaseDatosTemporal():
+                casa_id = poblar_db_sintetica(n, m)
+                # El método solo usa atributos de instancia opcionales: no requiere ventana Tk
+                vista = SimpleNamespace()
+                resultados[f"cargar_casa_desde_db[{n}x{m}]"] = medir(
+                    lambda: InterfazPrincipal.cargar_casa_desde_db(vista, casa_id),
+                    perfil["repeticiones"])
+    return resultados
+
+
+def bench_instantanea(perfil):
+    """Abrir una instantánea mapeada y costear todo, frente a cargar desde SQLite"""
+    import instantaneas
+    resultados = {}
+    for n in perfil["habitaciones_db"]:
+        with BaseDatosTemporal(), tempfile.TemporaryDirectory() as temporal:
+            poblar_db_sintetica(n, 50)
+            directorio = os.path.join(temporal, "instantanea")
+            resultados[f"exportar_instantanea[{n}]"] = medir(
+                lambda: instantaneas.exportar_instantanea(directorio), perfil["repeticiones"])
+            resultados[f"abrir_y_costear_instantanea[{n}]"] = medir(
+                lambda: instantaneas.Instantanea(directorio).costos_por_casa(), perfil["repeticiones"])
+    return resultados
+
+
+def bench_escrituras_db(perfil):
+    """Mismas escrituras que hace InterfazPrincipal al guardar habitaciones nuevas"""
+    resultados = {}
+    for n in perfil["escrituras_db"]:
+        with BaseDatosTemporal():
+            db.crear_tablas()
+            casa_id = db.guardar_casa("Casa escrituras")
+
+            def escribir():
+                for i in range(n):
+                    id_hab = db.guardar_habitacion(f"Habitación {i}", 3.0, 4.0, 2.5, casa_id)
+                    db.guardar_habitacion_material(id_hab, None, None, None)
+
+            def limpiar():
+                conn = db.get_db_connection()
+                conn.execute("DELETE FROM habitacion_material")
+                conn.execute("DELETE FROM habitacion")
+                conn.commit()
+                conn.close()
+
+            resultados[f"guardar_habitacion[{n}]"] = medir(escribir, perfil["repeticiones"], preparar=limpiar)
+    return resultados
+
+
+def bench_dashboard(perfil):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from graficos import Dashboard
+
+    resultados = {}
+    for n in perfil["habitaciones_dashboard"]:
+        casa = generar_casa_sintetica(n)
+
+        def renderizar():
+            Dashboard(casa).mostrar()
+            plt.gcf().canvas.draw()
+            plt.close("all")
+
+        with warnings.catch_warnings():
+            # plt.show() avisa que Agg no es interactivo
+            warnings.simplefilter("ignore")
+            resultados[f"Dashboard.mostrar[{n}]"] = medir(renderizar, perfil["repeticiones"])
+
+    # Dashboard incrustado: edición de una habitación con la figura ya dibujada
+    # (meta: menos de 50 ms con 200 habitaciones)
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from graficos import DashboardEmbebido
+
+    for n in perfil["habitaciones_dashboard_embebido"]:
+        casa = generar_casa_sintetica(n)
+        dashboard = DashboardEmbebido()
+        lienzo = FigureCanvasAgg(dashboard.figura)
+        dashboard.actualizar(casa)
+        lienzo.draw()
+        habitacion = casa.habitaciones[0]
+
+        def editar():
+            habitacion.ancho += 0.01
+            dashboard.actualizar(casa)
+
+        resultados[f"DashboardEmbebido.actualizar[{n}]"] = medir(editar, max(perfil["repeticiones"], 10))
+    return resultados
+
+
+def bench_impuestos(perfil):
+    """Modo flotante frente a modo exacto en centavos (meta: menos de 2x)
+
+    El modo exacto se mide desde pesos, incluida la conversión a centavos.
+    Antes de medir se comprueba contra la referencia Decimal, también con un
+    factor sin expansión decimal corta (1/3) que no cabe en int64.
+    """
+    import numpy as np
+    import impuestos
+
+    muestra = np.round(np.random.default_rng(1).uniform(10_000, 50_000_000, 200), 2)
+    for config in (None, {"factor_iva": 1 / 3, "factor_administracion": 0.05, "factor_utilidad": 0.2}):
+        totales = impuestos.aplicar_impuestos_centavos(impuestos.a_centavos(muestra), config)
+        for precio, total in zip(muestra, totales):
+            esperado = impuestos.calcular_precio_con_impuestos_decimal(precio, config)
+            assert Decimal(int(total)) / 100 == esperado, (precio, config, int(total), esperado)
+
+    resultados = {}
+    rnd = np.random.default_rng(0)
+    for n in perfil["lineas_impuestos"]:
+        precios = np.round(rnd.uniform(10_000, 50_000_000, n), 2)
+        flotante = medir(lambda: impuestos.desglosar_lote(precios), perfil["repeticiones"] * 3)
+        exacto = medir(lambda: impuestos.desglosar_centavos(impuestos.a_centavos(precios)),
+                       perfil["repeticiones"] * 3)
+        exacto["razon_vs_flotante"] = exacto["mediana"] / flotante["mediana"]
+        resultados[f"impuestos_flotante[{n}]"] = flotante
+        resultados[f"impuestos_exacto[{n}]"] = exacto
+    return resultados
+
+
+def _especificacion_sintetica(n, semilla):
+    """Especificación JSON para servicio.py con n habitaciones del catálogo real"""
+    rnd = random.Random(semilla)
+    pisos, paredes, sistemas = list(MATERIALES_PISO), list(MATERIALES_PARED), list(SISTEMAS_CONSTRUCCION)
+    return {"nombre": f"Casa {semilla}", "habitaciones": [
+        {"nombre": f"Habitación {i}", "ancho": round(rnd.uniform(2, 8), 2), "largo": round(rnd.uniform(2, 8), 2),
+         "material_piso": rnd.choice(pisos), "material_paredes": rnd.choice(paredes),
+         "sistema_construccion": rnd.choice(sistemas)} for i in range(n)]}
+
+
+def bench_servicio(perfil):
+    """Latencia y rendimiento del servicio de cotizaciones en localhost"""
+    import http.client
+    from concurrent.futures import ThreadPoolExecutor
+    import servicio
+
+    def cliente(url):
+        host, puerto = url.split("//")[1].split(":")
+        return http.client.HTTPConnection(host, int(puerto))
+
+    def publicar(conexion, ruta, cuerpo):
+        conexion.request("POST", ruta, body=json.dumps(cuerpo), headers={"Content-Type": "application/json"})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        assert respuesta.status == 200, respuesta.status
+
+    resultados = {}
+    repeticiones = perfil["repeticiones"] * 10
+    with servicio.ServicioCotizacion(puerto=0) as srv:
+        conexion = cliente(srv.url)
+        for n in perfil["habitaciones_servicio"]:
+            semillas = iter(range(10**9))
+            resultados[f"cotizar_sin_cache[{n}]"] = medir(
+                lambda: publicar(conexion, "/cotizar", _especificacion_sintetica(n, next(semillas))), repeticiones)
+            fija = _especificacion_sintetica(n, -1)
+            publicar(conexion, "/cotizar", fija)
+            resultados[f"cotizar_con_cache[{n}]"] = medir(lambda: publicar(conexion, "/cotizar", fija), repeticiones)
+            lote = {"casas": [_especificacion_sintetica(n, -2 - i) for i in range(100)]}
+            srv.cache.limpiar()
+            resultados[f"cotizar_lote_100[{n}]"] = medir(lambda: publicar(conexion, "/cotizar/lote", lote), 1)
+        conexion.close()
+
+        # Rendimiento con clientes concurrentes (mezcla 50% aciertos de caché)
+        clientes, peticiones = perfil["clientes_servicio"], 400
+        especificaciones = [_especificacion_sintetica(10, i % (peticiones // 2)) for i in range(peticiones)]
+
+        def trabajar(parte):
+            conexion = cliente(srv.url)
+            for espec in parte:
+                publicar(conexion, "/cotizar", espec)
+            conexion.close()
+
+        def rafaga():
+            srv.cache.limpiar()
+            with ThreadPoolExecutor(clientes) as grupo:
+                list(grupo.map(trabajar, [especificaciones[i::clientes] for i in range(clientes)]))
+
+        medicion = medir(rafaga, perfil["repeticiones"])
+        medicion["peticiones_por_s"] = peticiones / medicion["mediana"]
+        resultados[f"rafaga_{peticiones}_peticiones[{clientes}_clientes]"] = medicion
+    return resultados
+
+
+def _escritor_concurrente(ruta, casa_id, id_compartida, indice, operaciones):
+    """Proceso escritor: incrementos optimistas sobre una fila compartida e inserciones propias"""
+    db.DB_PATH = ruta
+    conflictos, propias = 0, []
+    for k in range(operaciones):
+        # Leer-modificar-escribir con versión: si otro escribió antes, se relee
+        while True:
+            conn = db.get_db_connection()
+            ancho, version = conn.execute("SELECT ancho, version FROM habitacion WHERE id = ?",
+                                          (id_compartida,)).fetchone()
+            conn.close()
+            try:
+                db.actualizar_habitacion(id_compartida, ancho + 1, 1.0, 2.5, version)
+                break
+            except db.ConflictoConcurrencia:
+                conflictos += 1
+        # 20 habitaciones propias; después se reescribe su relación (UPSERT)
+        if k < 20:
+            propias.append(db.guardar_habitacion(f"Escritor {indice} - {k}", 3.0, 4.0, 2.5, casa_id))
+        db.guardar_habitacion_material(propias[k % 20], None, None, None)
+    return conflictos
+
+
+def bench_concurrencia(perfil):
+    """Varios procesos escribiendo a la vez en la misma base (WAL, reintentos, versiones)"""
+    import multiprocessing
+    escritores, operaciones = perfil["escritores_concurrentes"], perfil["operaciones_por_escritor"]
+    resultados = {}
+    with BaseDatosTemporal() as ruta:
+        db.crear_tablas()
+        casa_id = db.guardar_casa("Casa concurrente")
+        id_compartida = db.guardar_habitacion("Compartida", 0.0, 1.0, 2.5, casa_id)
+        contexto = multiprocessing.get_context("spawn")
+        with contexto.Pool(escritores) as grupo:
+            inicio = time.perf_counter()
+            conflictos = grupo.starmap(_escritor_concurrente,
+                                       [(ruta, casa_id, id_compartida, i, operaciones) for i in range(escritores)])
+            duracion = time.perf_counter() - inicio
+
+        conn = db.get_db_connection()
+        ancho, version = conn.execute("SELECT ancho, version FROM habitacion WHERE id = ?", (id_compartida,)).fetchone()
+        habitaciones = conn.execute("SELECT COUNT(*) FROM habitacion WHERE id_casa = ?", (casa_id,)).fetchone()[0]
+        relaciones = conn.execute("SELECT COUNT(*) FROM habitacion_material").fetchone()[0]
+        conn.close()
+        esperado = escritores * operaciones
+        # Sin actualizaciones perdidas: cada incremento confirmado quedó escrito
+        assert ancho == esperado and version == esperado, (ancho, version, esperado)
+        assert habitaciones == 1 + escritores * min(operaciones, 20), habitaciones
+        assert relaciones == escritores * min(operaciones, 20), relaciones
+        resultados[f"escritores_concurrentes[{escritores}x{operaciones}]"] = {
+            "min": duracion, "mediana": duracion, "max": duracion, "repeticiones": 1,
+            "escrituras_por_s": 3 * esperado / duracion,
+            "conflictos": sum(conflictos),
+        }
+    return resultados
+
+
+def _copiar_casa(cursor, casa_id, copias):
+    """Inserta copias de una casa (habitaciones y materiales) con SQL, sin pasar por Python"""
+    for i in range(copias):
+        cursor.execute("INSERT INTO casa (nombre) SELECT nombre || ' ' || ? FROM casa WHERE id = ?", (i + 1, casa_id))
+        nueva = cursor.lastrowid
+        cursor.execute("INSERT INTO habitacion (nombre, ancho, largo, altura, id_casa) "
+                       "SELECT nombre, ancho, largo, altura, ? FROM habitacion WHERE id_casa = ?", (nueva, casa_id))
+        cursor.execute("INSERT INTO habitacion_material (id_habitacion, id_material_piso, id_material_paredes, "
+                       "id_sistema_construccion) SELECT hn.id, hm.id_material_piso, hm.id_material_paredes, "
+                       "hm.id_sistema_construccion FROM habitacion ho "
+                       "JOIN habitacion_material hm ON hm.id_habitacion = ho.id "
+                       "JOIN habitacion hn ON hn.id_casa = ? AND hn.nombre = ho.nombre "
+                       "WHERE ho.id_casa = ?", (nueva, casa_id))
+
+
+def bench_lote_graficos(perfil):
+    """Imágenes por segundo del renderizado por lotes con 1 proceso y con uno por núcleo"""
+    import lote_graficos
+
+    resultados = {}
+    casas, habitaciones = perfil["casas_lote"], perfil["habitaciones_lote"]
+    with BaseDatosTemporal() as ruta:
+        casa_id = poblar_db_sintetica(habitaciones, 50)
+        conn = db.get_db_connection()
+        _copiar_casa(conn.cursor(), casa_id, casas - 1)
+        conn.commit()
+        conn.close()
+        for procesos in sorted({1, os.cpu_count() or 1}):
+            salida = os.path.join(os.path.dirname(ruta), f"imagenes_{procesos}")
+            resultado = lote_graficos.renderizar_lote(salida, procesos=procesos)
+            assert resultado["imagenes"] == 3 * casas, resultado["imagenes"]
+            duracion = resultado["segundos"]
+            resultados[f"renderizar_lote[{casas}x{habitaciones}, {procesos} procesos]"] = {
+                "min": duracion, "mediana": duracion, "max": duracion, "repeticiones": 1,
+                "imagenes_por_s": resultado["imagenes_por_segundo"],
+            }
+    return resultados
+
+
+CASOS = {
+    "clases": bench_estadisticas,
+    "simulacion": bench_simulacion,
+    "plantillas": bench_plantillas,
+    "especificaciones": bench_especificaciones,
+    "proyectos": bench_proyectos,
+    "db_lectura": bench_cargar_casa,
+    "instantanea": bench_instantanea,
+    "db_escritura": bench_escrituras_db,
+    "graficos": bench_dashboard,
+    "lote_graficos": bench_lote_graficos,
+    "impuestos": bench_impuestos,
+    "servicio": bench_servicio,
+    "concurrencia": bench_concurrencia,
+}
+
+
+# =============================================================================
+# RESULTADOS Y COMPARACIÓN
+# =============================================================================
+
+def obtener_commit_actual():
+    """Devuelve el hash corto del commit actual, o 'desconocido'"""
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return salida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def ejecutar(nombre_perfil="rapido", casos=None):
+    """Ejecuta los casos seleccionados y devuelve el diccionario de resultados"""
+    perfil = PERFILES[nombre_perfil]
+    resultados = {}
+    for nombre in casos or CASOS:
+        print(f"▶ {nombre}")
+        for clave, medicion in CASOS[nombre](perfil).items():
+            resultados[clave] = medicion
+            print(f"  {clave:<45} {medicion['mediana'] * 1000:>12.3f} ms")
+    return {
+        "commit": obtener_commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "perfil": nombre_perfil,
+        "python": sys.version.split()[0],
+        "resultados": resultados,
+    }
+
+
+def guardar_resultados(reporte, directorio=DIRECTORIO_RESULTADOS):
+    """Guarda el reporte como JSON y devuelve la ruta del archivo"""
+    os.makedirs(directorio, exist_ok=True)
+    marca = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ruta = os.path.join(directorio, f"{marca}_{reporte['commit']}_{reporte['perfil']}.json")
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+    return ruta
+
+
+def comparar(base, nuevo, umbral=1.10):
+    """Compara dos reportes por mediana.
+
+    Returns:
+        Lista de (caso, tiempo_base, tiempo_nuevo, razon) para los casos cuya
+        razón nuevo/base supera el umbral
+    """
+    regresiones = []
+    for caso, medicion in nuevo["resultados"].items():
+        anterior = base["resultados"].get(caso)
+        if not anterior or anterior["mediana"] == 0:
+            continue
+        razon = medicion["mediana"] / anterior["mediana"]
+        if razon > umbral:
+            regresiones.append((caso, anterior["mediana"], medicion["mediana"], razon))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del sistema de costos de construcción")
+    parser.add_argument("--perfil", choices=list(PERFILES), default="rapido")
+    parser.add_argument("--casos", nargs="*", choices=list(CASOS), help="Casos a ejecutar (por defecto todos)")
+    parser.add_argument("--comparar", metavar="JSON", help="Reporte base contra el cual comparar")
+    parser.add_argument("--umbral", type=float, default=1.10, help="Razón de tiempo considerada regresión")
+    parser.add_argument("--no-guardar", action="store_true", help="No guardar el reporte en disco")
+    args = parser.parse_args()
+
+    reporte = ejecutar(args.perfil, args.casos)
+    if not args.no_guardar:
+        print(f"✅ Resultados guardados en: {guardar_resultados(reporte)}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(base, reporte, args.umbral)
+        if not regresiones:
+            print(f"✅ Sin regresiones frente a {base['commit']}")
+            return 0
+        print(f"⚠️ Regresiones frente a {base['commit']}:")
+        for caso, anterior, actual, razon in regresiones:
+            print(f"  {caso:<45} {anterior * 1000:>10.3f} ms → {actual * 1000:>10.3f} ms (x{razon:.2f})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
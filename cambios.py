@@ -0,0 +1,189 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: cambios.py
+Suscripción a cambios de otros usuarios (registro_cambios) y aplicación por deltas
+
+Los triggers de db.py anotan cada fila escrita en registro_cambios con una
+secuencia creciente. SuscriptorCambios consulta solo lo posterior a la
+última secuencia vista (una consulta por índice, barata aunque se haga cada
+segundo) y aplicar_cambios() actualiza la Casa en memoria releyendo solo las
+filas afectadas.
+
+Los cambios propios también llegan por el registro; como los valores ya
+coinciden con los de memoria, no marcan habitaciones como afectadas.
+"""
+
+import db
+from clases import Habitacion
+from datos import (
+    MATERIALES_PISO,
+    MATERIALES_PARED,
+    SISTEMAS_CONSTRUCCION,
+    obtener_material_pared,
+    obtener_material_piso,
+    obtener_sistema_construccion,
+)
+
+INTERVALO_CAMBIOS_MS = 1000
+
+
+class SuscriptorCambios:
+    """Lleva la última secuencia vista de una casa y devuelve los cambios nuevos"""
+
+    def __init__(self, id_casa, desde=None):
+        """
+        Args:
+            id_casa: Casa de la que interesan los cambios (más los de catálogo)
+            desde: Secuencia inicial; por defecto la última existente (solo
+                interesan los cambios posteriores a la carga de la casa)
+        """
+        self.id_casa = id_casa
+        self.secuencia = db.obtener_ultima_secuencia() if desde is None else desde
+
+    def consultar(self):
+        """Cambios posteriores a la última consulta, en orden de secuencia"""
+        cambios = db.obtener_cambios_desde(self.secuencia, self.id_casa)
+        if cambios:
+            self.secuencia = cambios[-1][0]
+        return cambios
+
+
+class ResultadoCambios:
+    """Qué cambió en memoria tras aplicar un lote de cambios"""
+
+    def __init__(self):
+        self.afectadas = []  # Habitaciones cuyo costo o datos cambiaron
+        self.agregadas = []
+        self.eliminadas = []
+        self.catalogo = False  # Cambió algún precio o factor
+
+    @property
+    def estructura(self):
+        """True si cambió la lista de habitaciones (no basta con refrescar filas)"""
+        return bool(self.agregadas or self.eliminadas)
+
+    def __bool__(self):
+        return bool(self.afectadas or self.estructura or self.catalogo)
+
+
+def aplicar_cambios(casa, cambios):
+    """Aplica a la casa en memoria los cambios leídos del registro
+
+    Varios cambios sobre la misma fila se agrupan y la fila se relee una sola
+    vez con su estado actual.
+
+    Returns:
+        ResultadoCambios
+    """
+    resultado = ResultadoCambios()
+    habitaciones, materiales, sistemas = {}, set(), set()
+    for _, tabla, _, id_fila, _, nombre in cambios:
+        if tabla in ("habitacion", "habitacion_material"):
+            habitaciones[id_fila] = nombre
+        elif tabla == "material":
+            materiales.add(id_fila)
+        elif tabla == "sistema_construccion":
+            sistemas.add(id_fila)
+
+    afectadas = {}
+    for material in _aplicar_materiales(materiales):
+        resultado.catalogo = True
+        for h in casa.habitaciones:
+            if h.material_piso is material or h.material_paredes is material:
+                afectadas[id(h)] = h
+    for sistema in _aplicar_sistemas(sistemas):
+        resultado.catalogo = True
+        for h in casa.habitaciones:
+            if h.sistema_construccion is sistema:
+                afectadas[id(h)] = h
+
+    actuales = {fila[0]: fila for fila in db.obtener_habitaciones_con_materiales(habitaciones)}
+    renombradas, nuevas = [], []
+    for id_hab, nombre in habitaciones.items():
+        fila = actuales.get(id_hab)
+        h = _buscar_habitacion(casa, id_hab, nombre if fila is None else fila[1])
+        if fila is None:
+            # Ya no existe en la base: se eliminó
+            if h is not None:
+                casa.eliminar_habitacion(h.nombre)
+                resultado.eliminadas.append(h)
+                afectadas.pop(id(h), None)
+            continue
+        if h is None:
+            nuevas.append(fila)
+            continue
+        if h.nombre != fila[1]:
+            renombradas.append((h, fila[1]))
+        if _actualizar_habitacion(h, fila):
+            afectadas[id(h)] = h
+    # Todas a la vez: un intercambio de nombres no choca consigo mismo
+    casa.renombrar_habitaciones(renombradas)
+    for h, _ in renombradas:
+        afectadas[id(h)] = h
+    # Después de renombrar: una nueva puede tomar el nombre que otra dejó
+    for fila in nuevas:
+        h = Habitacion(fila[1], fila[2], fila[3], fila[4])
+        h.id = fila[0]
+        _actualizar_habitacion(h, fila)
+        casa.agregar_habitacion(h)
+        resultado.agregadas.append(h)
+
+    resultado.afectadas = list(afectadas.values())
+    # Subtotales en caché: un precio nuevo afecta a todo el proyecto
+    if resultado.catalogo:
+        casa.raiz().recalcular_subtotales()
+    else:
+        for h in resultado.afectadas:
+            casa.actualizar_habitacion(h)
+    return resultado
+
+
+def _buscar_habitacion(casa, id_hab, nombre):
+    """Habitación en memoria por id; por nombre solo si aún no tiene id"""
+    h = casa.obtener_habitacion_por_id(id_hab)
+    if h is None:
+        h = casa.obtener_habitacion(nombre)
+        if h is None or h.id is not None:
+            return None
+        h.id = id_hab
+    return h
+
+
+def _actualizar_habitacion(h, fila):
+    """Copia la fila en la habitación; devuelve True si algo cambió"""
+    _, _, ancho, largo, altura, version, piso, paredes, sistema, cantidad = fila
+    nuevos = {
+        "ancho": ancho, "largo": largo, "altura": altura, "cantidad": cantidad,
+        "material_piso": obtener_material_piso(piso) if piso else None,
+        "material_paredes": obtener_material_pared(paredes) if paredes else None,
+        "sistema_construccion": obtener_sistema_construccion(sistema) if sistema else None,
+    }
+    cambio = False
+    for campo, valor in nuevos.items():
+        if getattr(h, campo) is not valor and getattr(h, campo) != valor:
+            setattr(h, campo, valor)
+            cambio = True
+    h.version = version
+    return cambio
+
+
+def _aplicar_materiales(ids):
+    """Actualiza en sitio los precios del catálogo; devuelve los materiales que cambiaron"""
+    cambiados = []
+    for _, nombre, precio, tipo in db.obtener_materiales_por_ids(ids):
+        catalogo = MATERIALES_PARED if tipo == "pared" else MATERIALES_PISO
+        material = catalogo.get(nombre)
+        if material is not None and material.precio_m2 != precio:
+            material.precio_m2 = precio
+            cambiados.append(material)
+    return cambiados
+
+
+def _aplicar_sistemas(ids):
+    cambiados = []
+    for _, nombre, factor, _ in db.obtener_sistemas_por_ids(ids):
+        sistema = SISTEMAS_CONSTRUCCION.get(nombre)
+        if sistema is not None and sistema.factor_costo != factor:
+            sistema.factor_costo = factor
+            cambiados.append(sistema)
+    return cambiados
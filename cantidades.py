@@ -0,0 +1,185 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: cantidades.py
+Motor de cantidades de obra: unidades de compra, desperdicios y empaques
+
+Convierte cada Habitacion en cantidades de material (m², litros, kg) y las
+agrega para toda la casa. El redondeo a empaques completos (cajas, galones,
+bultos) se hace una sola vez por material a nivel de casa: dos habitaciones
+que necesitan media caja cada una comparten una caja.
+"""
+
+import math
+
+import numpy as np
+
+from clases import calcular_costos_arreglos
+from datos import obtener_parametros_cantidad, PARAMETROS_PINTURA
+
+
+def consumo_por_m2(parametros):
+    """Unidades de compra por m² sin desperdicio (consumo por número de manos)"""
+    return parametros["consumo"] * parametros["manos"]
+
+
+def precio_unidad(material, parametros=None):
+    """Precio por unidad de compra derivado del precio por m² del material.
+
+    Comprar exactamente la cantidad neta cuesta lo mismo que el modelo por
+    área de Material.calcular_costo_area.
+    """
+    parametros = parametros or obtener_parametros_cantidad(material)
+    return material.precio_m2 / consumo_por_m2(parametros)
+
+
+def es_pintura(parametros):
+    """Indica si el material se compra por litros"""
+    return parametros["unidad"] == "L"
+
+
+def cantidades_habitacion(habitacion):
+    """Cantidades de obra de una habitación (sin redondear a empaques)
+
+    Una habitación con cantidad > 1 cuenta todas sus unidades.
+
+    Returns:
+        Lista de diccionarios (superficie, material, area, unidad,
+        cantidad_neta, cantidad_bruta)
+    """
+    lineas = []
+    superficies = (("piso", habitacion.material_piso, habitacion.calcular_area_piso),
+                   ("paredes", habitacion.material_paredes, habitacion.calcular_area_paredes))
+    for superficie, material, calcular_area in superficies:
+        if not material:
+            continue
+        parametros = obtener_parametros_cantidad(material)
+        area = calcular_area() * habitacion.cantidad
+        neta = area * consumo_por_m2(parametros)
+        lineas.append({
+            "superficie": superficie,
+            "material": material.nombre,
+            "area": area,
+            "unidad": parametros["unidad"],
+            "cantidad_neta": neta,
+            "cantidad_bruta": neta * (1 + parametros["desperdicio"]),
+        })
+    return lineas
+
+
+def _areas_por_material(habitaciones, atributo, areas, acumulado):
+    """Suma áreas por objeto Material con np.bincount"""
+    materiales = [getattr(h, atributo) for h in habitaciones]
+    indices = {}
+    codigos = np.fromiter((indices.setdefault(id(m), len(indices)) if m else -1 for m in materiales),
+                          np.int64, len(materiales))
+    if not indices:
+        return
+    validos = codigos >= 0
+    sumas = np.bincount(codigos[validos], weights=areas[validos], minlength=len(indices))
+    por_id = {id(m): m for m in materiales if m}
+    for id_material, codigo in indices.items():
+        material = por_id[id_material]
+        acumulado.setdefault(id_material, [material, 0.0])[1] += sumas[codigo]
+
+
+def cantidades_casa(casa):
+    """Lista de compras de toda la casa, redondeada a empaques completos
+
+    Returns:
+        Lista de diccionarios por material (material, tipo, unidad, area,
+        cantidad_neta, cantidad_bruta, empaque, presentacion, empaques,
+        cantidad_comprada, precio_unidad, costo_compra), ordenada por nombre
+    """
+    if not casa.habitaciones:
+        return []
+    arreglos = casa.obtener_arreglos()
+    acumulado = {}
+    _areas_por_material(casa.habitaciones, "material_piso", arreglos["area_piso"], acumulado)
+    _areas_por_material(casa.habitaciones, "material_paredes", arreglos["area_paredes"], acumulado)
+
+    compras = []
+    for material, area in acumulado.values():
+        parametros = obtener_parametros_cantidad(material)
+        neta = area * consumo_por_m2(parametros)
+        bruta = neta * (1 + parametros["desperdicio"])
+        presentacion = parametros["presentacion"]
+        empaques = math.ceil(round(bruta / presentacion, 9)) if bruta > 0 else 0
+        unitario = precio_unidad(material, parametros)
+        compras.append({
+            "material": material.nombre,
+            "tipo": material.tipo,
+            "unidad": parametros["unidad"],
+            "area": area,
+            "cantidad_neta": neta,
+            "cantidad_bruta": bruta,
+            "empaque": parametros["empaque"],
+            "presentacion": presentacion,
+            "empaques": empaques,
+            "cantidad_comprada": empaques * presentacion,
+            "precio_unidad": unitario,
+            "costo_compra": empaques * presentacion * unitario,
+        })
+    compras.sort(key=lambda c: c["material"])
+    return compras
+
+
+def columnas_dashboard_pintura(casa):
+    """Datos de pintura por habitación en columnas (un arreglo NumPy por clave)
+
+    Returns:
+        Diccionario con nombre (lista) y area_piso, area_paredes, volumen,
+        costo_total, litros_pintura, costo_pintura, costo_primer y
+        costo_accesorios y cantidad (arreglos). Las habitaciones sin pintura en paredes
+        tienen litros y costos de pintura en cero.
+    """
+    n = len(casa.habitaciones)
+    arreglos = casa.obtener_arreglos()
+    litros_m2 = np.zeros(n)
+    precio_litro = np.zeros(n)
+    cache = {}
+    for i, h in enumerate(casa.habitaciones):
+        material = h.material_paredes
+        if not material:
+            continue
+        if id(material) not in cache:
+            parametros = obtener_parametros_cantidad(material)
+            cache[id(material)] = ((consumo_por_m2(parametros) * (1 + parametros["desperdicio"]),
+                                    precio_unidad(material, parametros))
+                                   if es_pintura(parametros) else (0.0, 0.0))
+        litros_m2[i], precio_litro[i] = cache[id(material)]
+
+    area_paredes = arreglos["area_paredes"]
+    litros = area_paredes * litros_m2
+    costo_pintura = litros * precio_litro
+    costo_primer = np.where(litros > 0, area_paredes * PARAMETROS_PINTURA["consumo_primer"]
+                            * PARAMETROS_PINTURA["precio_primer_litro"], 0.0)
+    costo_accesorios = costo_pintura * PARAMETROS_PINTURA["factor_accesorios"]
+
+    return {
+        "nombre": [h.nombre for h in casa.habitaciones],
+        "area_piso": arreglos["area_piso"], "area_paredes": area_paredes, "volumen": arreglos["volumen"],
+        "costo_total": calcular_costos_arreglos(arreglos), "litros_pintura": litros,
+        "costo_pintura": costo_pintura, "costo_primer": costo_primer, "costo_accesorios": costo_accesorios,
+        "cantidad": arreglos["cantidad"],
+    }
+
+
+def datos_dashboard_pintura(casa):
+    """Datos por habitación con las claves que espera graficos.DashboardPintura
+
+    Returns:
+        Lista de diccionarios, uno por habitación, con las claves de
+        columnas_dashboard_pintura()
+    """
+    if not casa.habitaciones:
+        return []
+    columnas = columnas_dashboard_pintura(casa)
+    nombres = columnas.pop("nombre")
+    listas = {clave: valores.tolist() for clave, valores in columnas.items()}
+    return [dict({"nombre": nombre}, **{clave: listas[clave][i] for clave in listas})
+            for i, nombre in enumerate(nombres)]
+
+
+def datos_materiales_pintura(casa):
+    """Diccionario material -> línea de compra, para el parámetro datos_materiales"""
+    return {linea["material"]: linea for linea in cantidades_casa(casa)}
@@ -0,0 +1,361 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: catalogos.py
+Carga de catálogos y configuración desde archivos externos
+
+Los valores de datos.py son los predeterminados. Un archivo TOML, JSON o
+SQLite puede reemplazarlos sin cambiar código:
+
+- TOML/JSON: secciones configuracion, materiales_piso, materiales_pared,
+  sistemas_construccion, tipos_habitacion, niveles_acabado y
+  plantillas_casa (todas opcionales)
+- SQLite: tablas material y sistema_construccion con el esquema de db.py
+
+El resultado de interpretar un archivo se guarda como JSON en el caché del
+usuario (XDG_CACHE_HOME o ~/.cache), con el hash del contenido del archivo
+como clave, para no volver a interpretar catálogos grandes en cada inicio.
+El caché solo guarda datos (nunca se ejecuta nada al leerlo).
+
+Cada carga reemplaza a la anterior: lo que un catálogo fijó y el siguiente
+ya no trae vuelve al valor de datos.py (o desaparece si no existía allí).
+
+Ejemplo TOML:
+
+    [configuracion]
+    factor_iva = 0.19
+
+    [materiales_piso]
+    "Cerámica Básica" = 47000
+    "Porcelanato Nuevo" = { precio_m2 = 99000 }
+
+    [sistemas_construccion."Drywall"]
+    factor_costo = 0.85
+    descripcion = "Paneles de yeso"
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tomllib
+
+import datos
+from clases import Material, SistemaConstruccion
+
+VARIABLE_ENTORNO = "CONSTRUCCION_CATALOGO"
+RUTA_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogo.toml")
+DIRECTORIO_CACHE = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                                "construccion_catalogo")
+VERSION_CACHE = 3
+INTERVALO_RECARGA_MS = 2000
+
+# Errores de un archivo de catálogo ilegible o inválido (JSON y TOML mal
+# formados son ValueError); con ellos se sigue con el catálogo vigente
+ERRORES_CATALOGO = (OSError, ValueError, KeyError, TypeError, sqlite3.Error)
+
+# Se incrementa cada vez que se aplica un catálogo (sirve como clave de cachés)
+version_catalogo = 0
+
+_SECCIONES = ("configuracion", "materiales_piso", "materiales_pared", "sistemas_construccion",
+              "tipos_habitacion", "niveles_acabado", "plantillas_casa")
+
+
+# =============================================================================
+# LECTURA DE ARCHIVOS
+# =============================================================================
+
+def _normalizar_materiales(seccion):
+    """{'nombre': precio | {precio_m2: ...}} -> {'nombre': precio_m2}"""
+    materiales = {}
+    for nombre, valor in (seccion or {}).items():
+        materiales[nombre] = float(valor["precio_m2"] if isinstance(valor, dict) else valor)
+    return materiales
+
+
+def _normalizar_sistemas(seccion):
+    """{'nombre': factor | {factor_costo, descripcion}} -> {'nombre': (factor, descripcion)}"""
+    sistemas = {}
+    for nombre, valor in (seccion or {}).items():
+        if isinstance(valor, dict):
+            sistemas[nombre] = (float(valor.get("factor_costo", 1.0)), valor.get("descripcion", ""))
+        else:
+            sistemas[nombre] = (float(valor), "")
+    return sistemas
+
+
+def _desde_diccionario(contenido):
+    return {
+        "configuracion": dict(contenido.get("configuracion", {})),
+        "materiales_piso": _normalizar_materiales(contenido.get("materiales_piso")),
+        "materiales_pared": _normalizar_materiales(contenido.get("materiales_pared")),
+        "sistemas_construccion": _normalizar_sistemas(contenido.get("sistemas_construccion")),
+        "tipos_habitacion": dict(contenido.get("tipos_habitacion", {})),
+        "niveles_acabado": dict(contenido.get("niveles_acabado", {})),
+        "plantillas_casa": dict(contenido.get("plantillas_casa", {})),
+    }
+
+
+def _leer_sqlite(ruta):
+    conn = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT nombre, precio_m2, tipo FROM material")
+        materiales = cursor.fetchall()
+        cursor.execute("SELECT nombre, factor_costo, descripcion FROM sistema_construccion")
+        sistemas = cursor.fetchall()
+    finally:
+        conn.close()
+    return {
+        "configuracion": {},
+        "materiales_piso": {n: float(p) for n, p, t in materiales if t == "piso"},
+        "materiales_pared": {n: float(p) for n, p, t in materiales if t == "pared"},
+        "sistemas_construccion": {n: (float(f), d or "") for n, f, d in sistemas},
+        "tipos_habitacion": {},
+        "niveles_acabado": {},
+        "plantillas_casa": {},
+    }
+
+
+def leer_archivo(ruta):
+    """Interpreta un archivo de catálogo (sin caché)
+
+    Returns:
+        Diccionario normalizado con configuracion, materiales_piso,
+        materiales_pared, sistemas_construccion, tipos_habitacion,
+        niveles_acabado y plantillas_casa
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".toml":
+        with open(ruta, "rb") as archivo:
+            return _desde_diccionario(tomllib.load(archivo))
+    if extension == ".json":
+        with open(ruta, encoding="utf-8") as archivo:
+            return _desde_diccionario(json.load(archivo))
+    if extension in (".db", ".sqlite", ".sqlite3"):
+        return _leer_sqlite(ruta)
+    raise ValueError(f"Formato de catálogo no soportado: {ruta}")
+
+
+def _firma(ruta):
+    estado = os.stat(ruta)
+    return (estado.st_mtime_ns, estado.st_size)
+
+
+def _hash_archivo(ruta):
+    with open(ruta, "rb") as archivo:
+        return hashlib.file_digest(archivo, "blake2b").hexdigest()
+
+
+def _ruta_cache(ruta):
+    # Un archivo de caché por ruta de catálogo, sin mezclar usuarios ni directorios
+    clave = hashlib.blake2b(os.path.abspath(ruta).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(DIRECTORIO_CACHE, clave + ".json")
+
+
+def _leer_cache(ruta_cache, hash_fuente):
+    try:
+        with open(ruta_cache, encoding="utf-8") as archivo:
+            cache = json.load(archivo)
+        if cache["version"] != VERSION_CACHE or cache["hash"] != hash_fuente:
+            return None
+        contenido = cache["contenido"]
+        # JSON no tiene tuplas: (factor, descripcion) vuelve como lista
+        contenido["sistemas_construccion"] = {
+            nombre: tuple(valor) for nombre, valor in contenido["sistemas_construccion"].items()}
+        return contenido
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _escribir_cache(ruta_cache, hash_fuente, contenido):
+    try:
+        os.makedirs(DIRECTORIO_CACHE, mode=0o700, exist_ok=True)
+        temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump({"version": VERSION_CACHE, "hash": hash_fuente, "contenido": contenido},
+                      archivo, ensure_ascii=False)
+        os.replace(temporal, ruta_cache)
+    except (OSError, TypeError, ValueError):
+        pass  # Sin permisos de escritura o valores no serializables: se trabaja sin caché
+
+
+def cargar_archivo(ruta, usar_cache=True):
+    """Lee un catálogo usando el caché JSON si el contenido del archivo no ha cambiado"""
+    if not usar_cache:
+        return leer_archivo(ruta)
+    hash_fuente = _hash_archivo(ruta)
+    ruta_cache = _ruta_cache(ruta)
+    contenido = _leer_cache(ruta_cache, hash_fuente)
+    if contenido is None:
+        contenido = leer_archivo(ruta)
+        _escribir_cache(ruta_cache, hash_fuente, contenido)
+    return contenido
+
+
+# =============================================================================
+# APLICACIÓN SOBRE datos.py
+# =============================================================================
+
+_AUSENTE = object()
+
+# Valor previo de cada elemento que fijó el catálogo vigente:
+# (sección, nombre) -> valor de datos.py, o _AUSENTE si el catálogo lo agregó
+_previos = {}
+
+
+def _destino(seccion):
+    return {
+        "configuracion": datos.CONFIGURACION,
+        "materiales_piso": datos.MATERIALES_PISO,
+        "materiales_pared": datos.MATERIALES_PARED,
+        "sistemas_construccion": datos.SISTEMAS_CONSTRUCCION,
+        "tipos_habitacion": datos.TIPOS_HABITACION,
+        "niveles_acabado": datos.NIVELES_ACABADO,
+        "plantillas_casa": datos.PLANTILLAS_CASA,
+    }[seccion]
+
+
+def _valor_actual(seccion, nombre):
+    """Valor en el formato del catálogo normalizado (precio, (factor, descripcion), ...)"""
+    actual = _destino(seccion).get(nombre, _AUSENTE)
+    if actual is _AUSENTE:
+        return actual
+    if seccion.startswith("materiales_"):
+        return actual.precio_m2
+    if seccion == "sistemas_construccion":
+        return (actual.factor_costo, actual.descripcion)
+    return actual
+
+
+def _restaurar(seccion, nombre, previo):
+    destino = _destino(seccion)
+    if previo is _AUSENTE:
+        destino.pop(nombre, None)
+    elif seccion.startswith("materiales_"):
+        destino[nombre].precio_m2 = previo
+    elif seccion == "sistemas_construccion":
+        destino[nombre].factor_costo, destino[nombre].descripcion = previo
+    else:
+        destino[nombre] = previo
+
+
+def _aplicar_materiales(destino, precios, tipo):
+    # Los objetos existentes se actualizan en sitio: las habitaciones que ya
+    # los referencian ven el precio nuevo sin recargarse
+    for nombre, precio in precios.items():
+        if nombre in destino:
+            destino[nombre].precio_m2 = precio
+        else:
+            destino[nombre] = Material(nombre, precio, tipo)
+
+
+def _aplicar_sistemas(sistemas):
+    for nombre, (factor, descripcion) in sistemas.items():
+        sistema = datos.SISTEMAS_CONSTRUCCION.get(nombre)
+        if sistema:
+            sistema.factor_costo = factor
+            sistema.descripcion = descripcion or sistema.descripcion
+        else:
+            datos.SISTEMAS_CONSTRUCCION[nombre] = SistemaConstruccion(nombre, factor, descripcion)
+
+
+def aplicar_catalogo(contenido):
+    """Aplica un catálogo normalizado sobre los diccionarios de datos.py
+
+    Reemplaza al catálogo aplicado antes: lo que aquel fijó y este no trae
+    vuelve a su valor de datos.py o se elimina si lo había agregado. Los
+    elementos que ningún catálogo menciona conservan su valor.
+    """
+    global version_catalogo
+    nuevos = {(seccion, nombre) for seccion in _SECCIONES for nombre in contenido[seccion]}
+    for clave in [clave for clave in _previos if clave not in nuevos]:
+        _restaurar(*clave, _previos.pop(clave))
+    for clave in nuevos - _previos.keys():
+        _previos[clave] = _valor_actual(*clave)
+    _aplicar_materiales(datos.MATERIALES_PISO, contenido["materiales_piso"], "piso")
+    _aplicar_materiales(datos.MATERIALES_PARED, contenido["materiales_pared"], "pared")
+    _aplicar_sistemas(contenido["sistemas_construccion"])
+    datos.TIPOS_HABITACION.update(contenido["tipos_habitacion"])
+    datos.NIVELES_ACABADO.update(contenido["niveles_acabado"])
+    datos.PLANTILLAS_CASA.update(contenido["plantillas_casa"])
+    datos.actualizar_configuracion(**contenido["configuracion"])
+    version_catalogo += 1
+
+
+def cargar_catalogo(ruta, usar_cache=True):
+    """Lee (con caché) y aplica un archivo de catálogo"""
+    aplicar_catalogo(cargar_archivo(ruta, usar_cache))
+
+
+def ruta_configurada():
+    """Archivo indicado en CONSTRUCCION_CATALOGO, o catalogo.toml si existe"""
+    ruta = os.environ.get(VARIABLE_ENTORNO)
+    if ruta:
+        return ruta
+    return RUTA_POR_DEFECTO if os.path.exists(RUTA_POR_DEFECTO) else None
+
+
+def cargar_desde_entorno():
+    """Carga el catálogo configurado, si hay uno; devuelve la ruta o None"""
+    ruta = ruta_configurada()
+    if ruta:
+        cargar_catalogo(ruta)
+    return ruta
+
+
+def exportar_json(ruta):
+    """Escribe los catálogos actuales de datos.py como JSON (punto de partida para editar)"""
+    contenido = {
+        "configuracion": datos.CONFIGURACION,
+        "materiales_piso": {n: m.precio_m2 for n, m in datos.MATERIALES_PISO.items()},
+        "materiales_pared": {n: m.precio_m2 for n, m in datos.MATERIALES_PARED.items()},
+        "sistemas_construccion": {n: {"factor_costo": s.factor_costo, "descripcion": s.descripcion}
+                                  for n, s in datos.SISTEMAS_CONSTRUCCION.items()},
+        "tipos_habitacion": datos.TIPOS_HABITACION,
+        "niveles_acabado": datos.NIVELES_ACABADO,
+        "plantillas_casa": datos.PLANTILLAS_CASA,
+    }
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(contenido, archivo, ensure_ascii=False, indent=2)
+
+
+# =============================================================================
+# RECARGA EN CALIENTE
+# =============================================================================
+
+class VigilanteCatalogo:
+    """Recarga el catálogo cuando el archivo cambia
+
+    revisar() compara la fecha y el tamaño del archivo; la interfaz lo llama
+    periódicamente con root.after.
+    """
+
+    def __init__(self, ruta, al_recargar=None):
+        self.ruta = ruta
+        self.al_recargar = al_recargar
+        self.ultimo_error = None
+        self._firma = self._firma_actual()
+
+    def _firma_actual(self):
+        try:
+            return _firma(self.ruta)
+        except OSError:
+            return None
+
+    def revisar(self):
+        """Recarga si el archivo cambió; devuelve True si se recargó"""
+        firma = self._firma_actual()
+        if firma is None or firma == self._firma:
+            return False
+        try:
+            cargar_catalogo(self.ruta)
+        except ERRORES_CATALOGO as error:
+            # Archivo a medio guardar o inválido: se reintenta en el próximo cambio
+            self.ultimo_error = error
+            self._firma = firma
+            return False
+        self._firma = firma
+        self.ultimo_error = None
+        if self.al_recargar:
+            self.al_recargar()
+        return True
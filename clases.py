@@ -4,6 +4,16 @@ Archivo: clases.py
 Contiene todas las clases fundamentales del sistema
 """
 
+import numpy as np
+
+import formato
+import geometria
+
+# Niveles de la jerarquía de un proyecto; la unidad es una Casa con sus habitaciones
+NIVELES_PROYECTO = ("proyecto", "edificio", "piso", "unidad")
+# Subtotales en caché de cada nivel (mismas claves que Casa.obtener_estadisticas)
+CAMPOS_SUBTOTAL = ("costo_total", "area_total", "volumen_total", "cantidad_habitaciones")
+
 class Material:
     """Clase para representar materiales de construcción"""
     
@@ -13,7 +23,7 @@ class Material:
         self.tipo = tipo  # piso, pared, techo, etc.
     
     def __str__(self):
-        return f"{self.nombre} - ${self.precio_m2:,.0f}/m²"
+        return f"{self.nombre} - {formato.formatear_precio(self.precio_m2)}/m²"
     
     def calcular_costo_area(self, area):
         """Calcula el costo para una área específica"""
@@ -47,19 +57,72 @@ class Habitacion:
         self.material_piso = None
         self.material_paredes = None
         self.sistema_construccion = None
-        
+        # Geometría opcional: sin vértices la habitación es un rectángulo ancho x largo
+        self.vertices = None
+        self.aberturas = []
+        self.altura_maxima = None  # Techo inclinado: altura en el extremo de mayor x
+        self.id = None  # Id de la fila en la base de datos (None si aún no se ha guardado)
+        self.version = 0  # Versión de la fila en la base de datos (concurrencia optimista)
+        self.cantidad = 1  # Habitaciones idénticas que representa esta especificación
+
+    def asignar_planta(self, vertices):
+        """Asigna una planta poligonal; ancho y largo pasan a ser su caja envolvente"""
+        self.vertices = [(float(x), float(y)) for x, y in vertices]
+        xs = [v[0] for v in self.vertices]
+        ys = [v[1] for v in self.vertices]
+        self.ancho = max(xs) - min(xs)
+        self.largo = max(ys) - min(ys)
+
+    def agregar_abertura(self, abertura):
+        """Agrega una puerta o ventana que se descuenta de las paredes"""
+        self.aberturas.append(abertura)
+
+    def obtener_vertices(self):
+        """Vértices de la planta (el rectángulo si no hay planta asignada)"""
+        if self.vertices is None:
+            return geometria.vertices_rectangulo(self.ancho, self.largo)
+        return self.vertices
+
     def calcular_area_piso(self):
         """Calcula el área del piso"""
-        return self.ancho * self.largo
-    
+        if self.vertices is None:
+            return self.ancho * self.largo
+        return geometria.area_poligono(self.vertices)
+
+    def calcular_perimetro(self):
+        """Calcula el perímetro de la planta"""
+        if self.vertices is None:
+            return 2 * (self.ancho + self.largo)
+        return geometria.perimetro_poligono(self.vertices)
+
+    def calcular_area_paredes_bruta(self):
+        """Calcula el área de paredes sin descontar aberturas"""
+        if self.vertices is None and self.altura_maxima is None:
+            return self.calcular_perimetro() * self.altura
+        return geometria.area_paredes_bruta(self.obtener_vertices(), self.altura, self.altura_maxima)
+
+    def calcular_area_aberturas(self):
+        """Calcula el área de puertas y ventanas"""
+        return geometria.area_aberturas(self.aberturas)
+
     def calcular_area_paredes(self):
-        """Calcula el área total de paredes"""
-        perimetro = 2 * (self.ancho + self.largo)
-        return perimetro * self.altura
-    
+        """Calcula el área neta de paredes (descontando aberturas)"""
+        area = self.calcular_area_paredes_bruta()
+        if self.aberturas:
+            area = max(area - self.calcular_area_aberturas(), 0.0)
+        return area
+
+    def calcular_area_techo(self):
+        """Calcula el área del techo (mayor que la del piso si es inclinado)"""
+        if self.altura_maxima is None:
+            return self.calcular_area_piso()
+        return geometria.area_techo(self.obtener_vertices(), self.altura, self.altura_maxima)
+
     def calcular_volumen(self):
         """Calcula el volumen de la habitación"""
-        return self.ancho * self.largo * self.altura
+        if self.vertices is None and self.altura_maxima is None:
+            return self.ancho * self.largo * self.altura
+        return geometria.volumen(self.obtener_vertices(), self.altura, self.altura_maxima)
     
     def asignar_material_piso(self, material):
         """Asigna material para el piso"""
@@ -87,13 +150,27 @@ class Habitacion:
         area = self.calcular_area_paredes()
         return self.material_paredes.calcular_costo_area(area)
 
-    def calcular_costo_total(self):
-        """Calcula el costo total de la habitación"""
+    def calcular_costo_unitario(self):
+        """Calcula el costo de una sola de las habitaciones idénticas"""
         costo_base = self.calcular_costo_piso() + self.calcular_costo_paredes()
         # Aplicar factor del sistema de construcción si existe
         if self.sistema_construccion:
             costo_base = self.sistema_construccion.aplicar_factor(costo_base)
         return costo_base
+
+    def calcular_costo_total(self):
+        """Calcula el costo total de la habitación (costo unitario por cantidad)"""
+        return self.calcular_costo_unitario() * self.cantidad
+
+    def clave_especificacion(self):
+        """Tupla que identifica el contenido de la habitación (sin nombre ni cantidad)
+
+        Dos habitaciones con la misma clave cuestan lo mismo; los materiales y
+        el sistema se comparan por identidad, como en el resto del cálculo.
+        """
+        return (self.ancho, self.largo, self.altura, id(self.material_piso), id(self.material_paredes),
+                id(self.sistema_construccion), None if self.vertices is None else tuple(self.vertices),
+                tuple((a.tipo, a.ancho, a.alto, a.cantidad) for a in self.aberturas), self.altura_maxima)
     
     def obtener_resumen(self):
         """Obtiene un resumen de la habitación"""
@@ -102,50 +179,152 @@ class Habitacion:
             'dimensiones': f"{self.ancho}m x {self.largo}m x {self.altura}m",
             'area_piso': self.calcular_area_piso(),
             'area_paredes': self.calcular_area_paredes(),
+            'area_aberturas': self.calcular_area_aberturas(),
             'volumen': self.calcular_volumen(),
             'material_piso': str(self.material_piso) if self.material_piso else "No asignado",
             'material_paredes': str(self.material_paredes) if self.material_paredes else "No asignado",
             'sistema': str(self.sistema_construccion) if self.sistema_construccion else "No asignado",
             'costo_piso': self.calcular_costo_piso(),
             'costo_paredes': self.calcular_costo_paredes(),
+            'cantidad': self.cantidad,
+            'costo_unitario': self.calcular_costo_unitario(),
             'costo_total': self.calcular_costo_total()
         }
     
     def __str__(self):
-        return f"{self.nombre} ({self.ancho}x{self.largo}m) - ${self.calcular_costo_total():,.0f}"
+        unidades = f" ×{self.cantidad}" if self.cantidad > 1 else ""
+        return f"{self.nombre} ({self.ancho}x{self.largo}m){unidades} - {formato.formatear_precio(self.calcular_costo_total())}"
 
 
 class Casa:
-    """Clase principal para representar una casa completa"""
+    """Clase principal para representar una casa completa
+
+    Las habitaciones se guardan en un diccionario ordenado (el orden de la
+    casa) con índices por nombre y por id de la base: buscar, eliminar y
+    renombrar no recorren la lista. Los nombres son únicos dentro de la casa
+    (como en la base) y se cambian con renombrar_habitacion().
+    """
     
     def __init__(self, nombre="Mi Casa"):
         self.nombre = nombre
         self.habitaciones = []
         self.fecha_creacion = None
         self.observaciones = ""
+        self.id = None  # Id de la casa en la base de datos
+        self.padre = None  # NodoProyecto que la contiene (la casa es la unidad)
+        # Subtotales en caché: se arman la primera vez que se piden
+        self._aportes = None  # id(habitación) -> aporte a CAMPOS_SUBTOTAL
+        self._subtotales = None
     
-    def agregar_habitacion(self, habitacion):
-        """Agrega una habitación a la casa"""
-        self.habitaciones.append(habitacion)
+    @property
+    def habitaciones(self):
+        """Habitaciones en orden (lista en caché: para cambiarla usar los métodos de Casa)"""
+        if self._lista is None:
+            self._lista = list(self._habitaciones)
+            self._posiciones = None
+        return self._lista
+
+    @habitaciones.setter
+    def habitaciones(self, habitaciones):
+        por_nombre = {}
+        for h in habitaciones:
+            if por_nombre.setdefault(h.nombre, h) is not h:
+                raise ValueError(f"Ya existe una habitación llamada '{h.nombre}'")
+        self._habitaciones = dict.fromkeys(habitaciones)  # Conjunto ordenado de Habitacion
+        self._por_nombre = por_nombre
+        self._por_id = {h.id: h for h in habitaciones if h.id is not None}
+        self._lista = None
+        self._posiciones = None
+        # Los aportes en caché eran de la lista anterior (en __init__ aún no existen)
+        if getattr(self, '_subtotales', None) is not None:
+            self.recalcular_subtotales()
+
+    def agregar_habitacion(self, habitacion, posicion=None):
+        """Agrega una habitación a la casa (al final o en la posición indicada)
+
+        Raises:
+            ValueError: si la casa ya tiene una habitación con ese nombre
+        """
+        if habitacion.nombre in self._por_nombre:
+            raise ValueError(f"Ya existe una habitación llamada '{habitacion.nombre}'")
+        if posicion is None or posicion >= len(self._habitaciones):
+            self._habitaciones[habitacion] = None
+        else:
+            # Reinsertar en medio (deshacer una eliminación) reconstruye el orden
+            lista = list(self._habitaciones)
+            lista.insert(posicion, habitacion)
+            self._habitaciones = dict.fromkeys(lista)
+        self._lista = None
+        self._por_nombre[habitacion.nombre] = habitacion
+        if habitacion.id is not None:
+            self._por_id[habitacion.id] = habitacion
+        self.actualizar_habitacion(habitacion)
     
     def eliminar_habitacion(self, nombre_habitacion):
         """Elimina una habitación por nombre"""
-        self.habitaciones = [h for h in self.habitaciones if h.nombre != nombre_habitacion]
+        habitacion = self._por_nombre.pop(nombre_habitacion, None)
+        if habitacion is None:
+            return
+        del self._habitaciones[habitacion]
+        self._lista = None
+        if self._por_id.get(habitacion.id) is habitacion:
+            del self._por_id[habitacion.id]
+        if self._aportes is not None:
+            self._ajustar(-self._aportes.pop(id(habitacion)))
     
     def obtener_habitacion(self, nombre):
         """Obtiene una habitación por nombre"""
-        for habitacion in self.habitaciones:
-            if habitacion.nombre == nombre:
-                return habitacion
-        return None
+        return self._por_nombre.get(nombre)
+
+    def obtener_habitacion_por_id(self, id_habitacion):
+        """Obtiene una habitación por su id en la base de datos"""
+        habitacion = self._por_id.get(id_habitacion)
+        if habitacion is None or habitacion.id != id_habitacion:
+            # El id se asigna al guardar, después de agregar la habitación: se indexa al buscarlo
+            self._por_id = {h.id: h for h in self._habitaciones if h.id is not None}
+            habitacion = self._por_id.get(id_habitacion)
+        return habitacion
+
+    def renombrar_habitacion(self, habitacion, nuevo_nombre):
+        """Cambia el nombre de una habitación manteniendo el índice por nombre"""
+        self.renombrar_habitaciones([(habitacion, nuevo_nombre)])
+
+    def renombrar_habitaciones(self, renombres):
+        """Aplica varios cambios de nombre a la vez (p. ej. un intercambio de nombres)
+
+        Args:
+            renombres: Pares (habitacion, nuevo_nombre)
+
+        Raises:
+            ValueError: si un nombre nuevo queda repetido; la casa no cambia
+        """
+        renombres = [(h, nombre) for h, nombre in renombres if nombre != h.nombre]
+        liberados = {h.nombre for h, _ in renombres if self._por_nombre.get(h.nombre) is h}
+        nuevos = set()
+        for _, nombre in renombres:
+            if nombre in nuevos or (nombre in self._por_nombre and nombre not in liberados):
+                raise ValueError(f"Ya existe una habitación llamada '{nombre}'")
+            nuevos.add(nombre)
+        for nombre in liberados:
+            del self._por_nombre[nombre]
+        for h, nombre in renombres:
+            h.nombre = nombre
+            self._por_nombre[nombre] = h
+
+    def posicion(self, habitacion):
+        """Posición de la habitación en el orden de la casa"""
+        lista = self.habitaciones
+        if self._posiciones is None:
+            self._posiciones = {h: i for i, h in enumerate(lista)}
+        return self._posiciones[habitacion]
     
     def calcular_area_total(self):
         """Calcula el área total de la casa"""
-        return sum(h.calcular_area_piso() for h in self.habitaciones)
+        return sum(h.calcular_area_piso() * h.cantidad for h in self.habitaciones)
     
     def calcular_volumen_total(self):
         """Calcula el volumen total de la casa"""
-        return sum(h.calcular_volumen() for h in self.habitaciones)
+        return sum(h.calcular_volumen() * h.cantidad for h in self.habitaciones)
     
     def calcular_costo_total(self):
         """Calcula el costo total de la casa"""
@@ -173,7 +352,7 @@ class Casa:
         habitacion_mas_cara = max(self.habitaciones, key=lambda h: h.calcular_costo_total())
         habitacion_mas_grande = max(self.habitaciones, key=lambda h: h.calcular_area_piso())
         return {
-            'cantidad_habitaciones': len(self.habitaciones),
+            'cantidad_habitaciones': sum(h.cantidad for h in self.habitaciones),
             'area_total': self.calcular_area_total(),
             'volumen_total': self.calcular_volumen_total(),
             'costo_total': self.calcular_costo_total(),
@@ -182,6 +361,160 @@ class Casa:
             'habitacion_mas_grande': habitacion_mas_grande.nombre
         }
 
+    def obtener_arreglos(self):
+        """Obtiene la geometría, precios y factores de todas las habitaciones como arreglos NumPy
+
+        Returns:
+            Diccionario de evaluar_habitaciones() más precio_piso,
+            precio_paredes y factor (0, 0 y 1 cuando no hay asignación)
+        """
+        n = len(self.habitaciones)
+        arreglos = evaluar_habitaciones(self.habitaciones)
+        arreglos['precio_piso'] = np.fromiter(
+            (h.material_piso.precio_m2 if h.material_piso else 0.0 for h in self.habitaciones), float, n)
+        arreglos['precio_paredes'] = np.fromiter(
+            (h.material_paredes.precio_m2 if h.material_paredes else 0.0 for h in self.habitaciones), float, n)
+        arreglos['factor'] = np.fromiter(
+            (h.sistema_construccion.factor_costo if h.sistema_construccion else 1.0 for h in self.habitaciones), float, n)
+        return arreglos
+
+    def calcular_costos_lote(self):
+        """Calcula el costo de cada habitación en una sola pasada vectorizada"""
+        return calcular_costos_arreglos(self.obtener_arreglos())
+
+    def analizar_sensibilidad(self, variacion=0.10):
+        """Sensibilidad del costo total a cada precio de material y factor de sistema
+
+        El costo es lineal en cada precio_m2 y en cada factor_costo, así que
+        las derivadas salen cerradas de una sola pasada vectorizada (np.bincount
+        por material y por sistema), sin recalcular la casa por perturbación:
+            ∂costo/∂precio = Σ área * factor de las habitaciones que lo usan
+            ∂costo/∂factor = Σ costo base de las habitaciones con ese sistema
+
+        Args:
+            variacion: Movimiento relativo del tornado (0.10 = ±10%)
+
+        Returns:
+            Diccionario con costo_total, variacion, materiales y sistemas (de
+            mayor a menor aporte) y tornado (ambos juntos, mismo orden). Cada
+            parámetro es un diccionario con nombre, tipo, parametro
+            ('precio_m2' o 'factor_costo'), valor, gradiente, aporte
+            (valor * gradiente), participacion (aporte / costo total) y
+            costo_bajo / costo_alto (costo total con el valor -/+ variacion)
+        """
+        arreglos = self.obtener_arreglos()
+        base = (arreglos['area_piso'] * arreglos['precio_piso']
+                + arreglos['area_paredes'] * arreglos['precio_paredes'])
+        costo_total = float(base @ arreglos['factor'])
+
+        # Piso y paredes comparten índice: un material usado en ambos suma las dos áreas
+        materiales, indices = indexar_por_identidad([h.material_piso for h in self.habitaciones]
+                                                    + [h.material_paredes for h in self.habitaciones])
+        areas = np.concatenate((arreglos['area_piso'] * arreglos['factor'],
+                                arreglos['area_paredes'] * arreglos['factor']))
+        sensibilidad_materiales = _parametros_sensibilidad(
+            materiales, 'precio_m2', _sumar_por_indice(indices, areas, len(materiales)), costo_total, variacion)
+
+        sistemas, indices = indexar_por_identidad([h.sistema_construccion for h in self.habitaciones])
+        sensibilidad_sistemas = _parametros_sensibilidad(
+            sistemas, 'factor_costo', _sumar_por_indice(indices, base, len(sistemas)), costo_total, variacion)
+
+        return {
+            'costo_total': costo_total,
+            'variacion': variacion,
+            'materiales': sensibilidad_materiales,
+            'sistemas': sensibilidad_sistemas,
+            'tornado': sorted(sensibilidad_materiales + sensibilidad_sistemas, key=lambda p: p['aporte'],
+                              reverse=True),
+        }
+
+    def agrupar_especificaciones(self):
+        """Habitaciones agrupadas por especificación (Habitacion.clave_especificacion)
+
+        Returns:
+            Lista de (habitación representativa, cantidad total, habitaciones
+            del grupo) en orden de aparición
+        """
+        grupos = {}
+        for h in self.habitaciones:
+            grupo = grupos.setdefault(h.clave_especificacion(), [h, 0, []])
+            grupo[1] += h.cantidad
+            grupo[2].append(h)
+        return [tuple(grupo) for grupo in grupos.values()]
+
+    def compactar(self):
+        """Funde las habitaciones idénticas en una sola con la cantidad sumada
+
+        Se conserva la primera de cada grupo (su nombre y su posición).
+
+        Returns:
+            Número de habitaciones eliminadas
+        """
+        grupos = self.agrupar_especificaciones()
+        eliminadas = len(self.habitaciones) - len(grupos)
+        for representativa, cantidad, _ in grupos:
+            representativa.cantidad = cantidad
+        self.habitaciones = [representativa for representativa, _, _ in grupos]
+        return eliminadas
+
+    # -------------------------------------------------------------------------
+    # Subtotales en caché (jerarquía de proyecto, ver NodoProyecto)
+    # -------------------------------------------------------------------------
+
+    def obtener_subtotales(self):
+        """Costo, área, volumen y cantidad de habitaciones en caché (claves CAMPOS_SUBTOTAL)
+
+        La primera llamada los calcula en una pasada vectorizada; después se
+        mantienen con actualizar_habitacion() y los cambios de la lista.
+        """
+        return _diccionario_subtotales(self._vector_subtotales())
+
+    def actualizar_habitacion(self, habitacion):
+        """Recalcula el aporte de una habitación modificada y lo propaga hacia arriba
+
+        Solo se ajustan la casa y los nodos de su camino hasta la raíz
+        (O(profundidad)). No hace nada si los subtotales no se han pedido.
+        """
+        if self._aportes is None:
+            return
+        nuevo = _aporte_habitacion(habitacion)
+        anterior = self._aportes.get(id(habitacion))
+        self._aportes[id(habitacion)] = nuevo
+        self._ajustar(nuevo if anterior is None else nuevo - anterior)
+
+    def recalcular_subtotales(self):
+        """Recalcula toda la casa (p. ej. tras un cambio de precios) y propaga la diferencia"""
+        if self._subtotales is None:
+            return
+        anterior = self._subtotales
+        self._recalcular()
+        if self.padre is not None:
+            self.padre.propagar(self._subtotales - anterior)
+
+    def raiz(self):
+        """Nodo superior del proyecto (la misma casa si no pertenece a uno)"""
+        return self if self.padre is None else self.padre.raiz()
+
+    def _vector_subtotales(self):
+        if self._subtotales is None:
+            self._recalcular()
+        return self._subtotales
+
+    def _recalcular(self):
+        aportes = np.zeros((len(self.habitaciones), len(CAMPOS_SUBTOTAL)))
+        if self.habitaciones:
+            arreglos = self.obtener_arreglos()
+            aportes = np.column_stack((calcular_costos_arreglos(arreglos), arreglos['area_piso'],
+                                       arreglos['volumen'], arreglos['cantidad']))
+        self._aportes = dict(zip(map(id, self.habitaciones), aportes))
+        self._subtotales = aportes.sum(axis=0)
+        return self._subtotales
+
+    def _ajustar(self, delta):
+        self._subtotales = self._subtotales + delta
+        if self.padre is not None:
+            self.padre.propagar(delta)
+
     def obtener_resumen_completo(self):
         """Obtiene un resumen completo de la casa"""
         resumen = {
@@ -197,7 +530,188 @@ class Casa:
 
     def __str__(self):
         stats = self.obtener_estadisticas()
-        return f"{self.nombre} - {stats['cantidad_habitaciones']} habitaciones, {stats['area_total']:.1f}m², ${stats['costo_total']:,.0f}"
+        return f"{self.nombre} - {stats['cantidad_habitaciones']} habitaciones, {stats['area_total']:.1f}m², {formato.formatear_precio(stats['costo_total'])}"
+
+
+class NodoProyecto:
+    """Nivel de un proyecto (proyecto, edificio o piso) con subtotales en caché
+
+    Los hijos son otros nodos de un nivel inferior o casas (la unidad:
+    apartamento, local). Cada nodo guarda la suma de sus hijos; un cambio en
+    una habitación (Casa.actualizar_habitacion) ajusta solo los nodos del
+    camino hasta la raíz, sin volver a sumar la torre completa.
+    """
+
+    def __init__(self, nombre, nivel="proyecto"):
+        if nivel not in NIVELES_PROYECTO[:-1]:
+            raise ValueError(f"Nivel de proyecto desconocido: {nivel}")
+        self.nombre = nombre
+        self.nivel = nivel
+        self.hijos = []
+        self.padre = None
+        self.id = None  # Id del nodo en la base de datos
+        self._subtotales = np.zeros(len(CAMPOS_SUBTOTAL))
+
+    def agregar_hijo(self, hijo):
+        """Agrega un nodo de nivel inferior o una Casa; devuelve el hijo"""
+        if NIVELES_PROYECTO.index(_nivel(hijo)) <= NIVELES_PROYECTO.index(self.nivel):
+            raise ValueError(f"Un {_nivel(hijo)} no puede estar dentro de un {self.nivel}")
+        if hijo.padre is not None:
+            hijo.padre.quitar_hijo(hijo)
+        hijo.padre = self
+        self.hijos.append(hijo)
+        self.propagar(hijo._vector_subtotales())
+        return hijo
+
+    def quitar_hijo(self, hijo):
+        """Quita un hijo y descuenta sus subtotales"""
+        self.hijos.remove(hijo)
+        hijo.padre = None
+        self.propagar(-hijo._vector_subtotales())
+
+    def propagar(self, delta):
+        """Suma un cambio de subtotales a este nodo y a sus ancestros (O(profundidad))"""
+        nodo = self
+        while nodo is not None:
+            nodo._subtotales = nodo._subtotales + delta
+            nodo = nodo.padre
+
+    def obtener_subtotales(self):
+        """Subtotales en caché del subárbol (claves CAMPOS_SUBTOTAL y costo_por_m2)"""
+        subtotales = _diccionario_subtotales(self._subtotales)
+        area = subtotales['area_total']
+        subtotales['costo_por_m2'] = subtotales['costo_total'] / area if area > 0 else 0
+        return subtotales
+
+    def recalcular_subtotales(self):
+        """Recalcula el subárbol desde las habitaciones (p. ej. tras un cambio de precios)"""
+        anterior = self._subtotales
+        self._recalcular()
+        if self.padre is not None:
+            self.padre.propagar(self._subtotales - anterior)
+
+    def raiz(self):
+        return self if self.padre is None else self.padre.raiz()
+
+    def ruta(self):
+        """Nombres desde la raíz hasta este nodo"""
+        return ([] if self.padre is None else self.padre.ruta()) + [self.nombre]
+
+    def recorrer(self):
+        """Este nodo y todos sus descendientes (nodos y casas) en preorden"""
+        yield self
+        for hijo in self.hijos:
+            if isinstance(hijo, NodoProyecto):
+                yield from hijo.recorrer()
+            else:
+                yield hijo
+
+    def casas(self):
+        """Todas las casas (unidades) del subárbol"""
+        return [nodo for nodo in self.recorrer() if isinstance(nodo, Casa)]
+
+    def obtener_hijo(self, nombre):
+        for hijo in self.hijos:
+            if hijo.nombre == nombre:
+                return hijo
+        return None
+
+    def _vector_subtotales(self):
+        return self._subtotales
+
+    def _recalcular(self):
+        total = np.zeros(len(CAMPOS_SUBTOTAL))
+        for hijo in self.hijos:
+            total = total + hijo._recalcular()
+        self._subtotales = total
+        return total
+
+    def __str__(self):
+        subtotales = self.obtener_subtotales()
+        return (f"{self.nombre} ({self.nivel}) - {len(self.hijos)} hijos, {subtotales['area_total']:.1f}m², "
+                f"{formato.formatear_precio(subtotales['costo_total'])}")
+
+
+def _diccionario_subtotales(vector):
+    subtotales = dict(zip(CAMPOS_SUBTOTAL, vector.tolist()))
+    subtotales['cantidad_habitaciones'] = int(round(subtotales['cantidad_habitaciones']))
+    return subtotales
+
+
+def _nivel(nodo):
+    return "unidad" if isinstance(nodo, Casa) else nodo.nivel
+
+
+def _aporte_habitacion(habitacion):
+    """Aporte de una habitación a CAMPOS_SUBTOTAL (con todas sus unidades)"""
+    return np.array([habitacion.calcular_costo_total(), habitacion.calcular_area_piso() * habitacion.cantidad,
+                     habitacion.calcular_volumen() * habitacion.cantidad, habitacion.cantidad], dtype=float)
+
+
+def evaluar_habitaciones(habitaciones):
+    """geometria.evaluar_lote() con las magnitudes multiplicadas por la cantidad
+
+    La geometría se calcula una vez por habitación aunque represente varias
+    idénticas; area_piso, area_paredes, volumen, etc. quedan como totales del
+    grupo, así que sumarlas (o costearlas) ya cuenta todas las unidades.
+
+    Returns:
+        Diccionario de geometria.evaluar_lote() más cantidad
+    """
+    arreglos = geometria.evaluar_lote(habitaciones)
+    cantidades = np.fromiter((h.cantidad for h in habitaciones), float, len(habitaciones))
+    if (cantidades != 1).any():
+        for clave in arreglos:
+            arreglos[clave] = arreglos[clave] * cantidades
+    arreglos['cantidad'] = cantidades
+    return arreglos
+
+
+def calcular_costos_arreglos(arreglos):
+    """Costo por habitación a partir de arreglos (Casa.obtener_arreglos o equivalentes)
+
+    Misma fórmula que Habitacion.calcular_costo_total:
+    (área piso * precio piso + área paredes * precio paredes) * factor
+    """
+    return (arreglos['area_piso'] * arreglos['precio_piso']
+            + arreglos['area_paredes'] * arreglos['precio_paredes']) * arreglos['factor']
+
+
+def indexar_por_identidad(objetos):
+    """Distintos (por identidad, en orden de aparición) e índice de cada objeto; -1 si es None"""
+    distintos, posiciones = [], {}
+    for objeto in objetos:
+        if objeto is not None and id(objeto) not in posiciones:
+            posiciones[id(objeto)] = len(distintos)
+            distintos.append(objeto)
+    indices = np.fromiter((-1 if objeto is None else posiciones[id(objeto)] for objeto in objetos),
+                          np.intp, len(objetos))
+    return distintos, indices
+
+
+def _sumar_por_indice(indices, pesos, cantidad):
+    asignados = indices >= 0
+    return np.bincount(indices[asignados], weights=pesos[asignados], minlength=cantidad)
+
+
+def _parametros_sensibilidad(objetos, parametro, gradientes, costo_total, variacion):
+    valores = np.fromiter((getattr(objeto, parametro) for objeto in objetos), float, len(objetos))
+    aportes = valores * gradientes
+    participaciones = aportes / costo_total if costo_total else np.zeros_like(aportes)
+    resultado = [{
+        'nombre': objeto.nombre,
+        'tipo': getattr(objeto, 'tipo', 'sistema'),
+        'parametro': parametro,
+        'valor': float(valor),
+        'gradiente': float(gradiente),
+        'aporte': float(aporte),
+        'participacion': float(participacion),
+        'costo_bajo': costo_total - variacion * float(aporte),
+        'costo_alto': costo_total + variacion * float(aporte),
+    } for objeto, valor, gradiente, aporte, participacion
+        in zip(objetos, valores, gradientes, aportes, participaciones)]
+    resultado.sort(key=lambda p: p['aporte'], reverse=True)
+    return resultado
 
 
 # Función auxiliar para crear materiales comunes
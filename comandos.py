@@ -0,0 +1,407 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: comandos.py
+Registro de comandos para deshacer/rehacer con persistencia incremental
+
+Cada edición es un comando pequeño (un delta) que se aplica de inmediato a
+la Casa en memoria y queda pendiente de escribirse en SQLite. Los pendientes
+se guardan juntos en una sola transacción cuando la interfaz está ociosa.
+"""
+
+from abc import ABC, abstractmethod
+
+import db
+
+
+# =============================================================================
+# RESOLUCIÓN DE IDS EN LA BASE DE DATOS
+# =============================================================================
+
+def _id_habitacion(cursor, habitacion, id_casa, nombre=None):
+    """Id de la habitación: el que ya tiene o, si no se ha guardado con este historial, por nombre"""
+    if habitacion.id is None:
+        cursor.execute("SELECT id FROM habitacion WHERE nombre = ? AND id_casa = ?",
+                       (nombre or habitacion.nombre, id_casa))
+        fila = cursor.fetchone()
+        habitacion.id = fila[0] if fila else None
+    return habitacion.id
+
+
+def _id_material(cursor, material):
+    """Devuelve el id del material, insertándolo si aún no existe"""
+    if material is None:
+        return None
+    cursor.execute("SELECT id FROM material WHERE nombre = ?", (material.nombre,))
+    fila = cursor.fetchone()
+    if fila:
+        return fila[0]
+    # Otro proceso pudo insertarlo entre el SELECT y el INSERT: UPSERT sin cambios
+    cursor.execute("INSERT INTO material (nombre, precio_m2, tipo) VALUES (?, ?, ?) "
+                   "ON CONFLICT(nombre) DO UPDATE SET nombre=excluded.nombre RETURNING id",
+                   (material.nombre, material.precio_m2, material.tipo))
+    return cursor.fetchone()[0]
+
+
+def _id_sistema(cursor, sistema):
+    """Devuelve el id del sistema, insertándolo si aún no existe"""
+    if sistema is None:
+        return None
+    cursor.execute("SELECT id FROM sistema_construccion WHERE nombre = ?", (sistema.nombre,))
+    fila = cursor.fetchone()
+    if fila:
+        return fila[0]
+    cursor.execute("INSERT INTO sistema_construccion (nombre, factor_costo, descripcion) VALUES (?, ?, ?) "
+                   "ON CONFLICT(nombre) DO UPDATE SET nombre=excluded.nombre RETURNING id",
+                   (sistema.nombre, sistema.factor_costo, sistema.descripcion))
+    return cursor.fetchone()[0]
+
+
+def _escribir_relacion(cursor, id_hab, habitacion):
+    ids = (_id_material(cursor, habitacion.material_piso),
+           _id_material(cursor, habitacion.material_paredes),
+           _id_sistema(cursor, habitacion.sistema_construccion))
+    cursor.execute("INSERT INTO habitacion_material (id_habitacion, id_material_piso, id_material_paredes, "
+                   "id_sistema_construccion) VALUES (?, ?, ?, ?) ON CONFLICT(id_habitacion) DO UPDATE SET "
+                   "id_material_piso=excluded.id_material_piso, id_material_paredes=excluded.id_material_paredes, "
+                   "id_sistema_construccion=excluded.id_sistema_construccion", (id_hab,) + ids)
+
+
+# =============================================================================
+# COMANDOS
+# =============================================================================
+
+class Comando(ABC):
+    """Clase base: un cambio reversible sobre la casa
+
+    Una subclase que no implementa los tres métodos falla al crearse, no a
+    mitad de un guardado.
+    """
+
+    descripcion = ""
+
+    @abstractmethod
+    def aplicar(self, casa):
+        """Aplica el cambio a la casa en memoria"""
+
+    @abstractmethod
+    def revertir(self, casa):
+        """Deshace el cambio en la casa en memoria"""
+
+    @abstractmethod
+    def persistir(self, cursor, id_casa, adelante=True):
+        """Escribe el delta en la base de datos (adelante=False escribe el inverso)"""
+
+
+class AgregarHabitacion(Comando):
+    """Agrega una habitación (con sus materiales y sistema ya asignados)"""
+
+    def __init__(self, habitacion, posicion=None):
+        self.habitacion = habitacion
+        self.posicion = posicion
+        self.descripcion = f"Agregar '{habitacion.nombre}'"
+
+    def aplicar(self, casa):
+        casa.agregar_habitacion(self.habitacion, self.posicion)
+
+    def revertir(self, casa):
+        casa.eliminar_habitacion(self.habitacion.nombre)
+
+    def persistir(self, cursor, id_casa, adelante=True):
+        if adelante:
+            h = self.habitacion
+            h.id, h.version = db.insertar_habitacion(cursor, h.nombre, h.ancho, h.largo, h.altura, id_casa,
+                                                     h.cantidad)
+            _escribir_relacion(cursor, h.id, h)
+        else:
+            _borrar_habitacion(cursor, self.habitacion, id_casa)
+
+
+class EliminarHabitacion(AgregarHabitacion):
+    """Elimina una habitación; deshacerla la restaura en su posición"""
+
+    def __init__(self, habitacion, posicion=None):
+        super().__init__(habitacion, posicion)
+        self.descripcion = f"Eliminar '{habitacion.nombre}'"
+
+    def aplicar(self, casa):
+        super().revertir(casa)
+
+    def revertir(self, casa):
+        super().aplicar(casa)
+
+    def persistir(self, cursor, id_casa, adelante=True):
+        super().persistir(cursor, id_casa, not adelante)
+
+
+def _borrar_habitacion(cursor, habitacion, id_casa):
+    id_hab = _id_habitacion(cursor, habitacion, id_casa)
+    if id_hab is not None:
+        cursor.execute("DELETE FROM habitacion_material WHERE id_habitacion = ?", (id_hab,))
+        cursor.execute("DELETE FROM habitacion WHERE id = ?", (id_hab,))
+        # Deshacer la vuelve a insertar con un id nuevo
+        habitacion.id = None
+
+
+class ModificarHabitacion(Comando):
+    """Cambia dimensiones, materiales y/o sistema de una habitación.
+
+    `antes` y `despues` son diccionarios con las claves modificadas entre
+    ancho, largo, altura, cantidad, material_piso, material_paredes y
+    sistema_construccion.
+    """
+
+    CAMPOS = ("ancho", "largo", "altura", "cantidad", "material_piso", "material_paredes", "sistema_construccion")
+
+    def __init__(self, habitacion, antes, despues):
+        self.habitacion = habitacion
+        self.antes = antes
+        self.despues = despues
+        self.descripcion = f"Modificar '{habitacion.nombre}'"
+
+    @classmethod
+    def desde_valores(cls, habitacion, **nuevos):
+        """Crea el comando solo con los campos que realmente cambian (o None)"""
+        antes, despues = {}, {}
+        for campo, valor in nuevos.items():
+            if getattr(habitacion, campo) is not valor and getattr(habitacion, campo) != valor:
+                antes[campo] = getattr(habitacion, campo)
+                despues[campo] = valor
+        return cls(habitacion, antes, despues) if despues else None
+
+    def aplicar(self, casa):
+        for campo, valor in self.despues.items():
+            setattr(self.habitacion, campo, valor)
+        casa.actualizar_habitacion(self.habitacion)
+
+    def revertir(self, casa):
+        for campo, valor in self.antes.items():
+            setattr(self.habitacion, campo, valor)
+        casa.actualizar_habitacion(self.habitacion)
+
+    def persistir(self, cursor, id_casa, adelante=True):
+        # Se escribe el estado actual de la habitación: es idempotente y
+        # correcto en ambas direcciones porque aplicar/revertir ya ocurrió.
+        # La versión se comprueba siempre (concurrencia optimista), también
+        # cuando solo cambian materiales
+        h = self.habitacion
+        id_hab = _id_habitacion(cursor, h, id_casa)
+        if id_hab is None:
+            return
+        cursor.execute("UPDATE habitacion SET ancho=?, largo=?, altura=?, cantidad=?, version=version+1 "
+                       "WHERE id=? AND version=?", (h.ancho, h.largo, h.altura, h.cantidad, id_hab, h.version))
+        if cursor.rowcount == 0:
+            raise db.ConflictoConcurrencia(f"Otro usuario modificó '{h.nombre}'")
+        h.version += 1
+        if {"material_piso", "material_paredes", "sistema_construccion"} & set(self.despues):
+            _escribir_relacion(cursor, id_hab, h)
+
+
+class RenombrarHabitacion(Comando):
+    """Cambia el nombre de una habitación (su id en la base no cambia)"""
+
+    def __init__(self, habitacion, nuevo_nombre):
+        self.habitacion = habitacion
+        self.anterior = habitacion.nombre
+        self.nuevo = nuevo_nombre
+        self.descripcion = f"Renombrar '{habitacion.nombre}'"
+
+    def aplicar(self, casa):
+        casa.renombrar_habitacion(self.habitacion, self.nuevo)
+
+    def revertir(self, casa):
+        casa.renombrar_habitacion(self.habitacion, self.anterior)
+
+    def persistir(self, cursor, id_casa, adelante=True):
+        h = self.habitacion
+        id_hab = _id_habitacion(cursor, h, id_casa, self.anterior if adelante else self.nuevo)
+        if id_hab is None:
+            return
+        cursor.execute("UPDATE habitacion SET nombre=?, version=version+1 WHERE id=? AND version=?",
+                       (h.nombre, id_hab, h.version))
+        if cursor.rowcount == 0:
+            raise db.ConflictoConcurrencia(f"Otro usuario modificó '{h.nombre}'")
+        h.version += 1
+
+
+class CambiarPrecioMaterial(Comando):
+    """Cambia el precio por m² de un material del catálogo"""
+
+    def __init__(self, material, nuevo_precio):
+        self.material = material
+        self.anterior = material.precio_m2
+        self.nuevo = nuevo_precio
+        self.descripcion = f"Precio de '{material.nombre}'"
+
+    def aplicar(self, casa):
+        self.material.precio_m2 = self.nuevo
+        casa.raiz().recalcular_subtotales()
+
+    def revertir(self, casa):
+        self.material.precio_m2 = self.anterior
+        casa.raiz().recalcular_subtotales()
+
+    def persistir(self, cursor, id_casa, adelante=True):
+        id_material = _id_material(cursor, self.material)
+        cursor.execute("UPDATE material SET precio_m2=? WHERE id=?",
+                       (self.nuevo if adelante else self.anterior, id_material))
+
+
+class CambiarFactorSistema(Comando):
+    """Cambia el factor de costo de un sistema de construcción"""
+
+    def __init__(self, sistema, nuevo_factor):
+        self.sistema = sistema
+        self.anterior = sistema.factor_costo
+        self.nuevo = nuevo_factor
+        self.descripcion = f"Factor de '{sistema.nombre}'"
+
+    def aplicar(self, casa):
+        self.sistema.factor_costo = self.nuevo
+        casa.raiz().recalcular_subtotales()
+
+    def revertir(self, casa):
+        self.sistema.factor_costo = self.anterior
+        casa.raiz().recalcular_subtotales()
+
+    def persistir(self, cursor, id_casa, adelante=True):
+        id_sistema = _id_sistema(cursor, self.sistema)
+        cursor.execute("UPDATE sistema_construccion SET factor_costo=? WHERE id=?",
+                       (self.nuevo if adelante else self.anterior, id_sistema))
+
+
+class ComandoCompuesto(Comando):
+    """Agrupa varios comandos en un solo paso de deshacer"""
+
+    def __init__(self, comandos, descripcion=""):
+        self.comandos = list(comandos)
+        self.descripcion = descripcion or ", ".join(c.descripcion for c in self.comandos)
+
+    def aplicar(self, casa):
+        _todos_o_ninguno(casa, self.comandos, "aplicar", "revertir")
+
+    def revertir(self, casa):
+        _todos_o_ninguno(casa, list(reversed(self.comandos)), "revertir", "aplicar")
+
+    def persistir(self, cursor, id_casa, adelante=True):
+        orden = self.comandos if adelante else reversed(self.comandos)
+        for comando in orden:
+            comando.persistir(cursor, id_casa, adelante)
+
+
+def _todos_o_ninguno(casa, comandos, hacer, deshacer):
+    # Si un subcomando falla, los ya hechos se deshacen: la casa queda como estaba
+    hechos = []
+    try:
+        for comando in comandos:
+            getattr(comando, hacer)(casa)
+            hechos.append(comando)
+    except Exception:
+        for comando in reversed(hechos):
+            getattr(comando, deshacer)(casa)
+        raise
+
+
+# =============================================================================
+# HISTORIAL
+# =============================================================================
+
+class HistorialComandos:
+    """Pilas de deshacer/rehacer y cola de deltas pendientes de guardar"""
+
+    def __init__(self, casa, id_casa, programar_guardado=None):
+        """
+        Args:
+            casa: Casa en memoria sobre la que se aplican los comandos
+            id_casa: id de la casa en la base de datos
+            programar_guardado: Función opcional que recibe un callback y lo
+                ejecuta más tarde (p. ej. con root.after), reemplazando la
+                programación anterior: se llama en cada edición, así el lote
+                se escribe tras la última; si es None los cambios se guardan
+                de inmediato
+        """
+        self.casa = casa
+        self.id_casa = id_casa
+        self.programar_guardado = programar_guardado
+        self.deshacer_pila = []
+        self.rehacer_pila = []
+        self.pendientes = []  # (comando, adelante)
+
+    def ejecutar(self, comando):
+        """Aplica un comando nuevo; descarta la pila de rehacer"""
+        comando.aplicar(self.casa)
+        self.deshacer_pila.append(comando)
+        self.rehacer_pila.clear()
+        self._encolar(comando, True)
+
+    def deshacer(self):
+        """Deshace el último comando; devuelve el comando o None"""
+        if not self.deshacer_pila:
+            return None
+        # Se saca de la pila solo si se pudo revertir (p. ej. nombre ya usado)
+        comando = self.deshacer_pila[-1]
+        comando.revertir(self.casa)
+        self.deshacer_pila.pop()
+        self.rehacer_pila.append(comando)
+        self._encolar(comando, False)
+        return comando
+
+    def rehacer(self):
+        """Rehace el último comando deshecho; devuelve el comando o None"""
+        if not self.rehacer_pila:
+            return None
+        comando = self.rehacer_pila[-1]
+        comando.aplicar(self.casa)
+        self.rehacer_pila.pop()
+        self.deshacer_pila.append(comando)
+        self._encolar(comando, True)
+        return comando
+
+    def puede_deshacer(self):
+        return bool(self.deshacer_pila)
+
+    def puede_rehacer(self):
+        return bool(self.rehacer_pila)
+
+    def _encolar(self, comando, adelante):
+        self.pendientes.append((comando, adelante))
+        if self.programar_guardado is None:
+            self.guardar_pendientes()
+        else:
+            self.programar_guardado(self.guardar_pendientes)
+
+    def guardar_pendientes(self):
+        """Escribe todos los deltas pendientes en una sola transacción"""
+        if not self.pendientes:
+            return 0
+        pendientes, self.pendientes = self.pendientes, []
+        try:
+            db.ejecutar_en_transaccion(self._persistir, pendientes)
+        except Exception:
+            # Se conservan para el próximo intento
+            self.pendientes = pendientes + self.pendientes
+            raise
+        return len(pendientes)
+
+    def _persistir(self, cursor, pendientes):
+        # Si la transacción falla (o se reintenta) las versiones e ids en
+        # memoria vuelven a los leídos de la base
+        versiones = [(h, h.version, h.id) for comando, _ in pendientes for h in _habitaciones(comando)]
+        try:
+            for comando, adelante in pendientes:
+                comando.persistir(cursor, self.id_casa, adelante)
+            # Especificaciones de las habitaciones nuevas o modificadas
+            db.indexar_especificaciones(cursor)
+        except BaseException:
+            for h, version, id_habitacion in versiones:
+                h.version = version
+                h.id = id_habitacion
+            raise
+
+
+def _habitaciones(comando):
+    """Habitaciones que un comando (o sus subcomandos) puede escribir"""
+    if isinstance(comando, ComandoCompuesto):
+        for subcomando in comando.comandos:
+            yield from _habitaciones(subcomando)
+    elif getattr(comando, "habitacion", None) is not None:
+        yield comando.habitacion
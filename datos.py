@@ -5,6 +5,7 @@ Base de datos de materiales, precios y configuraciones
 """
 
 from clases import Material, SistemaConstruccion
+import formato
 
 # =============================================================================
 # MATERIALES PARA PISOS
@@ -120,6 +121,59 @@ TIPOS_HABITACION = {
     "Zona de Lavado": {"ancho": 2.0, "largo": 2.5, "altura": 2.5},
 }
 
+# =============================================================================
+# NIVELES DE ACABADO Y PLANTILLAS DE CASA
+# =============================================================================
+# Especificación de materiales: piso, paredes y sistema por defecto, más
+# reemplazos por tipo de habitación (zonas húmedas, terrazas...)
+
+_ZONAS_HUMEDAS = ("Cocina", "Baño Principal", "Baño Social", "Zona de Lavado")
+
+NIVELES_ACABADO = {
+    "Económico": {
+        "piso": "Cerámica Básica", "paredes": "Pintura Básica", "sistema": "Drywall Básico",
+        "por_tipo": {tipo: {"paredes": "Cerámica Pared"} for tipo in _ZONAS_HUMEDAS},
+    },
+    "Estándar": {
+        "piso": "Porcelanato Básico", "paredes": "Pintura Premium", "sistema": "Mampostería Tradicional",
+        "por_tipo": {
+            **{tipo: {"piso": "Cerámica Premium", "paredes": "Cerámica Pared"} for tipo in _ZONAS_HUMEDAS},
+            "Habitación Principal": {"piso": "Madera Laminada"},
+        },
+    },
+    "Premium": {
+        "piso": "Porcelanato Rectificado", "paredes": "Estuco Veneciano", "sistema": "Mampostería Estructural",
+        "por_tipo": {
+            **{tipo: {"piso": "Porcelanato Premium", "paredes": "Porcelanato Pared"} for tipo in _ZONAS_HUMEDAS},
+            "Habitación Principal": {"piso": "Madera Natural"},
+            "Sala": {"piso": "Mármol"},
+        },
+    },
+}
+
+PLANTILLAS_CASA = {
+    "Apartaestudio": {
+        "habitaciones": ["Sala", "Cocina", "Habitación Principal", "Baño Social"],
+        "materiales": NIVELES_ACABADO["Económico"],
+    },
+    "Apartamento 2 alcobas": {
+        "habitaciones": ["Sala", "Comedor", "Cocina", "Habitación Principal", "Habitación Secundaria",
+                         "Baño Principal", "Baño Social", "Zona de Lavado"],
+        "materiales": NIVELES_ACABADO["Estándar"],
+    },
+    "Apartamento 3 alcobas": {
+        "habitaciones": ["Sala", "Comedor", "Cocina", "Habitación Principal", "Habitación Secundaria",
+                         "Habitación Secundaria", "Baño Principal", "Baño Social", "Zona de Lavado", "Balcón"],
+        "materiales": NIVELES_ACABADO["Estándar"],
+    },
+    "Casa Familiar": {
+        "habitaciones": ["Sala", "Comedor", "Cocina", "Estudio", "Habitación Principal", "Habitación Secundaria",
+                         "Habitación Secundaria", "Habitación Secundaria", "Baño Principal", "Baño Social",
+                         "Baño Social", "Zona de Lavado", "Cuarto de Servicio", "Despensa", "Garaje", "Terraza"],
+        "materiales": {**NIVELES_ACABADO["Estándar"], "sistema": "Mampostería Estructural"},
+    },
+}
+
 # =============================================================================
 # CONFIGURACIONES DEL SISTEMA
 # =============================================================================
@@ -134,6 +188,61 @@ CONFIGURACION = {
     "factor_utilidad": 0.20,  # 20% utilidad
     "precision_decimales": 0,
     "mostrar_miles": True,
+    "locale": None,  # p. ej. "es_CO"; si es None se usan los separadores
+    "separador_miles": ",",
+    "separador_decimal": ".",
+}
+
+formato.registrar_configuracion(CONFIGURACION)
+
+# =============================================================================
+# PARÁMETROS DE CANTIDADES DE OBRA
+# =============================================================================
+# unidad: unidad de compra; consumo: unidades por m² (por mano si hay manos);
+# desperdicio: fracción adicional; presentacion: unidades por empaque
+
+PARAMETROS_CANTIDADES_POR_TIPO = {
+    "piso": {"unidad": "m²", "consumo": 1.0, "manos": 1, "desperdicio": 0.08,
+             "presentacion": 1.5, "empaque": "caja"},
+    "pared": {"unidad": "m²", "consumo": 1.0, "manos": 1, "desperdicio": 0.10,
+              "presentacion": 1.0, "empaque": "m²"},
+}
+
+PARAMETROS_CANTIDADES = {
+    "Cerámica Básica": {"presentacion": 2.0, "desperdicio": 0.10},
+    "Cerámica Premium": {"presentacion": 1.5, "desperdicio": 0.10},
+    "Porcelanato Básico": {"presentacion": 1.44},
+    "Porcelanato Premium": {"presentacion": 1.44},
+    "Porcelanato Rectificado": {"presentacion": 1.44, "desperdicio": 0.05},
+    "Madera Laminada": {"presentacion": 2.2, "desperdicio": 0.07},
+    "Madera Ingeniería": {"presentacion": 1.8, "desperdicio": 0.07},
+    "Madera Natural": {"presentacion": 1.0, "desperdicio": 0.12},
+    "Vinilo SPC": {"presentacion": 2.2, "desperdicio": 0.05},
+    "Vinilo Premium": {"presentacion": 2.2, "desperdicio": 0.05},
+    "Alfombra Básica": {"presentacion": 1.0, "desperdicio": 0.10, "empaque": "m²"},
+    "Alfombra Premium": {"presentacion": 1.0, "desperdicio": 0.10, "empaque": "m²"},
+    "Concreto Pulido": {"presentacion": 1.0, "desperdicio": 0.05, "empaque": "m²"},
+    "Microcemento": {"unidad": "kg", "consumo": 1.5, "manos": 2, "presentacion": 20.0, "empaque": "bulto"},
+    "Pintura Básica": {"unidad": "L", "consumo": 0.10, "manos": 2, "desperdicio": 0.05,
+                       "presentacion": 18.93, "empaque": "cuñete"},
+    "Pintura Premium": {"unidad": "L", "consumo": 0.08, "manos": 2, "desperdicio": 0.05,
+                        "presentacion": 3.785, "empaque": "galón"},
+    "Pintura Texturizada": {"unidad": "L", "consumo": 0.25, "manos": 1, "desperdicio": 0.08,
+                            "presentacion": 3.785, "empaque": "galón"},
+    "Papel Tapiz Básico": {"presentacion": 5.3, "desperdicio": 0.15, "empaque": "rollo"},
+    "Papel Tapiz Premium": {"presentacion": 5.3, "desperdicio": 0.15, "empaque": "rollo"},
+    "Papel Tapiz 3D": {"presentacion": 2.5, "desperdicio": 0.12, "empaque": "panel"},
+    "Estuco Tradicional": {"unidad": "kg", "consumo": 1.2, "manos": 2, "presentacion": 25.0, "empaque": "bulto"},
+    "Estuco Veneciano": {"unidad": "kg", "consumo": 0.8, "manos": 3, "presentacion": 5.0, "empaque": "galón"},
+    "Cerámica Pared": {"presentacion": 1.5},
+    "Porcelanato Pared": {"presentacion": 1.44},
+}
+
+# Complementos de pintura para DashboardPintura
+PARAMETROS_PINTURA = {
+    "consumo_primer": 0.08,  # L/m² (una mano)
+    "precio_primer_litro": 18000,
+    "factor_accesorios": 0.10,  # Rodillos, brochas, cinta y lija sobre el costo de pintura
 }
 
 # =============================================================================
@@ -188,12 +297,32 @@ def obtener_dimensiones_tipo(tipo):
     """Obtiene las dimensiones predefinidas para un tipo de habitación"""
     return TIPOS_HABITACION.get(tipo, {"ancho": 3.0, "largo": 3.0, "altura": 2.5})
 
+def listar_plantillas_casa():
+    """Lista los nombres de las plantillas de casa"""
+    return list(PLANTILLAS_CASA.keys())
+
+def listar_niveles_acabado():
+    """Lista los nombres de los niveles de acabado"""
+    return list(NIVELES_ACABADO.keys())
+
+def obtener_parametros_cantidad(material):
+    """Obtiene los parámetros de cantidades de un material (valores por tipo + propios)"""
+    parametros = dict(PARAMETROS_CANTIDADES_POR_TIPO.get(material.tipo, PARAMETROS_CANTIDADES_POR_TIPO["piso"]))
+    parametros.update(PARAMETROS_CANTIDADES.get(material.nombre, {}))
+    return parametros
+
+def actualizar_configuracion(**cambios):
+    """Modifica la configuración y reconstruye el formateador de moneda"""
+    CONFIGURACION.update(cambios)
+    formato.invalidar()
+
 def formatear_precio(precio):
     """Formatea un precio según la configuración"""
-    if CONFIGURACION["mostrar_miles"]:
-        return f"{CONFIGURACION['simbolo_moneda']}{precio:,.{CONFIGURACION['precision_decimales']}f}"
-    else:
-        return f"{CONFIGURACION['simbolo_moneda']}{precio:.{CONFIGURACION['precision_decimales']}f}"
+    return formato.formatear_precio(precio)
+
+def formatear_precios(precios):
+    """Formatea un arreglo de precios según la configuración"""
+    return formato.formatear_lote(precios)
 
 def calcular_precio_con_impuestos(precio_base):
     """Calcula el precio final incluyendo IVA, administración y utilidad"""
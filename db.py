@@ -1,10 +1,321 @@
+import hashlib
+import logging
+import random
 import sqlite3
+import time
+from contextlib import contextmanager
+from functools import wraps
 
 DB_PATH = 'construccion.db'
 
+# Varios procesos pueden escribir en el mismo archivo: WAL permite leer
+# mientras otro escribe y busy_timeout espera el bloqueo en lugar de fallar
+ESPERA_BLOQUEO_MS = 5000
+REINTENTOS = 8
+ESPERA_INICIAL_S = 0.01
+
+# Versión del esquema en PRAGMA user_version: las migraciones que reescriben
+# datos corren una sola vez, cuando la base tiene una versión menor
+VERSION_ESQUEMA = 1
+
+registro = logging.getLogger(__name__)
+
+class ConflictoConcurrencia(Exception):
+    # Otro proceso modificó la fila después de leerla (versión distinta)
+    pass
+
 def get_db_connection():
-    return sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=ESPERA_BLOQUEO_MS / 1000)
+    conn.execute(f"PRAGMA busy_timeout = {ESPERA_BLOQUEO_MS}")
+    return conn
+
+def _es_bloqueo(error):
+    mensaje = str(error).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+def con_reintentos(funcion):
+    # Reintenta con espera exponencial (y algo de azar) si la base está bloqueada
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        espera = ESPERA_INICIAL_S
+        for intento in range(REINTENTOS):
+            try:
+                return funcion(*args, **kwargs)
+            except sqlite3.OperationalError as error:
+                if not _es_bloqueo(error) or intento == REINTENTOS - 1:
+                    raise
+                time.sleep(espera * (1 + random.random()))
+                espera *= 2
+    return envoltura
+
+@contextmanager
+def transaccion():
+    # Un cursor y un solo commit para un lote de escrituras. BEGIN IMMEDIATE
+    # toma el bloqueo de escritura al inicio: evita que dos procesos lean y
+    # luego choquen al intentar escribir
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn.cursor()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+@con_reintentos
+def ejecutar_en_transaccion(funcion, *args):
+    # funcion(cursor, *args) dentro de una transacción; se repite entera si hay bloqueo
+    with transaccion() as cursor:
+        return funcion(cursor, *args)
+
+def crear_tablas():
+    # Crea el esquema si no existe (bases nuevas, pruebas y benchmarks).
+    # Devuelve el informe de las migraciones de datos aplicadas ([] si no hubo)
+    conn = get_db_connection()
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS "casa" (
+            "id" INTEGER,
+            "nombre" TEXT NOT NULL,
+            "fecha_creacion" TEXT,
+            "observaciones" TEXT,
+            PRIMARY KEY("id" AUTOINCREMENT)
+        );
+        CREATE TABLE IF NOT EXISTS "habitacion" (
+            "id" INTEGER,
+            "nombre" TEXT NOT NULL,
+            "ancho" REAL,
+            "largo" REAL,
+            "altura" REAL,
+            "id_casa" INTEGER,
+            "version" INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY("id" AUTOINCREMENT),
+            FOREIGN KEY("id_casa") REFERENCES "casa"("id")
+        );
+        CREATE TABLE IF NOT EXISTS "material" (
+            "id" INTEGER,
+            "nombre" TEXT NOT NULL,
+            "precio_m2" REAL,
+            "tipo" TEXT,
+            PRIMARY KEY("id" AUTOINCREMENT)
+        );
+        CREATE TABLE IF NOT EXISTS "sistema_construccion" (
+            "id" INTEGER,
+            "nombre" TEXT NOT NULL,
+            "factor_costo" REAL,
+            "descripcion" TEXT,
+            PRIMARY KEY("id" AUTOINCREMENT)
+        );
+        CREATE TABLE IF NOT EXISTS "habitacion_material" (
+            "id" INTEGER,
+            "id_habitacion" INTEGER,
+            "id_material_piso" INTEGER,
+            "id_material_paredes" INTEGER,
+            "id_sistema_construccion" INTEGER,
+            PRIMARY KEY("id" AUTOINCREMENT),
+            FOREIGN KEY("id_habitacion") REFERENCES "habitacion"("id"),
+            FOREIGN KEY("id_material_paredes") REFERENCES "material"("id"),
+            FOREIGN KEY("id_material_piso") REFERENCES "material"("id"),
+            FOREIGN KEY("id_sistema_construccion") REFERENCES "sistema_construccion"("id")
+        );
+        CREATE INDEX IF NOT EXISTS idx_habitacion_casa ON habitacion(id_casa);
+        CREATE TABLE IF NOT EXISTS "nodo_proyecto" (
+            "id" INTEGER,
+            "id_padre" INTEGER,
+            "nivel" TEXT NOT NULL,
+            "nombre" TEXT NOT NULL,
+            PRIMARY KEY("id" AUTOINCREMENT),
+            FOREIGN KEY("id_padre") REFERENCES "nodo_proyecto"("id")
+        );
+        CREATE INDEX IF NOT EXISTS idx_nodo_proyecto_padre ON nodo_proyecto(id_padre);
+    """)
+    conn.execute("PRAGMA journal_mode=WAL")
+    columnas = [fila[1] for fila in conn.execute("PRAGMA table_info(habitacion)")]
+    if "version" not in columnas:
+        conn.execute("ALTER TABLE habitacion ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+    if "cantidad" not in columnas:
+        conn.execute("ALTER TABLE habitacion ADD COLUMN cantidad INTEGER NOT NULL DEFAULT 1")
+    if "hash_especificacion" not in columnas:
+        conn.execute("ALTER TABLE habitacion ADD COLUMN hash_especificacion TEXT")
+    # Jerarquía: cada casa (unidad) puede colgar de un piso, edificio o proyecto
+    if "id_nodo" not in [fila[1] for fila in conn.execute("PRAGMA table_info(casa)")]:
+        conn.execute('ALTER TABLE casa ADD COLUMN id_nodo INTEGER REFERENCES "nodo_proyecto"("id")')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_casa_nodo ON casa(id_nodo)")
+    informe = []
+    if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+        informe = _eliminar_duplicados(conn)
+    # Índices únicos: permiten escrituras UPSERT (INSERT ... ON CONFLICT)
+    try:
+        conn.executescript(_INDICES_UNICOS)
+    except sqlite3.IntegrityError:
+        # Base ya migrada con duplicados escritos después (p. ej. por una
+        # copia anterior del programa): se vuelven a unificar
+        informe += _eliminar_duplicados(conn)
+        conn.executescript(_INDICES_UNICOS)
+    for linea in informe:
+        registro.warning("Migración del esquema: %s", linea)
+    conn.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+    conn.executescript(_esquema_registro_cambios())
+    conn.execute("DELETE FROM registro_cambios WHERE secuencia <= (SELECT MAX(secuencia) FROM registro_cambios) - ?",
+                 (CAMBIOS_CONSERVADOS,))
+    conn.executescript(_ESQUEMA_ESPECIFICACIONES)
+    indexar_especificaciones(conn.cursor())
+    conn.execute("DELETE FROM especificacion_habitacion WHERE hash NOT IN "
+                 "(SELECT hash_especificacion FROM habitacion WHERE hash_especificacion IS NOT NULL)")
+    conn.commit()
+    conn.close()
+    return informe
+
+_INDICES_UNICOS = """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_habitacion_casa_nombre ON habitacion(id_casa, nombre);
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_habitacion_material_habitacion ON habitacion_material(id_habitacion);
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_material_nombre ON material(nombre);
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_sistema_construccion_nombre ON sistema_construccion(nombre);
+"""
 
+# Registro de cambios: los triggers anotan cada fila escrita con una
+# secuencia creciente; las ventanas abiertas consultan solo lo nuevo
+CAMBIOS_CONSERVADOS = 100000
+
+_ORIGENES_CAMBIOS = {
+    # tabla: (id de la fila informada, id_casa, nombre), con {r} = NEW u OLD
+    "habitacion": ("{r}.id", "{r}.id_casa", "{r}.nombre"),
+    "habitacion_material": ("{r}.id_habitacion",
+                            "(SELECT id_casa FROM habitacion WHERE id = {r}.id_habitacion)",
+                            "(SELECT nombre FROM habitacion WHERE id = {r}.id_habitacion)"),
+    "material": ("{r}.id", "NULL", "{r}.nombre"),
+    "sistema_construccion": ("{r}.id", "NULL", "{r}.nombre"),
+}
+# Columnas cuyo UPDATE se informa (por defecto todas)
+_COLUMNAS_CAMBIOS = {
+    "habitacion": "nombre, ancho, largo, altura, id_casa, version, cantidad",
+}
+
+def _esquema_registro_cambios():
+    sql = """
+        CREATE TABLE IF NOT EXISTS "registro_cambios" (
+            "secuencia" INTEGER PRIMARY KEY AUTOINCREMENT,
+            "tabla" TEXT NOT NULL,
+            "operacion" TEXT NOT NULL,
+            "id_fila" INTEGER,
+            "id_casa" INTEGER,
+            "nombre" TEXT
+        );
+    """
+    for tabla, expresiones in _ORIGENES_CAMBIOS.items():
+        for operacion, fila in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            id_fila, id_casa, nombre = (e.format(r=fila) for e in expresiones)
+            columnas = f" OF {_COLUMNAS_CAMBIOS[tabla]}" if operacion == "UPDATE" and tabla in _COLUMNAS_CAMBIOS else ""
+            sql += f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tabla}_{operacion.lower()} AFTER {operacion}{columnas} ON {tabla}
+        BEGIN
+            INSERT INTO registro_cambios (tabla, operacion, id_fila, id_casa, nombre)
+            VALUES ('{tabla}', '{operacion}', {id_fila}, {id_casa}, {nombre});
+        END;"""
+    return sql
+
+# Índice de especificaciones: una fila por contenido distinto (medidas,
+# materiales y sistema) con un hash como clave, para agrupar y costear cada
+# especificación una vez. Es un índice derivado, no el almacenamiento: las
+# medidas siguen en habitacion y los materiales en habitacion_material, así
+# que no ahorra espacio (lo que ahorra filas es habitacion.cantidad).
+# Los triggers solo anulan el hash cuando cambia el contenido (cualquier
+# escritor, también db_async); indexar_especificaciones calcula los que
+# faltan
+_ESQUEMA_ESPECIFICACIONES = """
+    CREATE TABLE IF NOT EXISTS "especificacion_habitacion" (
+        "hash" TEXT PRIMARY KEY,
+        "ancho" REAL,
+        "largo" REAL,
+        "altura" REAL,
+        "id_material_piso" INTEGER,
+        "id_material_paredes" INTEGER,
+        "id_sistema_construccion" INTEGER
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_habitacion_especificacion ON habitacion(hash_especificacion);
+    CREATE INDEX IF NOT EXISTS idx_habitacion_sin_especificacion ON habitacion(id)
+        WHERE hash_especificacion IS NULL;
+    CREATE TRIGGER IF NOT EXISTS trg_habitacion_especificacion AFTER UPDATE OF ancho, largo, altura ON habitacion
+    BEGIN
+        UPDATE habitacion SET hash_especificacion = NULL WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_habitacion_material_especificacion_insert AFTER INSERT ON habitacion_material
+    BEGIN
+        UPDATE habitacion SET hash_especificacion = NULL WHERE id = NEW.id_habitacion;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_habitacion_material_especificacion_update AFTER UPDATE ON habitacion_material
+    BEGIN
+        UPDATE habitacion SET hash_especificacion = NULL WHERE id IN (OLD.id_habitacion, NEW.id_habitacion);
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_habitacion_material_especificacion_delete AFTER DELETE ON habitacion_material
+    BEGIN
+        UPDATE habitacion SET hash_especificacion = NULL WHERE id = OLD.id_habitacion;
+    END;
+"""
+
+def clave_especificacion(ancho, largo, altura, id_material_piso, id_material_paredes, id_sistema_construccion):
+    # Hash del contenido: mismas medidas, materiales y sistema dan la misma clave
+    contenido = repr((float(ancho or 0), float(largo or 0), float(altura or 0),
+                      id_material_piso, id_material_paredes, id_sistema_construccion))
+    return hashlib.blake2b(contenido.encode(), digest_size=16).hexdigest()
+
+def indexar_especificaciones(cursor):
+    # Calcula el hash de las habitaciones que no lo tienen (nuevas o modificadas)
+    # y agrega al catálogo las especificaciones que todavía no existen
+    filas = cursor.execute(
+        "SELECT h.id, h.ancho, h.largo, h.altura, hm.id_material_piso, hm.id_material_paredes, "
+        "hm.id_sistema_construccion FROM habitacion h LEFT JOIN habitacion_material hm ON hm.id_habitacion = h.id "
+        "WHERE h.hash_especificacion IS NULL"
+    ).fetchall()
+    if not filas:
+        return 0
+    claves = [clave_especificacion(*fila[1:]) for fila in filas]
+    cursor.executemany("INSERT INTO especificacion_habitacion VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(hash) DO NOTHING",
+                       [(clave,) + fila[1:] for clave, fila in zip(claves, filas)])
+    cursor.executemany("UPDATE habitacion SET hash_especificacion = ? WHERE id = ?",
+                       [(clave, fila[0]) for clave, fila in zip(claves, filas)])
+    return len(filas)
+
+def _eliminar_duplicados(conn):
+    # Migración a la versión 1 (índices únicos); se repite si una base ya
+    # migrada vuelve a tener duplicados.
+    # Devuelve una línea por cada dato unificado, borrado o renombrado
+    informe = []
+    # Materiales con el mismo nombre y distinto tipo son materiales
+    # distintos: se renombran "nombre (tipo)" en lugar de unificarse
+    for id_material, nombre, tipo in conn.execute(
+            "SELECT m.id, m.nombre, m.tipo FROM material m WHERE m.tipo IS NOT (SELECT m2.tipo FROM material m2 "
+            "WHERE m2.nombre = m.nombre ORDER BY m2.id DESC LIMIT 1)").fetchall():
+        nuevo = f"{nombre} ({tipo or 'sin tipo'})"
+        conn.execute("UPDATE material SET nombre = ? WHERE id = ?", (nuevo, id_material))
+        informe.append(f"material {id_material} '{nombre}' renombrado '{nuevo}' (tipo distinto)")
+    # Con el mismo nombre (y tipo) queda la fila más reciente, con su precio
+    for tabla, columnas in (("material", ("id_material_piso", "id_material_paredes")),
+                            ("sistema_construccion", ("id_sistema_construccion",))):
+        for nombre, ids in conn.execute(f"SELECT nombre, GROUP_CONCAT(id) FROM {tabla} GROUP BY nombre "
+                                        f"HAVING COUNT(*) > 1").fetchall():
+            informe.append(f"{tabla} '{nombre}': filas {ids} unificadas en la más reciente")
+        for columna in columnas:
+            conn.execute(f"UPDATE habitacion_material SET {columna} = (SELECT MAX(t2.id) FROM {tabla} t1 "
+                         f"JOIN {tabla} t2 ON t2.nombre = t1.nombre WHERE t1.id = habitacion_material.{columna}) "
+                         f"WHERE {columna} IN (SELECT id FROM {tabla} WHERE id NOT IN "
+                         f"(SELECT MAX(id) FROM {tabla} GROUP BY nombre))")
+        conn.execute(f"DELETE FROM {tabla} WHERE id NOT IN (SELECT MAX(id) FROM {tabla} GROUP BY nombre)")
+    # De cada habitación queda la relación de materiales más reciente
+    borradas = conn.execute("DELETE FROM habitacion_material WHERE id NOT IN "
+                            "(SELECT MAX(id) FROM habitacion_material GROUP BY id_habitacion)").rowcount
+    if borradas:
+        informe.append(f"{borradas} relaciones habitacion_material antiguas borradas")
+    # Habitaciones repetidas en una casa: las posteriores llevan su id en el nombre
+    for id_habitacion, id_casa, nombre in conn.execute(
+            "SELECT id, id_casa, nombre FROM habitacion WHERE id NOT IN "
+            "(SELECT MIN(id) FROM habitacion GROUP BY id_casa, nombre)").fetchall():
+        conn.execute("UPDATE habitacion SET nombre = ? WHERE id = ?", (f"{nombre} ({id_habitacion})", id_habitacion))
+        informe.append(f"habitación {id_habitacion} de la casa {id_casa} renombrada '{nombre} ({id_habitacion})'")
+    return informe
+
+@con_reintentos
 def guardar_casa(nombre, fecha_creacion=None, observaciones=None):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -17,37 +328,69 @@ def guardar_casa(nombre, fecha_creacion=None, observaciones=None):
     conn.close()
     return casa_id
 
+def insertar_habitacion(cursor, nombre, ancho, largo, altura, id_casa, cantidad=1):
+    # INSERT simple: una habitación con el mismo nombre que otro usuario acaba
+    # de crear no se sobrescribe, es un conflicto. Devuelve (id, version)
+    try:
+        cursor.execute(
+            "INSERT INTO habitacion (nombre, ancho, largo, altura, id_casa, cantidad) VALUES (?, ?, ?, ?, ?, ?) "
+            "RETURNING id, version",
+            (nombre, ancho, largo, altura, id_casa, cantidad)
+        )
+        return cursor.fetchone()
+    except sqlite3.IntegrityError as error:
+        if "UNIQUE" not in str(error):
+            raise
+        raise ConflictoConcurrencia(f"Ya existe una habitación llamada '{nombre}' en la casa") from error
+
+@con_reintentos
 def guardar_habitacion(nombre, ancho, largo, altura, id_casa):
+    conn = get_db_connection()
+    try:
+        habitacion_id, _ = insertar_habitacion(conn.cursor(), nombre, ancho, largo, altura, id_casa)
+        conn.commit()
+    finally:
+        conn.close()
+    return habitacion_id
+
+@con_reintentos
+def actualizar_habitacion(id_habitacion, ancho, largo, altura, version):
+    # Concurrencia optimista: solo actualiza si nadie cambió la fila desde
+    # que se leyó con esa versión; devuelve la versión nueva
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "INSERT INTO habitacion (nombre, ancho, largo, altura, id_casa) VALUES (?, ?, ?, ?, ?)",
-        (nombre, ancho, largo, altura, id_casa)
+        "UPDATE habitacion SET ancho=?, largo=?, altura=?, version=version+1 WHERE id=? AND version=?",
+        (ancho, largo, altura, id_habitacion, version)
     )
-    habitacion_id = cursor.lastrowid
+    actualizadas = cursor.rowcount
     conn.commit()
     conn.close()
-    return habitacion_id
+    if actualizadas == 0:
+        raise ConflictoConcurrencia(f"La habitación {id_habitacion} cambió (versión esperada {version})")
+    return version + 1
 
 def obtener_habitaciones_por_casa(id_casa):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT id, nombre, ancho, largo, altura FROM habitacion WHERE id_casa = ?",
+        "SELECT id, nombre, ancho, largo, altura, version, cantidad FROM habitacion WHERE id_casa = ?",
         (id_casa,)
     )
     habitaciones = cursor.fetchall()
     conn.close()
     return habitaciones
 
+@con_reintentos
 def guardar_material(nombre, precio_m2, tipo):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "INSERT INTO material (nombre, precio_m2, tipo) VALUES (?, ?, ?)",
+        "INSERT INTO material (nombre, precio_m2, tipo) VALUES (?, ?, ?) "
+        "ON CONFLICT(nombre) DO UPDATE SET precio_m2=excluded.precio_m2, tipo=excluded.tipo RETURNING id",
         (nombre, precio_m2, tipo)
     )
-    material_id = cursor.lastrowid
+    material_id = cursor.fetchone()[0]
     conn.commit()
     conn.close()
     return material_id
@@ -60,14 +403,17 @@ def obtener_materiales():
     conn.close()
     return materiales
 
+@con_reintentos
 def guardar_sistema_construccion(nombre, factor_costo, descripcion):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "INSERT INTO sistema_construccion (nombre, factor_costo, descripcion) VALUES (?, ?, ?)",
+        "INSERT INTO sistema_construccion (nombre, factor_costo, descripcion) VALUES (?, ?, ?) "
+        "ON CONFLICT(nombre) DO UPDATE SET factor_costo=excluded.factor_costo, "
+        "descripcion=excluded.descripcion RETURNING id",
         (nombre, factor_costo, descripcion)
     )
-    sistema_id = cursor.lastrowid
+    sistema_id = cursor.fetchone()[0]
     conn.commit()
     conn.close()
     return sistema_id
@@ -80,18 +426,87 @@ def obtener_sistemas_construccion():
     conn.close()
     return sistemas
 
+@con_reintentos
 def guardar_habitacion_material(id_habitacion, id_material_piso, id_material_paredes, id_sistema_construccion):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "INSERT INTO habitacion_material (id_habitacion, id_material_piso, id_material_paredes, id_sistema_construccion) VALUES (?, ?, ?, ?)",
+        "INSERT INTO habitacion_material (id_habitacion, id_material_piso, id_material_paredes, id_sistema_construccion) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(id_habitacion) DO UPDATE SET id_material_piso=excluded.id_material_piso, "
+        "id_material_paredes=excluded.id_material_paredes, id_sistema_construccion=excluded.id_sistema_construccion "
+        "RETURNING id",
         (id_habitacion, id_material_piso, id_material_paredes, id_sistema_construccion)
     )
-    rel_id = cursor.lastrowid
+    rel_id = cursor.fetchone()[0]
     conn.commit()
     conn.close()
     return rel_id
 
+@con_reintentos
+def guardar_casas_completas(casas, materiales=(), sistemas=()):
+    # Inserta muchas casas nuevas con sus habitaciones y materiales en una
+    # transacción, con un executemany por tabla (no una sentencia por fila).
+    # casas: [(nombre, fecha_creacion, observaciones, habitaciones)] con
+    # habitaciones = [(nombre, ancho, largo, altura, piso, paredes, sistema)]
+    # y materiales/sistemas por nombre (o None); un octavo elemento opcional
+    # es la cantidad de habitaciones idénticas. materiales y sistemas
+    # ([(nombre, precio_m2, tipo)] y [(nombre, factor_costo, descripcion)])
+    # se agregan al catálogo si faltan; los existentes conservan su precio.
+    # Devuelve los ids de las casas en el mismo orden
+    with transaccion() as cursor:
+        return _insertar_casas(cursor, casas, materiales, sistemas)
+
+@con_reintentos
+def guardar_proyecto_completo(nodos, casas, materiales=(), sistemas=()):
+    # Un proyecto completo en una transacción. nodos: [(nombre, nivel,
+    # indice_padre)] con el padre antes que sus hijos (indice_padre es su
+    # posición en nodos, o None para la raíz); casas como en
+    # guardar_casas_completas con un quinto elemento: la posición de su nodo.
+    # Devuelve (ids de los nodos, ids de las casas)
+    with transaccion() as cursor:
+        ids_nodos = []
+        for nombre, nivel, indice_padre in nodos:
+            cursor.execute("INSERT INTO nodo_proyecto (nombre, nivel, id_padre) VALUES (?, ?, ?)",
+                           (nombre, nivel, None if indice_padre is None else ids_nodos[indice_padre]))
+            ids_nodos.append(cursor.lastrowid)
+        ids_casas = _insertar_casas(cursor, casas, materiales, sistemas, ids_nodos)
+    return ids_nodos, ids_casas
+
+def _insertar_casas(cursor, casas, materiales, sistemas, ids_nodos=()):
+    # Cuerpo de guardar_casas_completas dentro de una transacción abierta;
+    # ids_nodos resuelve el quinto elemento opcional de cada casa
+    cursor.executemany("INSERT INTO material (nombre, precio_m2, tipo) VALUES (?, ?, ?) "
+                       "ON CONFLICT(nombre) DO NOTHING", materiales)
+    cursor.executemany("INSERT INTO sistema_construccion (nombre, factor_costo, descripcion) VALUES (?, ?, ?) "
+                       "ON CONFLICT(nombre) DO NOTHING", sistemas)
+    ids_material = dict(cursor.execute("SELECT nombre, id FROM material"))
+    ids_sistema = dict(cursor.execute("SELECT nombre, id FROM sistema_construccion"))
+
+    # BEGIN IMMEDIATE impide otras escrituras: los ids nuevos son los
+    # mayores que el máximo anterior, en orden de inserción
+    ultima_casa = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM casa").fetchone()[0]
+    cursor.executemany("INSERT INTO casa (nombre, fecha_creacion, observaciones, id_nodo) VALUES (?, ?, ?, ?)",
+                       [casa[:3] + (ids_nodos[casa[4]] if len(casa) > 4 and casa[4] is not None else None,)
+                        for casa in casas])
+    ids_casas = [fila[0] for fila in cursor.execute("SELECT id FROM casa WHERE id > ? ORDER BY id",
+                                                    (ultima_casa,))]
+
+    ultima_habitacion = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM habitacion").fetchone()[0]
+    habitaciones = [h for casa in casas for h in casa[3]]
+    cursor.executemany("INSERT INTO habitacion (nombre, ancho, largo, altura, id_casa, cantidad) "
+                       "VALUES (?, ?, ?, ?, ?, ?)",
+                       [h[:4] + (id_casa, h[7] if len(h) > 7 else 1)
+                        for id_casa, casa in zip(ids_casas, casas) for h in casa[3]])
+    ids_habitaciones = cursor.execute("SELECT id FROM habitacion WHERE id > ? ORDER BY id",
+                                      (ultima_habitacion,)).fetchall()
+    cursor.executemany(
+        "INSERT INTO habitacion_material (id_habitacion, id_material_piso, id_material_paredes, "
+        "id_sistema_construccion) VALUES (?, ?, ?, ?)",
+        [(id_hab, ids_material.get(h[4]), ids_material.get(h[5]), ids_sistema.get(h[6]))
+         for (id_hab,), h in zip(ids_habitaciones, habitaciones)])
+    indexar_especificaciones(cursor)
+    return ids_casas
+
 def obtener_materiales_habitacion(id_habitacion):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -103,6 +518,20 @@ def obtener_materiales_habitacion(id_habitacion):
     conn.close()
     return datos
 
+def obtener_materiales_habitaciones_por_casa(id_casa):
+    # Una sola consulta para todas las habitaciones de la casa (evita N+1)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT hm.id_habitacion, hm.id_material_piso, hm.id_material_paredes, hm.id_sistema_construccion "
+        "FROM habitacion_material hm JOIN habitacion h ON h.id = hm.id_habitacion WHERE h.id_casa = ?",
+        (id_casa,)
+    )
+    datos = {fila[0]: fila[1:] for fila in cursor.fetchall()}
+    conn.close()
+    return datos
+
+@con_reintentos
 def actualizar_precio_material(id_material, nuevo_precio):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -110,9 +539,177 @@ def actualizar_precio_material(id_material, nuevo_precio):
     conn.commit()
     conn.close()
 
+@con_reintentos
 def actualizar_factor_sistema(id_sistema, nuevo_factor):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("UPDATE sistema_construccion SET factor_costo=? WHERE id=?", (nuevo_factor, id_sistema))
     conn.commit()
     conn.close()
+
+def obtener_ultima_secuencia():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(secuencia), 0) FROM registro_cambios")
+    secuencia = cursor.fetchone()[0]
+    conn.close()
+    return secuencia
+
+def obtener_cambios_desde(secuencia, id_casa):
+    # Cambios de la casa y de los catálogos (material/sistema afectan a todas)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT secuencia, tabla, operacion, id_fila, id_casa, nombre FROM registro_cambios "
+        "WHERE secuencia > ? AND (id_casa = ? OR id_casa IS NULL) ORDER BY secuencia",
+        (secuencia, id_casa)
+    )
+    cambios = cursor.fetchall()
+    conn.close()
+    return cambios
+
+# Habitación con los nombres de sus materiales y sistema (una fila por habitación)
+_SELECT_HABITACION_CON_MATERIALES = (
+    "SELECT h.id, h.nombre, h.ancho, h.largo, h.altura, h.version, mp.nombre, mw.nombre, s.nombre, h.cantidad "
+    "FROM habitacion h LEFT JOIN habitacion_material hm ON hm.id_habitacion = h.id "
+    "LEFT JOIN material mp ON mp.id = hm.id_material_piso "
+    "LEFT JOIN material mw ON mw.id = hm.id_material_paredes "
+    "LEFT JOIN sistema_construccion s ON s.id = hm.id_sistema_construccion "
+)
+
+def obtener_habitaciones_con_materiales(ids_habitaciones):
+    # Estado actual de varias habitaciones con los nombres de sus materiales y sistema
+    if not ids_habitaciones:
+        return []
+    ids = list(ids_habitaciones)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        _SELECT_HABITACION_CON_MATERIALES + f"WHERE h.id IN ({', '.join('?' * len(ids))})",
+        ids
+    )
+    habitaciones = cursor.fetchall()
+    conn.close()
+    return habitaciones
+
+def obtener_habitaciones_con_materiales_por_casa(id_casa):
+    # Toda la casa en una consulta (mismas columnas que obtener_habitaciones_con_materiales)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(_SELECT_HABITACION_CON_MATERIALES + "WHERE h.id_casa = ? ORDER BY h.id", (id_casa,))
+    habitaciones = cursor.fetchall()
+    conn.close()
+    return habitaciones
+
+def obtener_especificaciones(id_casa=None):
+    # Especificaciones distintas (de una casa o de todas) con la cantidad total
+    # de habitaciones que las usan: (hash, nombre de la primera habitación,
+    # ancho, largo, altura, piso, paredes, sistema, cantidad, filas), con
+    # materiales y sistema por nombre.
+    # Antes se indexan las habitaciones escritas sin hash (p. ej. por db_async)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if cursor.execute("SELECT 1 FROM habitacion WHERE hash_especificacion IS NULL LIMIT 1").fetchone():
+        conn.execute("BEGIN IMMEDIATE")
+        indexar_especificaciones(cursor)
+        conn.commit()
+    filtro = "WHERE h.id_casa = ? " if id_casa is not None else ""
+    cursor.execute(
+        "SELECT e.hash, (SELECT nombre FROM habitacion WHERE id = g.primera), e.ancho, e.largo, e.altura, "
+        "mp.nombre, mw.nombre, s.nombre, g.cantidad, g.filas "
+        "FROM (SELECT hash_especificacion, SUM(cantidad) AS cantidad, COUNT(*) AS filas, MIN(id) AS primera "
+        f"FROM habitacion h {filtro}GROUP BY hash_especificacion) g "
+        "JOIN especificacion_habitacion e ON e.hash = g.hash_especificacion "
+        "LEFT JOIN material mp ON mp.id = e.id_material_piso "
+        "LEFT JOIN material mw ON mw.id = e.id_material_paredes "
+        "LEFT JOIN sistema_construccion s ON s.id = e.id_sistema_construccion "
+        "ORDER BY g.primera",
+        () if id_casa is None else (id_casa,)
+    )
+    especificaciones = cursor.fetchall()
+    conn.close()
+    return especificaciones
+
+# Subárbol de un nodo de proyecto (el nodo y todos sus descendientes)
+_ARBOL_PROYECTO = (
+    "WITH RECURSIVE arbol(id) AS (SELECT ? UNION ALL "
+    "SELECT n.id FROM nodo_proyecto n JOIN arbol a ON n.id_padre = a.id) "
+)
+
+@con_reintentos
+def guardar_nodo_proyecto(nombre, nivel, id_padre=None):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO nodo_proyecto (nombre, nivel, id_padre) VALUES (?, ?, ?)", (nombre, nivel, id_padre))
+    nodo_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return nodo_id
+
+@con_reintentos
+def asignar_casa_nodo(id_casa, id_nodo):
+    conn = get_db_connection()
+    conn.execute("UPDATE casa SET id_nodo = ? WHERE id = ?", (id_nodo, id_casa))
+    conn.commit()
+    conn.close()
+
+def obtener_proyectos():
+    # Nodos raíz (proyectos sin padre)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, nombre, nivel FROM nodo_proyecto WHERE id_padre IS NULL ORDER BY id")
+    proyectos = cursor.fetchall()
+    conn.close()
+    return proyectos
+
+def obtener_arbol_proyecto(id_nodo):
+    # Estructura completa bajo un nodo en tres consultas: nodos (id, id_padre,
+    # nivel, nombre), casas (id, nombre, id_nodo) y habitaciones (id_casa más
+    # las columnas de obtener_habitaciones_con_materiales), ordenados por id
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    nodos = cursor.execute(
+        _ARBOL_PROYECTO + "SELECT n.id, n.id_padre, n.nivel, n.nombre FROM nodo_proyecto n "
+        "JOIN arbol a ON a.id = n.id ORDER BY n.id", (id_nodo,)).fetchall()
+    casas = cursor.execute(
+        _ARBOL_PROYECTO + "SELECT c.id, c.nombre, c.id_nodo FROM casa c JOIN arbol a ON a.id = c.id_nodo "
+        "ORDER BY c.id", (id_nodo,)).fetchall()
+    habitaciones = cursor.execute(
+        _ARBOL_PROYECTO + _SELECT_HABITACION_CON_MATERIALES.replace("SELECT ", "SELECT h.id_casa, ", 1)
+        + "JOIN casa c ON c.id = h.id_casa JOIN arbol a ON a.id = c.id_nodo ORDER BY h.id_casa, h.id",
+        (id_nodo,)).fetchall()
+    conn.close()
+    return nodos, casas, habitaciones
+
+def obtener_casas():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, nombre FROM casa ORDER BY id")
+    casas = cursor.fetchall()
+    conn.close()
+    return casas
+
+def obtener_materiales_por_ids(ids_materiales):
+    if not ids_materiales:
+        return []
+    ids = list(ids_materiales)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT id, nombre, precio_m2, tipo FROM material WHERE id IN ({', '.join('?' * len(ids))})", ids)
+    materiales = cursor.fetchall()
+    conn.close()
+    return materiales
+
+def obtener_sistemas_por_ids(ids_sistemas):
+    if not ids_sistemas:
+        return []
+    ids = list(ids_sistemas)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT id, nombre, factor_costo, descripcion FROM sistema_construccion WHERE id IN ({', '.join('?' * len(ids))})",
+        ids
+    )
+    sistemas = cursor.fetchall()
+    conn.close()
+    return sistemas
@@ -0,0 +1,278 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: db_async.py
+Acceso asíncrono a la base de datos (asyncio) con las mismas funciones que db.py
+
+sqlite3 es bloqueante, así que cada operación se ejecuta en un grupo de
+hilos. Cada hilo mantiene su propia conexión abierta (con caché de
+sentencias preparadas de sqlite3) en lugar de conectar y cerrar en cada
+llamada, un semáforo limita cuántas operaciones esperan a la vez, y cancelar
+la tarea que espera interrumpe la consulta en curso con conn.interrupt().
+El lugar en el semáforo se libera cuando el hilo termina de verdad, no
+cuando se cancela la tarea que esperaba.
+
+Uso:
+
+    async with BaseDatosAsincrona() as base:
+        casa_id = await base.guardar_casa("Casa Norte")
+        habitaciones = await base.obtener_habitaciones_por_casa(casa_id)
+"""
+
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+
+HILOS_POR_DEFECTO = 4
+CONCURRENCIA_MAXIMA = 64
+SENTENCIAS_EN_CACHE = 256
+
+
+class BaseDatosAsincrona:
+    """Capa asíncrona sobre SQLite: grupo de hilos con una conexión por hilo"""
+
+    def __init__(self, ruta=None, hilos=HILOS_POR_DEFECTO, concurrencia=CONCURRENCIA_MAXIMA,
+                 sentencias_en_cache=SENTENCIAS_EN_CACHE):
+        """
+        Args:
+            ruta: Archivo SQLite (por defecto db.DB_PATH en el momento de conectar)
+            hilos: Hilos (y conexiones) que ejecutan consultas en paralelo
+            concurrencia: Operaciones admitidas a la vez; las demás esperan
+            sentencias_en_cache: Tamaño del caché de sentencias de cada conexión
+        """
+        self.ruta = ruta
+        self.sentencias_en_cache = sentencias_en_cache
+        self._ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="db_async")
+        self._semaforo = asyncio.Semaphore(concurrencia)
+        self._local = threading.local()
+        self._conexiones = []
+        self._bloqueo = threading.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excepcion):
+        await self.cerrar()
+
+    # -------------------------------------------------------------------------
+    # Ejecución en el grupo de hilos
+    # -------------------------------------------------------------------------
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta or db.DB_PATH, timeout=db.ESPERA_BLOQUEO_MS / 1000,
+                                   cached_statements=self.sentencias_en_cache, check_same_thread=False)
+            self._local.conn = conn
+            with self._bloqueo:
+                self._conexiones.append(conn)
+        return conn
+
+    def _en_hilo(self, funcion, args, operacion):
+        conn = self._conexion()
+        if not operacion.iniciar(conn):
+            raise asyncio.CancelledError()
+        try:
+            resultado = funcion(conn.cursor(), *args)
+            conn.commit()
+            return resultado
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            # Desde aquí la conexión puede tomar otra operación: ya no se interrumpe
+            operacion.terminar()
+
+    async def ejecutar(self, funcion, *args):
+        """Ejecuta funcion(cursor, *args) en un hilo, dentro de una transacción
+
+        Si la tarea que espera se cancela, la consulta en curso se interrumpe
+        y la transacción se revierte; una operación que aún no empezó ya no
+        se ejecuta.
+        """
+        await self._semaforo.acquire()
+        loop = asyncio.get_running_loop()
+        operacion = _Operacion()
+        try:
+            futuro = self._ejecutor.submit(self._en_hilo, funcion, args, operacion)
+        except BaseException:
+            self._semaforo.release()
+            raise
+        futuro.add_done_callback(lambda _: _liberar(loop, self._semaforo))
+        envoltura = asyncio.wrap_future(futuro, loop=loop)
+        try:
+            return await asyncio.shield(envoltura)
+        except asyncio.CancelledError:
+            # En cola: no llega a ejecutarse; en curso: se interrumpe. El
+            # error de la consulta interrumpida ya no le interesa a nadie
+            envoltura.add_done_callback(lambda f: f.cancelled() or f.exception())
+            futuro.cancel()
+            operacion.cancelar()
+            raise
+
+    async def cerrar(self):
+        """Espera las operaciones en curso y cierra todas las conexiones"""
+        await asyncio.get_running_loop().run_in_executor(None, self._ejecutor.shutdown, True)
+        with self._bloqueo:
+            conexiones, self._conexiones = self._conexiones, []
+        for conn in conexiones:
+            conn.close()
+
+    # -------------------------------------------------------------------------
+    # Mismas operaciones que db.py
+    # -------------------------------------------------------------------------
+
+    async def guardar_casa(self, nombre, fecha_creacion=None, observaciones=None):
+        return await self.ejecutar(_insertar, "INSERT INTO casa (nombre, fecha_creacion, observaciones) VALUES (?, ?, ?)",
+                                   (nombre, fecha_creacion, observaciones))
+
+    async def guardar_habitacion(self, nombre, ancho, largo, altura, id_casa):
+        return await self.ejecutar(_insertar_habitacion, nombre, ancho, largo, altura, id_casa)
+
+    async def actualizar_habitacion(self, id_habitacion, ancho, largo, altura, version):
+        return await self.ejecutar(_actualizar_habitacion, id_habitacion, ancho, largo, altura, version)
+
+    async def obtener_habitaciones_por_casa(self, id_casa):
+        return await self.ejecutar(_consultar, "SELECT id, nombre, ancho, largo, altura, version, cantidad FROM habitacion WHERE id_casa = ?",
+                                   (id_casa,))
+
+    async def guardar_material(self, nombre, precio_m2, tipo):
+        return await self.ejecutar(_insertar,
+                                   "INSERT INTO material (nombre, precio_m2, tipo) VALUES (?, ?, ?) "
+                                   "ON CONFLICT(nombre) DO UPDATE SET precio_m2=excluded.precio_m2, "
+                                   "tipo=excluded.tipo RETURNING id",
+                                   (nombre, precio_m2, tipo))
+
+    async def obtener_materiales(self):
+        return await self.ejecutar(_consultar, "SELECT id, nombre, precio_m2, tipo FROM material", ())
+
+    async def guardar_sistema_construccion(self, nombre, factor_costo, descripcion):
+        return await self.ejecutar(_insertar,
+                                   "INSERT INTO sistema_construccion (nombre, factor_costo, descripcion) VALUES (?, ?, ?) "
+                                   "ON CONFLICT(nombre) DO UPDATE SET factor_costo=excluded.factor_costo, "
+                                   "descripcion=excluded.descripcion RETURNING id",
+                                   (nombre, factor_costo, descripcion))
+
+    async def obtener_sistemas_construccion(self):
+        return await self.ejecutar(_consultar, "SELECT id, nombre, factor_costo, descripcion FROM sistema_construccion", ())
+
+    async def guardar_habitacion_material(self, id_habitacion, id_material_piso, id_material_paredes,
+                                          id_sistema_construccion):
+        return await self.ejecutar(_insertar,
+                                   "INSERT INTO habitacion_material (id_habitacion, id_material_piso, id_material_paredes, "
+                                   "id_sistema_construccion) VALUES (?, ?, ?, ?) ON CONFLICT(id_habitacion) DO UPDATE SET "
+                                   "id_material_piso=excluded.id_material_piso, "
+                                   "id_material_paredes=excluded.id_material_paredes, "
+                                   "id_sistema_construccion=excluded.id_sistema_construccion RETURNING id",
+                                   (id_habitacion, id_material_piso, id_material_paredes, id_sistema_construccion))
+
+    async def obtener_materiales_habitacion(self, id_habitacion):
+        filas = await self.ejecutar(_consultar,
+                                    "SELECT id_material_piso, id_material_paredes, id_sistema_construccion "
+                                    "FROM habitacion_material WHERE id_habitacion = ?", (id_habitacion,))
+        return filas[0] if filas else None
+
+    async def obtener_materiales_habitaciones_por_casa(self, id_casa):
+        filas = await self.ejecutar(_consultar,
+                                    "SELECT hm.id_habitacion, hm.id_material_piso, hm.id_material_paredes, "
+                                    "hm.id_sistema_construccion FROM habitacion_material hm "
+                                    "JOIN habitacion h ON h.id = hm.id_habitacion WHERE h.id_casa = ?", (id_casa,))
+        return {fila[0]: fila[1:] for fila in filas}
+
+    async def actualizar_precio_material(self, id_material, nuevo_precio):
+        await self.ejecutar(_consultar, "UPDATE material SET precio_m2=? WHERE id=?", (nuevo_precio, id_material))
+
+    async def actualizar_factor_sistema(self, id_sistema, nuevo_factor):
+        await self.ejecutar(_consultar, "UPDATE sistema_construccion SET factor_costo=? WHERE id=?",
+                            (nuevo_factor, id_sistema))
+
+    async def obtener_casa_completa(self, id_casa):
+        """Casa, habitaciones, relaciones y catálogos en un solo viaje al hilo
+
+        Returns:
+            Diccionario (casa, habitaciones, relaciones, materiales, sistemas)
+            con las mismas filas que las funciones individuales, o None si la
+            casa no existe
+        """
+        return await self.ejecutar(_casa_completa, id_casa)
+
+
+class _Operacion:
+    """Estado de una operación entre la tarea que espera y el hilo que la ejecuta"""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._conn = None
+        self._cancelada = False
+
+    def iniciar(self, conn):
+        """En el hilo: False si se canceló antes de empezar"""
+        with self._bloqueo:
+            if self._cancelada:
+                return False
+            self._conn = conn
+            return True
+
+    def terminar(self):
+        with self._bloqueo:
+            self._conn = None
+
+    def cancelar(self):
+        """Interrumpe la consulta solo si esta operación sigue en curso en su conexión"""
+        with self._bloqueo:
+            self._cancelada = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+
+def _liberar(loop, semaforo):
+    # El futuro termina en un hilo del grupo: el semáforo es del bucle de eventos
+    try:
+        loop.call_soon_threadsafe(semaforo.release)
+    except RuntimeError:
+        pass  # Bucle ya cerrado
+
+
+def _insertar(cursor, sql, parametros):
+    # Los UPSERT devuelven el id con RETURNING (lastrowid no cambia si se actualizó)
+    cursor.execute(sql, parametros)
+    fila = cursor.fetchone()
+    return fila[0] if fila else cursor.lastrowid
+
+
+def _insertar_habitacion(cursor, nombre, ancho, largo, altura, id_casa):
+    # Nombre repetido en la casa: db.ConflictoConcurrencia, no se sobrescribe
+    return db.insertar_habitacion(cursor, nombre, ancho, largo, altura, id_casa)[0]
+
+
+def _actualizar_habitacion(cursor, id_habitacion, ancho, largo, altura, version):
+    cursor.execute("UPDATE habitacion SET ancho=?, largo=?, altura=?, version=version+1 WHERE id=? AND version=?",
+                   (ancho, largo, altura, id_habitacion, version))
+    if cursor.rowcount == 0:
+        raise db.ConflictoConcurrencia(f"La habitación {id_habitacion} cambió (versión esperada {version})")
+    return version + 1
+
+
+def _consultar(cursor, sql, parametros):
+    cursor.execute(sql, parametros)
+    return cursor.fetchall()
+
+
+def _casa_completa(cursor, id_casa):
+    cursor.execute("SELECT id, nombre, fecha_creacion, observaciones FROM casa WHERE id = ?", (id_casa,))
+    casa = cursor.fetchone()
+    if casa is None:
+        return None
+    relaciones = _consultar(cursor, "SELECT hm.id_habitacion, hm.id_material_piso, hm.id_material_paredes, "
+                                    "hm.id_sistema_construccion FROM habitacion_material hm "
+                                    "JOIN habitacion h ON h.id = hm.id_habitacion WHERE h.id_casa = ?", (id_casa,))
+    return {
+        "casa": casa,
+        "habitaciones": _consultar(cursor, "SELECT id, nombre, ancho, largo, altura, version, cantidad FROM habitacion WHERE id_casa = ?",
+                                   (id_casa,)),
+        "relaciones": {fila[0]: fila[1:] for fila in relaciones},
+        "materiales": _consultar(cursor, "SELECT id, nombre, precio_m2, tipo FROM material", ()),
+        "sistemas": _consultar(cursor, "SELECT id, nombre, factor_costo, descripcion FROM sistema_construccion", ()),
+    }
@@ -0,0 +1,71 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: especificaciones.py
+Costeo por especificación de habitación (habitaciones idénticas se costean una vez)
+
+Un edificio con 200 apartamentos iguales repite las mismas alcobas, baños y
+cocinas. Cada habitación lleva una cantidad y el hash de su especificación
+(medidas, materiales y sistema); especificacion_habitacion es un índice con
+una fila por hash distinto (db.py), derivado de habitacion y
+habitacion_material, que sirve para agrupar sin comparar filas.
+
+cargar_casa_agrupada() arma una Casa con una Habitacion por especificación
+distinta y la cantidad total como Habitacion.cantidad; todo el cálculo
+(Casa.obtener_arreglos, estadísticas, gráficos) multiplica por la cantidad,
+así que el costo es el mismo que el de la casa completa con una fracción
+de las habitaciones.
+"""
+
+import numpy as np
+
+import db
+from clases import Casa, Habitacion, calcular_costos_arreglos
+from datos import obtener_material_pared, obtener_material_piso, obtener_sistema_construccion
+
+
+def cargar_casa_agrupada(id_casa=None, nombre="Especificaciones"):
+    """Casa con una habitación por especificación distinta (db.obtener_especificaciones)
+
+    Args:
+        id_casa: Casa a cargar (None: todo el portafolio)
+        nombre: Nombre de la Casa resultante
+
+    Returns:
+        (Casa, hashes): los hashes en el mismo orden que casa.habitaciones
+    """
+    casa, hashes = Casa(nombre), []
+    for clave, nombre_hab, ancho, largo, altura, piso, paredes, sistema, cantidad, _ in \
+            db.obtener_especificaciones(id_casa):
+        # En un portafolio dos especificaciones pueden empezar con el mismo nombre
+        if casa.obtener_habitacion(nombre_hab) is not None:
+            nombre_hab = f"{nombre_hab} ({clave[:8]})"
+        habitacion = Habitacion(nombre_hab, ancho, largo, altura)
+        habitacion.cantidad = cantidad
+        habitacion.material_piso = obtener_material_piso(piso) if piso else None
+        habitacion.material_paredes = obtener_material_pared(paredes) if paredes else None
+        habitacion.sistema_construccion = obtener_sistema_construccion(sistema) if sistema else None
+        casa.agregar_habitacion(habitacion)
+        hashes.append(clave)
+    return casa, hashes
+
+
+def costos_por_especificacion(id_casa=None):
+    """Costo unitario y total de cada especificación, de mayor a menor costo total
+
+    Returns:
+        Lista de diccionarios (hash, nombre, cantidad, costo_unitario, costo_total)
+    """
+    casa, hashes = cargar_casa_agrupada(id_casa)
+    if not casa.habitaciones:
+        return []
+    arreglos = casa.obtener_arreglos()
+    costos = calcular_costos_arreglos(arreglos)
+    unitarios = costos / arreglos['cantidad']
+    orden = np.argsort(-costos, kind="stable")
+    return [{
+        'hash': hashes[i],
+        'nombre': casa.habitaciones[i].nombre,
+        'cantidad': casa.habitaciones[i].cantidad,
+        'costo_unitario': float(unitarios[i]),
+        'costo_total': float(costos[i]),
+    } for i in orden]
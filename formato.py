@@ -0,0 +1,111 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: formato.py
+Formateo de moneda precompilado a partir de la configuración
+
+El formateador se construye una sola vez con la configuración registrada
+(símbolo, decimales, separadores) y se reconstruye solo cuando esta cambia
+(ver datos.actualizar_configuracion). Incluye una versión por lotes para
+arreglos NumPy, pensada para reportes y tablas.
+"""
+
+import numpy as np
+
+# Separadores (miles, decimal) por configuración regional
+SEPARADORES_LOCALE = {
+    "en_US": (",", "."),
+    "es_CO": (".", ","),
+    "es_ES": (".", ","),
+    "es_MX": (",", "."),
+}
+
+# Valores usados si aún no se ha registrado ninguna configuración
+CONFIGURACION_BASE = {
+    "simbolo_moneda": "$",
+    "precision_decimales": 0,
+    "mostrar_miles": True,
+    "locale": None,
+    "separador_miles": ",",
+    "separador_decimal": ".",
+}
+
+
+class FormateadorMoneda:
+    """Formato de precios con el patrón y los separadores ya resueltos"""
+
+    def __init__(self, config=None):
+        config = dict(CONFIGURACION_BASE, **(config or {}))
+        self.simbolo = config["simbolo_moneda"]
+        self.decimales = int(config["precision_decimales"])
+        self.mostrar_miles = config["mostrar_miles"]
+        miles, decimal = SEPARADORES_LOCALE.get(config["locale"],
+                                                (config["separador_miles"], config["separador_decimal"]))
+        self.separador_miles = miles
+        self.separador_decimal = decimal
+
+        agrupacion = "," if self.mostrar_miles else ""
+        self._patron = f"{{:{agrupacion}.{self.decimales}f}}".format
+        # Solo se traduce si los separadores difieren de los de Python
+        if (miles, decimal) == (",", "."):
+            self._traduccion = None
+        else:
+            self._traduccion = str.maketrans({",": miles, ".": decimal})
+
+    def formatear(self, precio):
+        """Formatea un precio: '$1,234,567'"""
+        texto = self._patron(precio)
+        if self._traduccion is not None:
+            texto = texto.translate(self._traduccion)
+        return self.simbolo + texto
+
+    __call__ = formatear
+
+    def formatear_lote(self, precios):
+        """Formatea una secuencia o arreglo NumPy de precios
+
+        Args:
+            precios: Arreglo (de cualquier forma) o secuencia de números
+
+        Returns:
+            Lista de cadenas en el mismo orden (aplanada)
+        """
+        valores = np.asarray(precios, dtype=float).ravel().tolist()
+        patron, simbolo, traduccion = self._patron, self.simbolo, self._traduccion
+        if traduccion is None:
+            return [simbolo + patron(v) for v in valores]
+        return [simbolo + patron(v).translate(traduccion) for v in valores]
+
+
+_configuracion = None
+_formateador = None
+
+
+def registrar_configuracion(config):
+    """Indica el diccionario de configuración del que se construye el formateador"""
+    global _configuracion
+    _configuracion = config
+    invalidar()
+
+
+def invalidar():
+    """Descarta el formateador; se reconstruye en el próximo uso"""
+    global _formateador
+    _formateador = None
+
+
+def obtener_formateador():
+    """Formateador vigente (construido una sola vez por configuración)"""
+    global _formateador
+    if _formateador is None:
+        _formateador = FormateadorMoneda(_configuracion)
+    return _formateador
+
+
+def formatear_precio(precio):
+    """Formatea un precio con el formateador vigente"""
+    return obtener_formateador().formatear(precio)
+
+
+def formatear_lote(precios):
+    """Formatea un arreglo de precios con el formateador vigente"""
+    return obtener_formateador().formatear_lote(precios)
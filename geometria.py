@@ -0,0 +1,227 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: geometria.py
+Geometría de habitaciones: plantas poligonales, aberturas y techos inclinados
+
+Las funciones escalares trabajan con listas de vértices (x, y) en metros y
+son las que usa Habitacion. evaluar_lote() calcula las mismas magnitudes
+para muchas habitaciones a la vez con NumPy.
+
+Convenciones:
+- La planta es un polígono simple; sus vértices pueden ir en cualquier sentido
+- El techo inclinado sube linealmente en el eje x, desde `altura` en el
+  borde de menor x hasta `altura_maxima` en el de mayor x
+"""
+
+import math
+
+import numpy as np
+
+
+class Abertura:
+    """Puerta, ventana u otro vano que se descuenta del área de paredes"""
+
+    def __init__(self, ancho, alto, cantidad=1, tipo="ventana"):
+        self.ancho = float(ancho)
+        self.alto = float(alto)
+        self.cantidad = int(cantidad)
+        self.tipo = tipo  # puerta, ventana, vano
+
+    def __str__(self):
+        return f"{self.cantidad}x {self.tipo} {self.ancho}x{self.alto}m"
+
+    def calcular_area(self):
+        """Área total de la abertura (todas las unidades)"""
+        return self.ancho * self.alto * self.cantidad
+
+
+def vertices_rectangulo(ancho, largo):
+    """Vértices de un rectángulo ancho (x) por largo (y) con origen en (0, 0)"""
+    return [(0.0, 0.0), (ancho, 0.0), (ancho, largo), (0.0, largo)]
+
+
+def area_poligono(vertices):
+    """Área de un polígono simple con la fórmula del cordón (shoelace)"""
+    suma = 0.0
+    n = len(vertices)
+    for i in range(n):
+        x1, y1 = vertices[i]
+        x2, y2 = vertices[(i + 1) % n]
+        suma += x1 * y2 - x2 * y1
+    return abs(suma) / 2
+
+
+def centroide_poligono(vertices):
+    """Centroide (x, y) de un polígono simple"""
+    suma_area = cx = cy = 0.0
+    n = len(vertices)
+    for i in range(n):
+        x1, y1 = vertices[i]
+        x2, y2 = vertices[(i + 1) % n]
+        cruz = x1 * y2 - x2 * y1
+        suma_area += cruz
+        cx += (x1 + x2) * cruz
+        cy += (y1 + y2) * cruz
+    if suma_area == 0:
+        return (sum(v[0] for v in vertices) / n, sum(v[1] for v in vertices) / n)
+    return (cx / (3 * suma_area), cy / (3 * suma_area))
+
+
+def segmentos_pared(vertices):
+    """Lista de segmentos ((x1, y1), (x2, y2), longitud) del contorno"""
+    n = len(vertices)
+    segmentos = []
+    for i in range(n):
+        p1 = vertices[i]
+        p2 = vertices[(i + 1) % n]
+        segmentos.append((p1, p2, math.hypot(p2[0] - p1[0], p2[1] - p1[1])))
+    return segmentos
+
+
+def perimetro_poligono(vertices):
+    """Perímetro del polígono"""
+    return sum(longitud for _, _, longitud in segmentos_pared(vertices))
+
+
+def _funcion_altura(vertices, altura, altura_maxima):
+    """Devuelve (h(x), pendiente) del techo sobre la planta"""
+    if altura_maxima is None or altura_maxima == altura:
+        return (lambda x: altura), 0.0
+    xs = [v[0] for v in vertices]
+    x_min, x_max = min(xs), max(xs)
+    if x_max == x_min:
+        return (lambda x: altura), 0.0
+    pendiente = (altura_maxima - altura) / (x_max - x_min)
+    return (lambda x: altura + pendiente * (x - x_min)), pendiente
+
+
+def area_paredes_bruta(vertices, altura, altura_maxima=None):
+    """Área de paredes sin descontar aberturas.
+
+    Con techo inclinado cada segmento es un trapecio: longitud por la altura
+    media de sus extremos.
+    """
+    h, _ = _funcion_altura(vertices, altura, altura_maxima)
+    return sum(longitud * (h(p1[0]) + h(p2[0])) / 2 for p1, p2, longitud in segmentos_pared(vertices))
+
+
+def area_techo(vertices, altura=0.0, altura_maxima=None):
+    """Área del techo: la de la planta corregida por la pendiente"""
+    _, pendiente = _funcion_altura(vertices, altura, altura_maxima)
+    return area_poligono(vertices) * math.sqrt(1 + pendiente ** 2)
+
+
+def volumen(vertices, altura, altura_maxima=None):
+    """Volumen bajo el techo: para una altura lineal es área por h(centroide)"""
+    h, _ = _funcion_altura(vertices, altura, altura_maxima)
+    return area_poligono(vertices) * h(centroide_poligono(vertices)[0])
+
+
+def area_aberturas(aberturas):
+    """Suma de las áreas de una lista de aberturas"""
+    return sum(a.calcular_area() for a in aberturas)
+
+
+# =============================================================================
+# EVALUACIÓN VECTORIZADA
+# =============================================================================
+
+def evaluar_lote(habitaciones):
+    """Calcula la geometría de muchas habitaciones con operaciones vectorizadas.
+
+    Las habitaciones rectangulares (sin `vertices`) usan fórmulas cerradas;
+    las poligonales se concatenan en un solo arreglo de vértices y se
+    reducen por habitación con np.add.reduceat.
+
+    Args:
+        habitaciones: Secuencia de Habitacion
+
+    Returns:
+        Diccionario de arreglos (uno por habitación): area_piso, perimetro,
+        area_paredes_bruta, area_aberturas, area_paredes, area_techo, volumen
+    """
+    n = len(habitaciones)
+    anchos = np.fromiter((h.ancho for h in habitaciones), float, n)
+    largos = np.fromiter((h.largo for h in habitaciones), float, n)
+    h0 = np.fromiter((h.altura for h in habitaciones), float, n)
+    h1 = np.fromiter((h.altura if h.altura_maxima is None else h.altura_maxima for h in habitaciones), float, n)
+    aberturas = np.zeros(n)
+    con_aberturas = [i for i, h in enumerate(habitaciones) if h.aberturas]
+    if con_aberturas:
+        aberturas[con_aberturas] = [area_aberturas(habitaciones[i].aberturas) for i in con_aberturas]
+
+    arreglos = evaluar_rectangulos(anchos, largos, h0, h1, aberturas)
+    poligonales = [i for i, h in enumerate(habitaciones) if h.vertices is not None]
+    if poligonales:
+        _evaluar_poligonos(habitaciones, poligonales, h0, h1, arreglos["area_piso"], arreglos["perimetro"],
+                           arreglos["area_paredes_bruta"], arreglos["area_techo"], arreglos["volumen"])
+        arreglos["area_paredes"] = np.maximum(arreglos["area_paredes_bruta"] - aberturas, 0.0)
+    return arreglos
+
+
+def evaluar_rectangulos(anchos, largos, h0, h1=None, aberturas=None):
+    """Geometría de habitaciones rectangulares a partir de columnas NumPy
+
+    Args:
+        anchos, largos: Dimensiones en planta
+        h0: Altura en el borde de menor x
+        h1: Altura en el borde de mayor x (None: techo plano)
+        aberturas: Área de aberturas por habitación (None: sin aberturas)
+
+    Returns:
+        Diccionario con las mismas claves que evaluar_lote()
+    """
+    h1 = h0 if h1 is None else h1
+    aberturas = np.zeros(len(anchos)) if aberturas is None else aberturas
+    # La pendiente va a lo largo del ancho
+    area = anchos * largos
+    perimetro = 2 * (anchos + largos)
+    paredes = perimetro * (h0 + h1) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pendiente = np.where(anchos > 0, (h1 - h0) / anchos, 0.0)
+    return {
+        "area_piso": area,
+        "perimetro": perimetro,
+        "area_paredes_bruta": paredes,
+        "area_aberturas": aberturas,
+        "area_paredes": np.maximum(paredes - aberturas, 0.0),
+        "area_techo": area * np.sqrt(1 + pendiente ** 2),
+        "volumen": area * (h0 + h1) / 2,
+    }
+
+
+def _evaluar_poligonos(habitaciones, indices, h0, h1, area, perimetro, paredes, techo, vol):
+    """Rellena en sitio las posiciones `indices` con el cálculo poligonal"""
+    conteos = np.array([len(habitaciones[i].vertices) for i in indices])
+    inicios = np.concatenate(([0], np.cumsum(conteos)[:-1]))
+    puntos = np.array([v for i in indices for v in habitaciones[i].vertices], dtype=float)
+    x, y = puntos[:, 0], puntos[:, 1]
+    # Índice del vértice siguiente dentro del mismo polígono
+    siguiente = np.arange(len(x)) + 1
+    siguiente[inicios + conteos - 1] = inicios
+    xs, ys = x[siguiente], y[siguiente]
+
+    cruz = x * ys - xs * y
+    suma_cruz = np.add.reduceat(cruz, inicios)
+    area_p = np.abs(suma_cruz) / 2
+    longitudes = np.hypot(xs - x, ys - y)
+    perimetro_p = np.add.reduceat(longitudes, inicios)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cx = np.where(suma_cruz != 0, np.add.reduceat((x + xs) * cruz, inicios) / (3 * suma_cruz),
+                      np.add.reduceat(x, inicios) / conteos)
+
+    # Techo lineal en x entre el mínimo y el máximo de cada polígono
+    x_min = np.minimum.reduceat(x, inicios)
+    x_max = np.maximum.reduceat(x, inicios)
+    alto_0, alto_1 = h0[indices], h1[indices]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pendiente = np.where(x_max > x_min, (alto_1 - alto_0) / (x_max - x_min), 0.0)
+    por_vertice = np.repeat(np.arange(len(indices)), conteos)
+    altura_v = alto_0[por_vertice] + pendiente[por_vertice] * (x - x_min[por_vertice])
+    altura_s = alto_0[por_vertice] + pendiente[por_vertice] * (xs - x_min[por_vertice])
+
+    area[indices] = area_p
+    perimetro[indices] = perimetro_p
+    paredes[indices] = np.add.reduceat(longitudes * (altura_v + altura_s) / 2, inicios)
+    techo[indices] = area_p * np.sqrt(1 + pendiente ** 2)
+    vol[indices] = area_p * (alto_0 + pendiente * (cx - x_min))
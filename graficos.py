@@ -7,51 +7,263 @@ Versión: 1.0
 
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
 import numpy as np
 import seaborn as sns
 from typing import List, Dict, Tuple, Optional
 import pandas as pd
+from collections import Counter
 from datetime import datetime
 
+import formato
+from cantidades import columnas_dashboard_pintura, datos_materiales_pintura
+from clases import calcular_costos_arreglos
+
 # Configuración de estilo
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
+# =============================================================================
+# MODOS PARA MUCHAS HABITACIONES
+# =============================================================================
+
+MAX_CATEGORIAS = 15  # Por encima, los gráficos por habitación muestran las mayores más "Otros"
+MAX_PUNTOS_ETIQUETADOS = 10  # Puntos de dispersión con nombre (los de mayor costo)
+MAX_PUNTOS_DISPERSION = 5_000  # Por encima, la dispersión se agrega en hexágonos
+BINS_HISTOGRAMA = 30
+
+
+def indices_top(valores, n: int = MAX_CATEGORIAS) -> Optional[np.ndarray]:
+    """
+    Índices de los n valores mayores, de mayor a menor
+
+    Returns:
+        Arreglo de índices, o None si hay n valores o menos (no hace falta agrupar)
+    """
+    valores = np.asarray(valores, dtype=float)
+    if len(valores) <= n:
+        return None
+    indices = np.argpartition(valores, -n)[-n:]
+    return indices[np.argsort(valores[indices])[::-1]]
+
+
+def agrupar_top(nombres, valores, n: int = MAX_CATEGORIAS, indices=None, promedio: bool = False,
+                etiqueta_otros: str = 'Otros') -> Tuple[List[str], np.ndarray]:
+    """
+    Reduce una serie por categoría a las n mayores más un grupo "Otros"
+
+    Args:
+        nombres: Nombre de cada valor
+        valores: Valores numéricos
+        n: Categorías que se muestran por separado
+        indices: Selección ya calculada con indices_top (para agrupar varias
+            series con las mismas categorías)
+        promedio: "Otros" vale el promedio del resto en lugar de la suma
+            (en barras, la suma de miles de habitaciones aplasta a las demás)
+        etiqueta_otros: Nombre del grupo con el resto
+
+    Returns:
+        (nombres, valores); con n categorías o menos, todas en su orden original
+    """
+    valores = np.asarray(valores, dtype=float)
+    if indices is None:
+        indices = indices_top(valores, n)
+    if indices is None:
+        return list(nombres), valores
+    resto = np.ones(len(valores), dtype=bool)
+    resto[indices] = False
+    etiquetas = [nombres[i] for i in indices.tolist()]
+    cantidad = int(resto.sum())
+    etiquetas.append(f'{etiqueta_otros} ({cantidad}, promedio)' if promedio else f'{etiqueta_otros} ({cantidad})')
+    otros = valores[resto].sum()
+    return etiquetas, np.append(valores[indices], otros / cantidad if promedio else otros)
+
+
+def contar_categorias(categorias, n: int = MAX_CATEGORIAS,
+                      etiqueta_otros: str = 'Otros') -> Tuple[List[str], List[int]]:
+    """
+    Cuenta repeticiones en una sola pasada (Counter) y agrupa las menos frecuentes
+
+    Args:
+        categorias: Iterable de categorías, o un Counter ya calculado
+        n: Categorías que se muestran por separado
+        etiqueta_otros: Nombre del grupo con el resto
+
+    Returns:
+        (categorías, conteos) de la más a la menos frecuente
+    """
+    frecuentes = Counter(categorias).most_common()
+    nombres = [c for c, _ in frecuentes[:n]]
+    conteos = [k for _, k in frecuentes[:n]]
+    if len(frecuentes) > n:
+        nombres.append(f'{etiqueta_otros} ({len(frecuentes) - n})')
+        conteos.append(sum(k for _, k in frecuentes[n:]))
+    return nombres, conteos
+
+
+def histograma(ax: plt.Axes, valores, bins: int = BINS_HISTOGRAMA, **estilo):
+    """Histograma como un solo artista (StepPatch), sin un rectángulo por barra"""
+    conteos, bordes = np.histogram(np.asarray(valores, dtype=float), bins=bins)
+    return ax.stairs(conteos, bordes, fill=True, **estilo)
+
+
+def etiquetar_categorias(ax: plt.Axes, nombres: List[str], rotacion: int = 45) -> np.ndarray:
+    """Marcas del eje x en 0..n-1 con los nombres; devuelve las posiciones"""
+    posiciones = np.arange(len(nombres))
+    ax.set_xticks(posiciones, nombres, rotation=rotacion, ha='right' if rotacion else 'center')
+    return posiciones
+
+
+def eje_moneda(texto: str) -> str:
+    """Título de eje con el símbolo de moneda configurado: 'Costo ($)'"""
+    return f"{texto} ({formato.obtener_formateador().simbolo})"
+
+
+def texto_resumen(nombres, arreglos, costos) -> str:
+    """Resumen de la casa a partir de arreglos (Casa.obtener_arreglos), sin recorrer habitaciones"""
+    if arreglos is None or not len(nombres):
+        return 'Sin habitaciones'
+    area_total = float(arreglos['area_piso'].sum())
+    costo_total = float(costos.sum())
+    costo_m2 = costo_total / area_total if area_total > 0 else 0
+    # Unidades (Σ cantidad), como Casa.obtener_estadisticas, no filas
+    return (f"Habitaciones: {int(arreglos['cantidad'].sum())}\n"
+            f"Área Total: {area_total:.1f} m²\n"
+            f"Volumen Total: {float(arreglos['volumen'].sum()):.1f} m³\n"
+            f"Costo Total: {formato.formatear_precio(costo_total)}\n"
+            f"Costo por m²: {formato.formatear_precio(costo_m2)}\n"
+            f"Más cara: {nombres[int(costos.argmax())]}\n"
+            f"Más grande: {nombres[int(arreglos['area_piso'].argmax())]}")
+
+
+class DatosPintura:
+    """
+    Datos por habitación para DashboardPintura y GraficosIndividuales
+
+    Tabla columnar (pandas DataFrame, una fila por habitación y columnas con
+    tipo fijo) que se construye una sola vez a partir de una Casa o de una
+    lista de diccionarios. Las métricas generales se calculan la primera vez
+    que se piden y quedan en caché; los gráficos leen columnas como arreglos
+    NumPy en lugar de recorrer diccionarios.
+    """
+
+    COLUMNAS = {
+        'nombre': 'string',
+        'area_piso': 'float64',
+        'area_paredes': 'float64',
+        'volumen': 'float64',
+        'costo_total': 'float64',
+        'litros_pintura': 'float64',
+        'costo_pintura': 'float64',
+        'costo_primer': 'float64',
+        'costo_accesorios': 'float64',
+        'cantidad': 'int64',
+    }
+
+    def __init__(self, tabla: pd.DataFrame):
+        """
+        Args:
+            tabla: DataFrame con (al menos) las columnas de COLUMNAS (cantidad
+                es opcional: 1 por fila)
+        """
+        if 'cantidad' not in tabla.columns:
+            # Registros sin cantidad: una habitación por fila
+            tabla = tabla.assign(cantidad=1)
+        faltantes = [c for c in self.COLUMNAS if c not in tabla.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en los datos de pintura: {', '.join(faltantes)}")
+        tabla = tabla[list(self.COLUMNAS)].astype(self.COLUMNAS).reset_index(drop=True)
+        # Columnas derivadas (0 en habitaciones sin paredes, en lugar de dividir por cero)
+        area = tabla['area_paredes'].to_numpy()
+        con_area = area > 0
+        tabla['litros_m2'] = np.divide(tabla['litros_pintura'].to_numpy(), area,
+                                       out=np.zeros(len(tabla)), where=con_area)
+        tabla['costo_m2'] = np.divide(tabla['costo_total'].to_numpy(), area,
+                                      out=np.zeros(len(tabla)), where=con_area)
+        self.tabla = tabla
+        self._metricas = None
+        self._nombres = None
+
+    @classmethod
+    def desde_casa(cls, casa) -> 'DatosPintura':
+        """Construye los datos desde una Casa (cantidades.columnas_dashboard_pintura)"""
+        return cls(pd.DataFrame(columnas_dashboard_pintura(casa)))
+
+    @classmethod
+    def desde_registros(cls, datos_habitaciones: List[Dict]) -> 'DatosPintura':
+        """Construye los datos desde una lista de diccionarios por habitación"""
+        if not datos_habitaciones:
+            return cls(pd.DataFrame(columns=list(cls.COLUMNAS)))
+        return cls(pd.DataFrame.from_records(datos_habitaciones))
+
+    @classmethod
+    def desde(cls, datos) -> 'DatosPintura':
+        """Acepta DatosPintura, Casa o lista de diccionarios"""
+        if isinstance(datos, cls):
+            return datos
+        if hasattr(datos, 'habitaciones'):
+            return cls.desde_casa(datos)
+        return cls.desde_registros(datos)
+
+    def __len__(self) -> int:
+        return len(self.tabla)
+
+    def columna(self, nombre: str) -> np.ndarray:
+        """Columna numérica como arreglo NumPy (sin copiar)"""
+        return self.tabla[nombre].to_numpy()
+
+    @property
+    def nombres(self) -> List[str]:
+        """Nombres de las habitaciones, en orden"""
+        if self._nombres is None:
+            self._nombres = self.tabla['nombre'].tolist()
+        return self._nombres
+
+    @property
+    def metricas(self) -> Dict:
+        """Métricas generales del proyecto (calculadas una vez)"""
+        if self._metricas is None:
+            total_area = float(self.columna('area_paredes').sum())
+            total_costo = float(self.columna('costo_total').sum())
+            self._metricas = {
+                'total_area': total_area,
+                'total_volumen': float(self.columna('volumen').sum()),
+                'total_costo': total_costo,
+                'total_pintura': float(self.columna('litros_pintura').sum()),
+                'num_habitaciones': int(self.columna('cantidad').sum()),
+                'costo_promedio_m2': total_costo / total_area if total_area > 0 else 0
+            }
+        return self._metricas
+
+
 class DashboardPintura:
     """
     Clase principal para generar el dashboard de visualización
     de análisis de costos de pintura
     """
     
-    def __init__(self, datos_habitaciones: List[Dict], datos_materiales: Dict):
+    def __init__(self, datos_habitaciones, datos_materiales: Optional[Dict] = None):
         """
         Inicializa el dashboard con los datos de habitaciones y materiales
         
         Args:
-            datos_habitaciones: Lista de diccionarios con datos por habitación
-            datos_materiales: Diccionario con información de materiales
+            datos_habitaciones: DatosPintura, Casa o lista de diccionarios con
+                datos por habitación
+            datos_materiales: Diccionario con información de materiales (con una
+                Casa, por defecto cantidades.datos_materiales_pintura)
         """
-        self.datos_habitaciones = datos_habitaciones
-        self.datos_materiales = datos_materiales
+        if datos_materiales is None and hasattr(datos_habitaciones, 'habitaciones'):
+            datos_materiales = datos_materiales_pintura(datos_habitaciones)
+        self.datos = DatosPintura.desde(datos_habitaciones)
+        self.datos_materiales = datos_materiales or {}
         self.colores = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', 
                        '#DDA0DD', '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9']
     
     def calcular_metricas_generales(self) -> Dict:
-        """Calcula métricas generales del proyecto"""
-        total_area = sum(hab['area_paredes'] for hab in self.datos_habitaciones)
-        total_volumen = sum(hab['volumen'] for hab in self.datos_habitaciones)
-        total_costo = sum(hab['costo_total'] for hab in self.datos_habitaciones)
-        total_pintura = sum(hab['litros_pintura'] for hab in self.datos_habitaciones)
-        
-        return {
-            'total_area': total_area,
-            'total_volumen': total_volumen,
-            'total_costo': total_costo,
-            'total_pintura': total_pintura,
-            'num_habitaciones': len(self.datos_habitaciones),
-            'costo_promedio_m2': total_costo / total_area if total_area > 0 else 0
-        }
+        """Métricas generales del proyecto (en caché en DatosPintura)"""
+        return self.datos.metricas
     
     def grafico_barras_habitaciones(self, ax: plt.Axes) -> None:
         """
@@ -60,28 +272,30 @@ class DashboardPintura:
         Args:
             ax: Eje de matplotlib donde dibujar
         """
-        nombres = [hab['nombre'] for hab in self.datos_habitaciones]
-        costos = [hab['costo_total'] for hab in self.datos_habitaciones]
+        nombres = self.datos.nombres
+        costos = self.datos.columna('costo_total')
+        etiquetas, valores = agrupar_top(nombres, costos, promedio=True)
         
-        barras = ax.bar(nombres, costos, color=self.colores[:len(nombres)], 
+        posiciones = np.arange(len(etiquetas))
+        barras = ax.bar(posiciones, valores, color=self.colores,
                        alpha=0.8, edgecolor='black', linewidth=1)
         
         # Personalización
-        ax.set_title('💰 Costo Total por Habitación', fontsize=14, fontweight='bold', pad=20)
+        titulo = '💰 Costo Total por Habitación'
+        if len(etiquetas) < len(nombres):
+            titulo += f' ({MAX_CATEGORIAS} más caras)'
+        ax.set_title(titulo, fontsize=14, fontweight='bold', pad=20)
         ax.set_xlabel('Habitaciones', fontweight='bold')
-        ax.set_ylabel('Costo Total ($)', fontweight='bold')
-        ax.tick_params(axis='x', rotation=45)
+        ax.set_ylabel(eje_moneda('Costo Total'), fontweight='bold')
+        etiquetar_categorias(ax, etiquetas)
         
-        # Agregar valores sobre las barras
-        for barra, costo in zip(barras, costos):
-            altura = barra.get_height()
-            ax.text(barra.get_x() + barra.get_width()/2., altura + max(costos)*0.01,
-                   f'${costo:,.0f}', ha='center', va='bottom', fontweight='bold')
+        # Valores sobre las barras (una sola llamada para todo el contenedor)
+        ax.bar_label(barras, fmt=formato.formatear_precio, padding=2, fontsize=8, fontweight='bold')
         
-        # Línea de promedio
-        promedio = np.mean(costos)
+        # Línea de promedio (sobre todas las habitaciones)
+        promedio = costos.mean()
         ax.axhline(y=promedio, color='red', linestyle='--', alpha=0.7, 
-                  label=f'Promedio: ${promedio:,.0f}')
+                  label=f'Promedio: {formato.formatear_precio(promedio)}')
         ax.legend()
         
         # Grid para mejor lectura
@@ -94,8 +308,17 @@ class DashboardPintura:
         Args:
             ax: Eje de matplotlib donde dibujar
         """
-        nombres = [hab['nombre'] for hab in self.datos_habitaciones]
-        costos = [hab['costo_total'] for hab in self.datos_habitaciones]
+        nombres = self.datos.nombres
+        costos = self.datos.columna('costo_total')
+        
+        if len(nombres) > MAX_CATEGORIAS:
+            # Con muchas habitaciones las porciones serían ilegibles: histograma de costos
+            histograma(ax, costos, color=self.colores[2], alpha=0.8)
+            ax.set_xlabel(eje_moneda('Costo Total'), fontweight='bold')
+            ax.set_ylabel('Habitaciones', fontweight='bold')
+            ax.set_title('📊 Distribución de Costos por Habitación', 
+                        fontsize=14, fontweight='bold', pad=20)
+            return
         
         # Crear el gráfico circular
         wedges, texts, autotexts = ax.pie(costos, labels=nombres, autopct='%1.1f%%',
@@ -121,14 +344,20 @@ class DashboardPintura:
         Args:
             ax: Eje de matplotlib donde dibujar
         """
-        nombres = [hab['nombre'] for hab in self.datos_habitaciones]
+        nombres = self.datos.nombres
         
         # Separar costos por tipo de material
-        costos_pintura = [hab['costo_pintura'] for hab in self.datos_habitaciones]
-        costos_primer = [hab['costo_primer'] for hab in self.datos_habitaciones]
-        costos_accesorios = [hab['costo_accesorios'] for hab in self.datos_habitaciones]
+        costos_pintura = self.datos.columna('costo_pintura')
+        costos_primer = self.datos.columna('costo_primer')
+        costos_accesorios = self.datos.columna('costo_accesorios')
+        
+        # Con muchas habitaciones: las de mayor costo de materiales más "Otros"
+        seleccion = indices_top(costos_pintura + costos_primer + costos_accesorios)
+        etiquetas, costos_pintura = agrupar_top(nombres, costos_pintura, indices=seleccion, promedio=True)
+        _, costos_primer = agrupar_top(nombres, costos_primer, indices=seleccion, promedio=True)
+        _, costos_accesorios = agrupar_top(nombres, costos_accesorios, indices=seleccion, promedio=True)
         
-        x = np.arange(len(nombres))
+        x = np.arange(len(etiquetas))
         width = 0.25
         
         # Crear barras agrupadas
@@ -143,9 +372,8 @@ class DashboardPintura:
         ax.set_title('🎨 Comparativa de Materiales por Habitación', 
                     fontsize=14, fontweight='bold', pad=20)
         ax.set_xlabel('Habitaciones', fontweight='bold')
-        ax.set_ylabel('Costo ($)', fontweight='bold')
-        ax.set_xticks(x)
-        ax.set_xticklabels(nombres, rotation=45)
+        ax.set_ylabel(eje_moneda('Costo'), fontweight='bold')
+        etiquetar_categorias(ax, etiquetas)
         ax.legend()
         ax.grid(True, alpha=0.3, axis='y')
     
@@ -156,20 +384,25 @@ class DashboardPintura:
         Args:
             ax: Eje de matplotlib donde dibujar
         """
-        areas = [hab['area_paredes'] for hab in self.datos_habitaciones]
-        volumenes = [hab['volumen'] for hab in self.datos_habitaciones]
-        costos = [hab['costo_total'] for hab in self.datos_habitaciones]
-        nombres = [hab['nombre'] for hab in self.datos_habitaciones]
+        areas = self.datos.columna('area_paredes')
+        volumenes = self.datos.columna('volumen')
+        costos = self.datos.columna('costo_total')
+        nombres = self.datos.nombres
         
-        # Normalizar tamaños para el scatter
-        tamaños = [(costo/max(costos)) * 500 + 50 for costo in costos]
+        if len(costos) > MAX_PUNTOS_DISPERSION:
+            # Demasiados puntos: costo total agregado por celda hexagonal
+            scatter = ax.hexbin(areas, volumenes, C=costos, reduce_C_function=np.sum,
+                                gridsize=40, cmap='viridis', mincnt=1)
+        else:
+            # Normalizar tamaños para el scatter
+            tamaños = costos / costos.max() * 500 + 50 if costos.max() > 0 else 50
+            scatter = ax.scatter(areas, volumenes, s=tamaños, c=costos, 
+                               cmap='viridis', alpha=0.7, edgecolors='black')
         
-        scatter = ax.scatter(areas, volumenes, s=tamaños, c=costos, 
-                           cmap='viridis', alpha=0.7, edgecolors='black')
-        
-        # Agregar etiquetas
-        for i, nombre in enumerate(nombres):
-            ax.annotate(nombre, (areas[i], volumenes[i]), 
+        # Etiquetas solo para las habitaciones más caras
+        seleccion = indices_top(costos, MAX_PUNTOS_ETIQUETADOS)
+        for i in (range(len(nombres)) if seleccion is None else seleccion.tolist()):
+            ax.annotate(nombres[i], (areas[i], volumenes[i]), 
                        xytext=(5, 5), textcoords='offset points',
                        fontsize=9, fontweight='bold')
         
@@ -180,8 +413,8 @@ class DashboardPintura:
         ax.set_ylabel('Volumen (m³)', fontweight='bold')
         
         # Colorbar
-        cbar = plt.colorbar(scatter, ax=ax)
-        cbar.set_label('Costo Total ($)', fontweight='bold')
+        cbar = ax.figure.colorbar(scatter, ax=ax)
+        cbar.set_label(eje_moneda('Costo Total'), fontweight='bold')
         
         ax.grid(True, alpha=0.3)
     
@@ -216,8 +449,8 @@ class DashboardPintura:
 📦 Volumen Total: {metricas['total_volumen']:.1f} m³
 🎨 Pintura Total: {metricas['total_pintura']:.1f} L
 
-💰 Costo Total: ${metricas['total_costo']:,.0f}
-💵 Costo/m²: ${metricas['costo_promedio_m2']:.0f}
+💰 Costo Total: {formato.formatear_precio(metricas['total_costo'])}
+💵 Costo/m²: {formato.formatear_precio(metricas['costo_promedio_m2'])}
 
 📅 Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}
         """
@@ -295,82 +528,108 @@ class GraficosIndividuales:
     Clase para generar gráficos individuales específicos
     """
     
-    def __init__(self, datos_habitaciones: List[Dict]):
-        self.datos_habitaciones = datos_habitaciones
-        self.colores = plt.cm.Set3(np.linspace(0, 1, len(datos_habitaciones)))
+    def __init__(self, datos_habitaciones):
+        """
+        Args:
+            datos_habitaciones: DatosPintura, Casa o lista de diccionarios con
+                datos por habitación
+        """
+        self.datos = DatosPintura.desde(datos_habitaciones)
+        self.colores = plt.cm.Set3(np.linspace(0, 1, len(self.datos)))
     
-    def grafico_eficiencia_pintura(self) -> plt.Figure:
+    def grafico_eficiencia_pintura(self, fig: Optional[Figure] = None) -> Figure:
         """
         Gráfico de eficiencia: litros de pintura por m²
         
+        Args:
+            fig: Figura donde dibujar (API orientada a objetos, sin estado de
+                pyplot); por defecto se crea una con pyplot
+        
         Returns:
             Figura de matplotlib
         """
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        nombres = [hab['nombre'] for hab in self.datos_habitaciones]
-        eficiencia = [hab['litros_pintura']/hab['area_paredes'] 
-                     for hab in self.datos_habitaciones]
+        if fig is None:
+            fig = plt.figure(figsize=(12, 6))
+        ax = fig.subplots()
         
-        barras = ax.bar(nombres, eficiencia, color=self.colores, alpha=0.8)
+        nombres = self.datos.nombres
+        eficiencia = self.datos.columna('litros_m2')
         
-        # Línea de referencia (rendimiento estándar: 0.2 L/m²)
-        ax.axhline(y=0.2, color='red', linestyle='--', 
-                  label='Rendimiento Estándar (0.2 L/m²)')
+        if len(nombres) > MAX_CATEGORIAS:
+            # Muchas habitaciones: distribución de la eficiencia en lugar de una barra por habitación
+            histograma(ax, eficiencia, color=plt.cm.Set3(0.3), alpha=0.8)
+            ax.axvline(x=0.2, color='red', linestyle='--', 
+                      label='Rendimiento Estándar (0.2 L/m²)')
+            ax.set_xlabel('Litros por m²')
+            ax.set_ylabel('Habitaciones')
+        else:
+            barras = ax.bar(nombres, eficiencia, color=self.colores, alpha=0.8)
+            
+            # Línea de referencia (rendimiento estándar: 0.2 L/m²)
+            ax.axhline(y=0.2, color='red', linestyle='--', 
+                      label='Rendimiento Estándar (0.2 L/m²)')
+            ax.set_ylabel('Litros por m²')
+            ax.set_xlabel('Habitaciones')
+            ax.tick_params(axis='x', rotation=45)
+            
+            # Agregar valores
+            ax.bar_label(barras, fmt='{:.3f}', padding=2)
         
         ax.set_title('⚡ Eficiencia de Pintura por Habitación', 
                     fontsize=14, fontweight='bold')
-        ax.set_ylabel('Litros por m²')
-        ax.set_xlabel('Habitaciones')
-        ax.tick_params(axis='x', rotation=45)
         ax.legend()
         ax.grid(True, alpha=0.3)
         
-        # Agregar valores
-        for barra, valor in zip(barras, eficiencia):
-            ax.text(barra.get_x() + barra.get_width()/2., 
-                   barra.get_height() + 0.005,
-                   f'{valor:.3f}', ha='center', va='bottom')
-        
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
     
-    def grafico_costo_beneficio(self) -> plt.Figure:
+    def grafico_costo_beneficio(self, fig: Optional[Figure] = None) -> Figure:
         """
         Análisis costo-beneficio por m² vs área
         
+        Args:
+            fig: Figura donde dibujar; por defecto se crea una con pyplot
+        
         Returns:
             Figura de matplotlib
         """
-        fig, ax = plt.subplots(figsize=(10, 8))
+        if fig is None:
+            fig = plt.figure(figsize=(10, 8))
+        ax = fig.subplots()
         
-        areas = [hab['area_paredes'] for hab in self.datos_habitaciones]
-        costo_m2 = [hab['costo_total']/hab['area_paredes'] 
-                    for hab in self.datos_habitaciones]
-        nombres = [hab['nombre'] for hab in self.datos_habitaciones]
+        areas = self.datos.columna('area_paredes')
+        costos = self.datos.columna('costo_total')
+        costo_m2 = self.datos.columna('costo_m2')
+        nombres = self.datos.nombres
         
-        scatter = ax.scatter(areas, costo_m2, s=200, c=self.colores, 
-                           alpha=0.7, edgecolors='black')
+        if len(nombres) > MAX_PUNTOS_DISPERSION:
+            # Demasiados puntos: densidad por celda hexagonal
+            ax.hexbin(areas, costo_m2, gridsize=40, cmap='Set3', mincnt=1)
+        else:
+            ax.scatter(areas, costo_m2, s=200, c=self.colores, 
+                       alpha=0.7, edgecolors='black')
         
-        # Agregar etiquetas
-        for i, nombre in enumerate(nombres):
-            ax.annotate(nombre, (areas[i], costo_m2[i]),
+        # Etiquetas solo para las habitaciones más caras
+        seleccion = indices_top(costos, MAX_PUNTOS_ETIQUETADOS)
+        for i in (range(len(nombres)) if seleccion is None else seleccion.tolist()):
+            ax.annotate(nombres[i], (areas[i], costo_m2[i]),
                        xytext=(10, 10), textcoords='offset points')
         
         # Línea de tendencia
         z = np.polyfit(areas, costo_m2, 1)
         p = np.poly1d(z)
-        ax.plot(areas, p(areas), "r--", alpha=0.8, 
+        extremos = np.array([areas.min(), areas.max()])
+        ax.plot(extremos, p(extremos), "r--", alpha=0.8, 
                label=f'Tendencia: y={z[0]:.2f}x+{z[1]:.2f}')
         
         ax.set_title('💹 Análisis Costo-Beneficio: Costo/m² vs Área', 
                     fontsize=14, fontweight='bold')
         ax.set_xlabel('Área de Paredes (m²)')
-        ax.set_ylabel('Costo por m² ($)')
+        ax.set_ylabel(eje_moneda('Costo por m²'))
         ax.legend()
         ax.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
 
 
@@ -385,48 +644,375 @@ class Dashboard:
         ]
 
     def mostrar(self):
-        import matplotlib.pyplot as plt
-        import numpy as np
-        from matplotlib.gridspec import GridSpec
-        resumen = self.casa.obtener_resumen_completo()
-        habitaciones = resumen['habitaciones']
-        if not habitaciones:
+        if not self.casa.habitaciones:
             print('No hay habitaciones para mostrar en el dashboard.')
             return
         fig = plt.figure(figsize=(18, 10))
+        self.dibujar(fig)
+        plt.show()
+
+    def dibujar(self, fig: Figure) -> bool:
+        """
+        Dibuja el dashboard en una figura existente (API orientada a objetos,
+        sin estado global de pyplot; sirve en procesos y para guardar imágenes)
+
+        Returns:
+            False si la casa no tiene habitaciones (la figura queda vacía)
+        """
+        habitaciones = self.casa.habitaciones
+        if not habitaciones:
+            return False
+        # Arreglos en una pasada en lugar de un resumen por habitación
+        nombres = [h.nombre for h in habitaciones]
+        arreglos = self.casa.obtener_arreglos()
+        costos = calcular_costos_arreglos(arreglos)
         gs = GridSpec(2, 2, figure=fig, hspace=0.3, wspace=0.3)
-        # Gráfico de barras de costos
+        # Gráfico de barras de costos (las más caras más "Otros")
         ax1 = fig.add_subplot(gs[0, 0])
-        nombres = [h['nombre'] for h in habitaciones]
-        costos = [h['costo_total'] for h in habitaciones]
-        ax1.bar(nombres, costos, color=self.colores[:len(nombres)], alpha=0.8, edgecolor='black')
-        ax1.set_title('Costo Total por Habitación')
-        ax1.set_ylabel('Costo ($)')
-        ax1.tick_params(axis='x', rotation=45)
-        # Gráfico de áreas
+        etiquetas, valores = agrupar_top(nombres, costos, promedio=True)
+        ax1.bar(etiquetar_categorias(ax1, etiquetas), valores, color=self.colores, alpha=0.8, edgecolor='black')
+        ax1.set_title('Costo Total por Habitación' if len(etiquetas) == len(nombres)
+                      else f'Costo Total por Habitación ({MAX_CATEGORIAS} más caras)')
+        ax1.set_ylabel(eje_moneda('Costo'))
+        # Gráfico de áreas: torta con pocas habitaciones, histograma con muchas
         ax2 = fig.add_subplot(gs[0, 1])
-        areas = [h['area_piso'] for h in habitaciones]
-        ax2.pie(areas, labels=nombres, autopct='%1.1f%%', colors=self.colores[:len(nombres)])
+        if len(nombres) <= MAX_CATEGORIAS:
+            ax2.pie(arreglos['area_piso'], labels=nombres, autopct='%1.1f%%',
+                    colors=[self.colores[i % len(self.colores)] for i in range(len(nombres))])
+        else:
+            histograma(ax2, arreglos['area_piso'], color=self.colores[2], alpha=0.8)
+            ax2.set_xlabel('Área de piso (m²)')
+            ax2.set_ylabel('Habitaciones')
         ax2.set_title('Distribución de Áreas de Piso')
         # Gráfico de materiales (paredes)
         ax3 = fig.add_subplot(gs[1, 0])
-        materiales = [h['material_paredes'] for h in habitaciones]
-        unique_mat = list(set(materiales))
-        counts = [materiales.count(m) for m in unique_mat]
-        ax3.bar(unique_mat, counts, color=self.colores[:len(unique_mat)])
+        unique_mat, counts = contar_categorias(h.material_paredes.nombre if h.material_paredes else 'No asignado'
+                                               for h in habitaciones)
+        ax3.bar(etiquetar_categorias(ax3, unique_mat), counts, color=self.colores)
         ax3.set_title('Materiales de Paredes Usados')
         # Resumen general
         ax4 = fig.add_subplot(gs[1, 1])
         ax4.axis('off')
-        stats = resumen['estadisticas']
-        texto = f"""Habitaciones: {stats['cantidad_habitaciones']}\nÁrea Total: {stats['area_total']:.1f} m²\nVolumen Total: {stats['volumen_total']:.1f} m³\nCosto Total: ${stats['costo_total']:,.0f}\nCosto por m²: ${stats['costo_por_m2']:,.0f}\nMás cara: {stats['habitacion_mas_cara']}\nMás grande: {stats['habitacion_mas_grande']}"""
-        ax4.text(0.5, 0.5, texto, ha='center', va='center', fontsize=13, bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+        ax4.text(0.5, 0.5, texto_resumen(nombres, arreglos, costos), ha='center', va='center', fontsize=13, bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
         fig.suptitle(f'Dashboard de Costos - {self.casa.nombre}', fontsize=18, fontweight='bold')
-        plt.tight_layout()
-        plt.show()
+        fig.tight_layout()
+        return True
+
+
+class DashboardEmbebido:
+    """Dashboard de una Casa que vive dentro de la ventana Tk y se actualiza en sitio
+
+    La figura se crea una sola vez (API orientada a objetos, sin pyplot) y la
+    interfaz la incrusta con FigureCanvasTkAgg. Las barras y las cuñas son
+    una PolyCollection por eje: actualizar() reescribe sus vértices con
+    NumPy (el equivalente de set_height/set_theta en un solo trazo) y cambia
+    los textos existentes. Los ejes, marcas y títulos se guardan como fondo
+    tras cada dibujo completo, y mientras no cambien se redibujan solo los
+    artistas animados sobre ese fondo (blitting). El dibujo completo, con
+    draw_idle(), queda para cuando cambian las categorías (habitaciones
+    agregadas, eliminadas o renombradas, materiales de pared distintos) o la
+    escala de un eje o el nombre de la casa.
+
+    Con más de MAX_DETALLE habitaciones las barras y la torta muestran las
+    MAX_CATEGORIAS mayores más "Otros", para que el costo de dibujo no crezca
+    con el tamaño de la casa.
+    """
+
+    MAX_DETALLE = 250  # Habitaciones que se muestran una por una
+    MAX_ETIQUETAS = 25  # Etiquetas visibles por eje; con más categorías se muestran salteadas
+    PORCENTAJE_MINIMO = 3.0  # Cuñas más pequeñas se dibujan sin texto
+    PUNTOS_ARCO = 64  # Vértices del arco de cada cuña
+
+    def __init__(self, figsize: Tuple[float, float] = (14, 3.8)):
+        self.colores = [
+            '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7',
+            '#DDA0DD', '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9'
+        ]
+        self.figura = Figure(figsize=figsize)
+        gs = GridSpec(1, 4, figure=self.figura, wspace=0.35, left=0.05, right=0.98, bottom=0.3, top=0.85)
+        self.ax_costos = self.figura.add_subplot(gs[0, 0])
+        self.ax_areas = self.figura.add_subplot(gs[0, 1])
+        self.ax_materiales = self.figura.add_subplot(gs[0, 2])
+        self.ax_resumen = self.figura.add_subplot(gs[0, 3])
+        self.ax_resumen.axis('off')
+        self.texto_resumen = self.ax_resumen.text(0.5, 0.5, '', ha='center', va='center', fontsize=10, animated=True,
+                                                  bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+        self.titulo = self.figura.suptitle('', fontsize=13, fontweight='bold')
+        self._categorias_costos = None
+        self._categorias_areas = None
+        self._materiales = None
+        self._barras = self._barras_materiales = self._cunas = None
+        self._vertices_barras = self._vertices_materiales = None
+        self._etiquetas_cunas, self._porcentajes = [], []
+        self._fondo = None
+        self._lienzo = None
+        self._dibujo_pendiente = False
+
+    def actualizar(self, casa) -> None:
+        """
+        Refleja el estado actual de la casa en la figura
+
+        Args:
+            casa: Casa a mostrar (puede ser otra que la anterior)
+        """
+        habitaciones = casa.habitaciones
+        nombres = [h.nombre for h in habitaciones]
+        if habitaciones:
+            arreglos = casa.obtener_arreglos()
+            costos = calcular_costos_arreglos(arreglos)
+            areas = arreglos['area_piso']
+        else:
+            arreglos, costos, areas = None, np.zeros(0), np.zeros(0)
+
+        completo = False
+        limite = MAX_CATEGORIAS if len(nombres) > self.MAX_DETALLE else len(nombres)
+        categorias_costos, costos_barras = agrupar_top(nombres, costos, limite)
+        if categorias_costos != self._categorias_costos:
+            self._construir_costos(categorias_costos)
+            self._categorias_costos = categorias_costos
+            completo = True
+        completo |= self._actualizar_barras(self.ax_costos, self._barras, self._vertices_barras, costos_barras)
+
+        categorias_areas, areas_cunas = agrupar_top(nombres, areas, limite)
+        if categorias_areas != self._categorias_areas:
+            self._construir_areas(categorias_areas)
+            self._categorias_areas = categorias_areas
+            completo = True
+        self._actualizar_areas(areas_cunas)
+
+        conteo = Counter(h.material_paredes.nombre if h.material_paredes else 'No asignado' for h in habitaciones)
+        if len(conteo) > MAX_CATEGORIAS:
+            categorias, conteos = contar_categorias(conteo)
+        else:
+            categorias = sorted(conteo)
+            conteos = [conteo[c] for c in categorias]
+        if categorias != self._materiales:
+            self._construir_materiales(categorias)
+            self._materiales = categorias
+            completo = True
+        completo |= self._actualizar_barras(self.ax_materiales, self._barras_materiales, self._vertices_materiales,
+                                            np.array(conteos, dtype=float))
+
+        titulo = f'Dashboard de Costos - {casa.nombre}'
+        if titulo != self.titulo.get_text():
+            self.titulo.set_text(titulo)
+            completo = True
+        self.texto_resumen.set_text(texto_resumen(nombres, arreglos, costos))
+        self._redibujar(completo)
+
+    # -------------------------------------------------------------------------
+    # Dibujo: completo con draw_idle() o solo artistas animados sobre el fondo
+    # -------------------------------------------------------------------------
+
+    def _artistas_animados(self):
+        artistas = [self._barras, self._cunas, self._barras_materiales, self.texto_resumen]
+        artistas += [t for t in self._etiquetas_cunas if t.get_visible()]
+        artistas += [t for t in self._porcentajes if t.get_visible()]
+        return [a for a in artistas if a is not None]
+
+    def _al_dibujar(self, evento):
+        # Dibujo completo (draw_idle, cambio de tamaño de la ventana): el
+        # lienzo sin artistas animados es el fondo para las próximas actualizaciones
+        lienzo = self.figura.canvas
+        self._fondo = lienzo.copy_from_bbox(self.figura.bbox)
+        for artista in self._artistas_animados():
+            self.figura.draw_artist(artista)
+        self._dibujo_pendiente = False
+
+    def _redibujar(self, completo):
+        lienzo = self.figura.canvas
+        if not getattr(lienzo, 'supports_blit', False):
+            lienzo.draw_idle()
+            return
+        if self._lienzo is not lienzo:
+            lienzo.mpl_connect('draw_event', self._al_dibujar)
+            self._lienzo = lienzo
+            completo = True
+        if completo or self._fondo is None or self._dibujo_pendiente:
+            # Hasta que se dibuje, el fondo guardado no corresponde a la figura
+            self._dibujo_pendiente = True
+            lienzo.draw_idle()
+            return
+        lienzo.restore_region(self._fondo)
+        for artista in self._artistas_animados():
+            self.figura.draw_artist(artista)
+        lienzo.blit(self.figura.bbox)
+
+    # -------------------------------------------------------------------------
+    # Construcción de ejes (solo cuando cambian las categorías)
+    # -------------------------------------------------------------------------
+
+    def _colores_para(self, n):
+        return [self.colores[i % len(self.colores)] for i in range(n)]
+
+    def _construir_barras(self, ax, categorias, **estilo):
+        n = len(categorias)
+        posiciones = np.arange(n)
+        # Rectángulos (x0, 0), (x0, h), (x1, h), (x1, 0); solo cambian las alturas
+        vertices = np.zeros((n, 4, 2))
+        vertices[:, :2, 0] = (posiciones - 0.4)[:, None]
+        vertices[:, 2:, 0] = (posiciones + 0.4)[:, None]
+        barras = PolyCollection(vertices, facecolors=self._colores_para(n), animated=True, **estilo)
+        ax.add_collection(barras)
+        ax.set_xlim(-0.6, n - 0.4)
+        ax.set_ylim(0, 1)
+        paso = max(1, -(-n // self.MAX_ETIQUETAS))
+        ax.set_xticks(posiciones[::paso], categorias[::paso], rotation=45, ha='right', fontsize=8)
+        return barras, vertices
+
+    def _construir_costos(self, nombres):
+        ax = self.ax_costos
+        ax.clear()
+        self._barras, self._vertices_barras = self._construir_barras(ax, nombres, alpha=0.8, edgecolors='black')
+        ax.set_title('Costo Total por Habitación', fontsize=10)
+        ax.set_ylabel(eje_moneda('Costo'))
+
+    def _construir_materiales(self, categorias):
+        ax = self.ax_materiales
+        ax.clear()
+        self._barras_materiales, self._vertices_materiales = self._construir_barras(ax, categorias)
+        ax.set_title('Materiales de Paredes Usados', fontsize=10)
+
+    def _construir_areas(self, nombres):
+        ax = self.ax_areas
+        ax.clear()
+        ax.set_title('Distribución de Áreas de Piso', fontsize=10)
+        ax.set_aspect('equal')
+        ax.set_xlim(-1.3, 1.3)
+        ax.set_ylim(-1.3, 1.3)
+        ax.axis('off')
+        self._cunas = PolyCollection(np.zeros((len(nombres), self.PUNTOS_ARCO + 1, 2)),
+                                     facecolors=self._colores_para(len(nombres)), edgecolors='white',
+                                     linewidths=0.5, animated=True)
+        ax.add_collection(self._cunas)
+        self._etiquetas_cunas = [ax.text(0, 0, nombre, fontsize=8, va='center', animated=True) for nombre in nombres]
+        self._porcentajes = [ax.text(0, 0, '', fontsize=8, ha='center', va='center', animated=True)
+                             for _ in nombres]
+
+    # -------------------------------------------------------------------------
+    # Actualización en sitio
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _actualizar_barras(ax, barras, vertices, valores):
+        """Cambia las alturas; devuelve True si hubo que cambiar la escala del eje"""
+        vertices[:, 1:3, 1] = valores[:, None]
+        barras.set_verts(vertices)
+        maximo = float(valores.max()) if len(valores) else 0.0
+        tope = ax.get_ylim()[1]
+        # La escala solo cambia si las barras se salen o quedan muy bajas,
+        # así la mayoría de las ediciones no redibujan las marcas del eje
+        if maximo > tope or maximo < tope * 0.5:
+            ax.set_ylim(0, maximo * 1.1 if maximo > 0 else 1)
+            return True
+        return False
+
+    def _actualizar_areas(self, areas):
+        total = float(areas.sum()) if len(areas) else 0.0
+        fracciones = areas / total if total > 0 else np.zeros(len(areas))
+        # Mismos ángulos que ax.pie (inicio en 0°, sentido antihorario)
+        limites = np.concatenate(([0.0], np.cumsum(fracciones))) * (2 * np.pi)
+        angulos = limites[:-1, None] + np.outer(limites[1:] - limites[:-1], np.linspace(0, 1, self.PUNTOS_ARCO))
+        vertices = np.zeros((len(areas), self.PUNTOS_ARCO + 1, 2))
+        vertices[:, 1:, 0] = np.cos(angulos)
+        vertices[:, 1:, 1] = np.sin(angulos)
+        self._cunas.set_verts(vertices)
+
+        medios = (limites[:-1] + limites[1:]) / 2
+        cosenos, senos = np.cos(medios).tolist(), np.sin(medios).tolist()
+        porcentajes = (fracciones * 100).tolist()
+        for i, porcentaje in enumerate(porcentajes):
+            visible = porcentaje >= self.PORCENTAJE_MINIMO
+            etiqueta, texto = self._etiquetas_cunas[i], self._porcentajes[i]
+            etiqueta.set_visible(visible)
+            texto.set_visible(visible)
+            if visible:
+                etiqueta.set_position((1.1 * cosenos[i], 1.1 * senos[i]))
+                etiqueta.set_horizontalalignment('left' if cosenos[i] >= 0 else 'right')
+                texto.set_position((0.6 * cosenos[i], 0.6 * senos[i]))
+                texto.set_text(f'{porcentaje:.1f}%')
+
+
+def grafico_sensibilidad(analisis: Dict, fig: Optional[Figure] = None, n: int = MAX_CATEGORIAS) -> Figure:
+    """
+    Gráfico de tornado: costo total al mover cada precio o factor ±variación
+
+    Args:
+        analisis: Resultado de Casa.analizar_sensibilidad()
+        fig: Figura donde dibujar; por defecto se crea una con pyplot
+        n: Parámetros que se muestran (los de mayor aporte)
+
+    Returns:
+        Figura de matplotlib
+    """
+    if fig is None:
+        fig = plt.figure(figsize=(12, 8))
+    ax = fig.subplots()
+
+    parametros = analisis['tornado'][:n][::-1]  # El de mayor impacto arriba
+    total = analisis['costo_total']
+    posiciones = np.arange(len(parametros))
+    bajos = np.array([p['costo_bajo'] for p in parametros])
+    altos = np.array([p['costo_alto'] for p in parametros])
+    colores = ['#45B7D1' if p['parametro'] == 'precio_m2' else '#FF6B6B' for p in parametros]
+
+    ax.barh(posiciones, total - bajos, left=bajos, color=colores, alpha=0.5, edgecolor='black')
+    ax.barh(posiciones, altos - total, left=total, color=colores, alpha=0.9, edgecolor='black')
+    ax.axvline(total, color='black', linewidth=1)
+    ax.set_yticks(posiciones, [f"{p['nombre']} ({p['participacion']:.0%})" for p in parametros])
+
+    porcentaje = analisis['variacion']
+    ax.set_title(f'Sensibilidad del Costo Total (±{porcentaje:.0%} en precio o factor)',
+                fontsize=14, fontweight='bold')
+    ax.set_xlabel(eje_moneda('Costo total'))
+    ax.legend(handles=[patches.Patch(color='#45B7D1', label='Precio de material'),
+                       patches.Patch(color='#FF6B6B', label='Factor de sistema')])
+    ax.grid(True, axis='x', alpha=0.3)
+
+    fig.tight_layout()
+    return fig
+
+
+def grafico_simulacion(resultado, fig: Optional[Figure] = None, nivel: float = 0.95,
+                       bins: int = 60) -> Figure:
+    """
+    Histograma del costo simulado con la cotización, P50, P90 y el VaR
+
+    Args:
+        resultado: simulacion.ResultadoSimulacion
+        fig: Figura donde dibujar; por defecto se crea una con pyplot
+        nivel: Confianza del VaR (0.95 = percentil 95)
+        bins: Intervalos del histograma
+
+    Returns:
+        Figura de matplotlib
+    """
+    if fig is None:
+        fig = plt.figure(figsize=(12, 6))
+    ax = fig.subplots()
+
+    histograma(ax, resultado.costos, bins, color='#45B7D1', alpha=0.7)
+    p50, p90, pvar = np.percentile(resultado.costos, [50, 90, nivel * 100])
+    for valor, color, estilo, etiqueta in (
+            (resultado.costo_base, 'black', '-', f'Cotización: {formato.formatear_precio(resultado.costo_base)}'),
+            (p50, '#4ECDC4', '--', f'P50: {formato.formatear_precio(p50)}'),
+            (p90, '#F7DC6F', '--', f'P90: {formato.formatear_precio(p90)}'),
+            (pvar, '#FF6B6B', '--', f'VaR {nivel:.0%}: +{formato.formatear_precio(pvar - resultado.costo_base)}')):
+        ax.axvline(valor, color=color, linestyle=estilo, linewidth=2, label=etiqueta)
+
+    ax.set_title(f'Riesgo de Costo ({len(resultado.costos):,} escenarios)', fontsize=14, fontweight='bold')
+    ax.set_xlabel(eje_moneda('Costo total'))
+    ax.set_ylabel('Escenarios')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    return fig
+
+
 # Función utilitaria para uso rápido
-def crear_dashboard_rapido(datos_habitaciones: List[Dict], 
-                          datos_materiales: Dict,
+def crear_dashboard_rapido(datos_habitaciones, 
+                          datos_materiales: Optional[Dict] = None,
                           mostrar: bool = True,
                           guardar: bool = False,
                           nombre_archivo: str = "dashboard_pintura.png") -> None:
@@ -434,7 +1020,7 @@ def crear_dashboard_rapido(datos_habitaciones: List[Dict],
     Función de conveniencia para crear dashboard rápidamente
     
     Args:
-        datos_habitaciones: Lista de datos por habitación
+        datos_habitaciones: DatosPintura, Casa o lista de datos por habitación
         datos_materiales: Diccionario de materiales
         mostrar: Si mostrar el dashboard
         guardar: Si guardar el dashboard
@@ -454,7 +1040,10 @@ if __name__ == "__main__":
     print("🎨 Módulo de Gráficos para Análisis de Pintura")
     print("=" * 50)
     print("Funcionalidades disponibles:")
+    print("• DatosPintura: Tabla por habitación (desde Casa o diccionarios)")
     print("• DashboardPintura: Clase principal para dashboard completo")
     print("• GraficosIndividuales: Gráficos específicos adicionales")
+    print("• grafico_sensibilidad(): Tornado de Casa.analizar_sensibilidad()")
+    print("• grafico_simulacion(): Histograma de simulacion.SimulacionCostos")
     print("• crear_dashboard_rapido(): Función de conveniencia")
     print("\n¡Listo para visualizar datos de pintura! 📊")
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: impuestos.py
+Etapa de precios: IVA, administración y utilidad aplicados en bloque
+
+Aplica los factores de CONFIGURACION en el mismo orden que
+datos.calcular_precio_con_impuestos, pero sobre arreglos completos (todas
+las habitaciones de una casa o de un portafolio) en una sola pasada.
+
+Hay dos modos:
+- Flotante: rápido, para cotizaciones y gráficos
+- Exacto: enteros en centavos con redondeo ROUND_HALF_UP en cada etapa,
+  idéntico a hacer la cuenta con Decimal, para facturas
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+from clases import calcular_costos_arreglos
+from datos import CONFIGURACION
+
+# Etapas en el orden en que se encadenan: (nombre, clave en CONFIGURACION)
+ETAPAS = (
+    ("iva", "factor_iva"),
+    ("administracion", "factor_administracion"),
+    ("utilidad", "factor_utilidad"),
+)
+
+CENTAVO = Decimal("0.01")
+
+# Mayor entero representable en int64: por encima se calcula con enteros de Python
+_MAXIMO_INT64 = int(np.iinfo(np.int64).max)
+
+
+def obtener_factores(config=None):
+    """Devuelve [(nombre, factor)] de las etapas según la configuración"""
+    config = config or CONFIGURACION
+    return [(nombre, config[clave]) for nombre, clave in ETAPAS]
+
+
+def factor_total(config=None):
+    """Factor multiplicativo combinado de todas las etapas"""
+    total = 1.0
+    for _, factor in obtener_factores(config):
+        total *= 1 + factor
+    return total
+
+
+# =============================================================================
+# MODO FLOTANTE
+# =============================================================================
+
+def aplicar_impuestos_lote(precios, config=None):
+    """Precio final de cada línea: una multiplicación por el factor combinado"""
+    return np.asarray(precios, dtype=float) * factor_total(config)
+
+
+def desglosar_lote(precios, config=None):
+    """Desglose por etapa de un arreglo de precios base
+
+    Returns:
+        Diccionario de arreglos: base, iva, administracion, utilidad, total
+    """
+    acumulado = np.asarray(precios, dtype=float)
+    desglose = {"base": acumulado}
+    for nombre, factor in obtener_factores(config):
+        desglose[nombre] = acumulado * factor
+        acumulado = acumulado + desglose[nombre]
+    desglose["total"] = acumulado
+    return desglose
+
+
+# =============================================================================
+# MODO EXACTO (CENTAVOS)
+# =============================================================================
+
+def a_centavos(precios):
+    """Convierte precios en pesos a enteros en centavos (mitad hacia arriba)"""
+    valores = np.asarray(precios, dtype=float) * 100
+    return (np.sign(valores) * np.floor(np.abs(valores) + 0.5)).astype(np.int64)
+
+
+def _monto_etapa(acumulado, numerador, denominador):
+    """acumulado * numerador / denominador redondeado ROUND_HALF_UP, en enteros"""
+    if acumulado.size and acumulado.min() < 0:
+        return np.sign(acumulado) * _monto_etapa(np.abs(acumulado), numerador, denominador)
+    # Factores sin expansión decimal corta (1/3) dan razones de 16 dígitos:
+    # si el producto intermedio no cabe en int64 se usan enteros de Python
+    maximo = max(int(acumulado.max()), 1) if acumulado.size else 1
+    if maximo * 2 * numerador + denominador > _MAXIMO_INT64 or 2 * denominador > _MAXIMO_INT64:
+        monto = acumulado.astype(object) * (2 * numerador)
+        monto += denominador
+        monto //= 2 * denominador
+        return monto.astype(np.int64)
+    # Operaciones en sitio: evita arreglos temporales en el camino común
+    monto = acumulado * (2 * numerador)
+    monto += denominador
+    monto //= 2 * denominador
+    return monto
+
+
+def desglosar_centavos(centavos, config=None):
+    """Desglose exacto por etapa sobre enteros en centavos
+
+    Cada etapa se redondea al centavo como lo haría una factura calculada
+    con Decimal y ROUND_HALF_UP.
+
+    Returns:
+        Diccionario de arreglos int64: base, iva, administracion, utilidad, total
+    """
+    acumulado = np.asarray(centavos, dtype=np.int64)
+    desglose = {"base": acumulado}
+    for nombre, factor in obtener_factores(config):
+        numerador, denominador = Decimal(str(factor)).as_integer_ratio()
+        desglose[nombre] = _monto_etapa(acumulado, numerador, denominador)
+        acumulado = acumulado + desglose[nombre]
+    desglose["total"] = acumulado
+    return desglose
+
+
+def aplicar_impuestos_centavos(centavos, config=None):
+    """Precio final exacto en centavos de cada línea"""
+    return desglosar_centavos(centavos, config)["total"]
+
+
+def calcular_precio_con_impuestos_decimal(precio_base, config=None):
+    """Referencia escalar con Decimal (mismo resultado que el modo exacto)"""
+    acumulado = Decimal(str(precio_base)).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+    for _, factor in obtener_factores(config):
+        acumulado += (acumulado * Decimal(str(factor))).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+    return acumulado
+
+
+# =============================================================================
+# CASAS Y PORTAFOLIOS
+# =============================================================================
+
+def _totalizar(desglose, exacto):
+    if exacto:
+        return {nombre: Decimal(int(valores.sum())) / 100 for nombre, valores in desglose.items()}
+    return {nombre: float(valores.sum()) for nombre, valores in desglose.items()}
+
+
+def aplicar_impuestos_casa(casa, exacto=False, config=None):
+    """Aplica las etapas a todas las habitaciones de una casa
+
+    Args:
+        casa: Casa a liquidar
+        exacto: Si True usa centavos enteros y los totales son Decimal
+        config: Configuración alternativa (por defecto CONFIGURACION)
+
+    Returns:
+        Diccionario con 'lineas' (desglose por habitación, en pesos o
+        centavos según el modo) y 'totales' (base, iva, administracion,
+        utilidad, total)
+    """
+    costos = casa.calcular_costos_lote() if casa.habitaciones else np.zeros(0)
+    if exacto:
+        desglose = desglosar_centavos(a_centavos(costos), config)
+    else:
+        desglose = desglosar_lote(costos, config)
+    return {"lineas": desglose, "totales": _totalizar(desglose, exacto)}
+
+
+def aplicar_impuestos_portafolio(casas, exacto=False, config=None):
+    """Aplica las etapas a todas las habitaciones de varias casas en una pasada
+
+    Returns:
+        Lista de diccionarios (casa, totales), uno por casa, en el mismo orden
+    """
+    casas = list(casas)
+    if not casas:
+        return []
+    costos = [calcular_costos_arreglos(c.obtener_arreglos()) if c.habitaciones else np.zeros(0) for c in casas]
+    tamanos = np.array([len(c) for c in costos])
+    todos = np.concatenate(costos)
+    if exacto:
+        desglose = desglosar_centavos(a_centavos(todos), config)
+    else:
+        desglose = desglosar_lote(todos, config)
+
+    # Sumas por casa sobre el arreglo concatenado
+    no_vacias = tamanos > 0
+    inicios = np.concatenate(([0], np.cumsum(tamanos)[:-1]))[no_vacias]
+    sumas = {}
+    for nombre, valores in desglose.items():
+        por_casa = np.zeros(len(casas), dtype=valores.dtype)
+        if len(inicios):
+            por_casa[no_vacias] = np.add.reduceat(valores, inicios)
+        sumas[nombre] = por_casa
+
+    resultado = []
+    for i, casa in enumerate(casas):
+        if exacto:
+            totales = {nombre: Decimal(int(valores[i])) / 100 for nombre, valores in sumas.items()}
+        else:
+            totales = {nombre: float(valores[i]) for nombre, valores in sumas.items()}
+        resultado.append({"casa": casa.nombre, "totales": totales})
+    return resultado
@@ -0,0 +1,271 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: instantaneas.py
+Instantáneas columnares de solo lectura para portafolios grandes
+
+exportar_instantanea() vuelca las habitaciones de construccion.db a un
+directorio con un archivo .npy por columna y un meta.json. Instantanea abre
+ese directorio con np.load(mmap_mode='r'): abrir un portafolio de varios GB
+solo lee el meta.json y las columnas se paginan desde disco a medida que se
+usan.
+
+La geometría (áreas, perímetro, volumen) se calcula al exportar, ya
+multiplicada por la cantidad de habitaciones idénticas, y queda mapeada; los precios y factores se resuelven al consultar, por nombre, con
+el catálogo vigente de datos.py (igual que al cargar una casa en la
+interfaz), de modo que un cambio de precios no exige volver a exportar.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+import db
+import geometria
+from clases import Casa, Habitacion, calcular_costos_arreglos
+from datos import MATERIALES_PISO, MATERIALES_PARED, SISTEMAS_CONSTRUCCION
+
+VERSION_FORMATO = 2
+TAMANO_BLOQUE = 100_000
+
+COLUMNAS_DB = (
+    ("id", np.int64),
+    ("id_casa", np.int64),
+    ("ancho", np.float64),
+    ("largo", np.float64),
+    ("altura", np.float64),
+    ("id_material_piso", np.int64),
+    ("id_material_paredes", np.int64),
+    ("id_sistema", np.int64),
+    ("cantidad", np.int64),
+)
+COLUMNAS_GEOMETRIA = ("area_piso", "perimetro", "area_paredes_bruta", "area_aberturas",
+                      "area_paredes", "area_techo", "volumen")
+
+SIN_ID = -1  # Habitación sin material o sistema asignado
+
+
+def _filtro_casas(id_casas):
+    if id_casas is None:
+        return "", ()
+    id_casas = tuple(id_casas)
+    return f" WHERE h.id_casa IN ({', '.join('?' * len(id_casas))})", id_casas
+
+
+# =============================================================================
+# EXPORTACIÓN
+# =============================================================================
+
+def exportar_instantanea(directorio, id_casas=None, tamano_bloque=TAMANO_BLOQUE):
+    """Exporta las habitaciones de la base de datos a una instantánea columnar
+
+    Las filas se leen por bloques y se escriben directamente en archivos .npy
+    mapeados, así que la memoria usada no depende del tamaño del portafolio.
+    La instantánea se escribe en un directorio temporal y se renombra al
+    terminar.
+
+    Args:
+        directorio: Directorio destino (se reemplaza si existe)
+        id_casas: Ids de casas a exportar (None: todas)
+        tamano_bloque: Filas leídas por bloque
+
+    Returns:
+        Número de habitaciones exportadas
+    """
+    filtro, parametros = _filtro_casas(id_casas)
+    temporal = directorio.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    conn = db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*), MAX(LENGTH(h.nombre)) FROM habitacion h{filtro}", parametros)
+        filas, largo_nombre = cursor.fetchone()
+        columnas = {nombre: np.lib.format.open_memmap(os.path.join(temporal, f"{nombre}.npy"), mode="w+",
+                                                     dtype=tipo, shape=(filas,))
+                    for nombre, tipo in COLUMNAS_DB}
+        for nombre in COLUMNAS_GEOMETRIA:
+            columnas[nombre] = np.lib.format.open_memmap(os.path.join(temporal, f"{nombre}.npy"), mode="w+",
+                                                        dtype=np.float64, shape=(filas,))
+        columnas["nombre"] = np.lib.format.open_memmap(os.path.join(temporal, "nombre.npy"), mode="w+",
+                                                       dtype=f"<U{max(largo_nombre or 1, 1)}", shape=(filas,))
+
+        # Una sola relación por habitación (la más reciente, como al cargar una casa)
+        cursor.execute(
+            "SELECT h.id, h.id_casa, h.ancho, h.largo, h.altura, mp.id, mw.id, s.id, h.cantidad, h.nombre "
+            "FROM habitacion h "
+            "LEFT JOIN (SELECT id_habitacion, id_material_piso, id_material_paredes, id_sistema_construccion, "
+            "MAX(id) FROM habitacion_material GROUP BY id_habitacion) hm ON hm.id_habitacion = h.id "
+            "LEFT JOIN material mp ON mp.id = hm.id_material_piso "
+            "LEFT JOIN material mw ON mw.id = hm.id_material_paredes "
+            "LEFT JOIN sistema_construccion s ON s.id = hm.id_sistema_construccion"
+            f"{filtro} ORDER BY h.id_casa, h.id", parametros)
+        inicio = 0
+        while True:
+            bloque = cursor.fetchmany(tamano_bloque)
+            if not bloque:
+                break
+            fin = inicio + len(bloque)
+            valores = list(zip(*bloque))
+            for (nombre, tipo), columna in zip(COLUMNAS_DB, valores):
+                if tipo is np.int64:
+                    columna = [SIN_ID if v is None else v for v in columna]
+                columnas[nombre][inicio:fin] = columna
+            columnas["nombre"][inicio:fin] = valores[-1]
+            geometria_bloque = geometria.evaluar_rectangulos(columnas["ancho"][inicio:fin],
+                                                             columnas["largo"][inicio:fin],
+                                                             columnas["altura"][inicio:fin])
+            cantidad = columnas["cantidad"][inicio:fin]
+            for nombre in COLUMNAS_GEOMETRIA:
+                columnas[nombre][inicio:fin] = geometria_bloque[nombre] * cantidad
+            inicio = fin
+
+        # Las filas van ordenadas por casa: cada casa es un rango contiguo
+        id_casa = columnas["id_casa"]
+        cortes = np.flatnonzero(np.diff(id_casa)) + 1
+        inicios = np.concatenate(([0], cortes)) if filas else np.zeros(0, dtype=np.int64)
+        finales = np.concatenate((cortes, [filas])) if filas else np.zeros(0, dtype=np.int64)
+        cursor.execute("SELECT id, nombre FROM casa")
+        nombres_casas = dict(cursor.fetchall())
+        cursor.execute("SELECT id, nombre FROM material")
+        materiales = cursor.fetchall()
+        cursor.execute("SELECT id, nombre FROM sistema_construccion")
+        sistemas = cursor.fetchall()
+    finally:
+        conn.close()
+
+    for columna in columnas.values():
+        columna.flush()
+    del columnas
+
+    meta = {
+        "version": VERSION_FORMATO,
+        "creada": datetime.now().isoformat(timespec="seconds"),
+        "filas": filas,
+        "columnas": [n for n, _ in COLUMNAS_DB] + list(COLUMNAS_GEOMETRIA) + ["nombre"],
+        "casas": [{"id": int(id_casa[i]), "nombre": nombres_casas.get(int(id_casa[i]), ""),
+                   "inicio": int(i), "fin": int(f)} for i, f in zip(inicios, finales)],
+        "materiales": {str(i): n for i, n in materiales},
+        "sistemas": {str(i): n for i, n in sistemas},
+    }
+    with open(os.path.join(temporal, "meta.json"), "w", encoding="utf-8") as archivo:
+        json.dump(meta, archivo, ensure_ascii=False)
+
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.replace(temporal, directorio)
+    return filas
+
+
+# =============================================================================
+# LECTURA
+# =============================================================================
+
+def _tabla_por_id(nombres_por_id, catalogo, atributo, neutro):
+    """Arreglo denso id -> valor del catálogo; la última posición (id -1) es el neutro"""
+    maximo = max((int(i) for i in nombres_por_id), default=-1)
+    tabla = np.full(maximo + 2, neutro, dtype=float)
+    for id_texto, nombre in nombres_por_id.items():
+        elemento = catalogo.get(nombre)
+        if elemento is not None:
+            tabla[int(id_texto)] = getattr(elemento, atributo)
+    return tabla
+
+
+class Instantanea:
+    """Instantánea abierta en modo de solo lectura (columnas mapeadas en memoria)"""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        with open(os.path.join(directorio, "meta.json"), encoding="utf-8") as archivo:
+            self.meta = json.load(archivo)
+        if self.meta["version"] != VERSION_FORMATO:
+            raise ValueError(f"Versión de instantánea no soportada: {self.meta['version']}")
+        self.casas = {c["id"]: c for c in self.meta["casas"]}
+        self._columnas = {}
+
+    def __len__(self):
+        return self.meta["filas"]
+
+    def columna(self, nombre):
+        """Columna mapeada (np.memmap de solo lectura), abierta la primera vez que se pide"""
+        if nombre not in self._columnas:
+            self._columnas[nombre] = np.load(os.path.join(self.directorio, f"{nombre}.npy"), mmap_mode="r")
+        return self._columnas[nombre]
+
+    def _rango(self, id_casa):
+        if id_casa is None:
+            return slice(0, len(self))
+        casa = self.casas.get(id_casa)
+        if casa is None:
+            return slice(0, 0)
+        return slice(casa["inicio"], casa["fin"])
+
+    def obtener_arreglos(self, id_casa=None):
+        """Mismo diccionario que Casa.obtener_arreglos, para una casa o todo el portafolio
+
+        Las columnas de geometría son vistas del archivo mapeado (sin copia);
+        precio_piso, precio_paredes y factor se resuelven con el catálogo vigente.
+        """
+        rango = self._rango(id_casa)
+        arreglos = {nombre: self.columna(nombre)[rango] for nombre in COLUMNAS_GEOMETRIA}
+        precios_piso = _tabla_por_id(self.meta["materiales"], MATERIALES_PISO, "precio_m2", 0.0)
+        precios_pared = _tabla_por_id(self.meta["materiales"], MATERIALES_PARED, "precio_m2", 0.0)
+        factores = _tabla_por_id(self.meta["sistemas"], SISTEMAS_CONSTRUCCION, "factor_costo", 1.0)
+        arreglos["precio_piso"] = precios_piso[self.columna("id_material_piso")[rango]]
+        arreglos["precio_paredes"] = precios_pared[self.columna("id_material_paredes")[rango]]
+        arreglos["factor"] = factores[self.columna("id_sistema")[rango]]
+        return arreglos
+
+    def calcular_costos(self, id_casa=None):
+        """Costo de cada habitación (de una casa o de todo el portafolio)"""
+        return calcular_costos_arreglos(self.obtener_arreglos(id_casa))
+
+    def costos_por_casa(self):
+        """Costo total de cada casa en una sola pasada: {id_casa: costo}"""
+        if not self.casas:
+            return {}
+        costos = self.calcular_costos()
+        inicios = [c["inicio"] for c in self.meta["casas"]]
+        totales = np.add.reduceat(costos, inicios)
+        return {c["id"]: float(t) for c, t in zip(self.meta["casas"], totales)}
+
+    def obtener_estadisticas(self, id_casa):
+        """Mismas claves que Casa.obtener_estadisticas, calculadas sobre las columnas"""
+        rango = self._rango(id_casa)
+        arreglos = self.obtener_arreglos(id_casa)
+        if not len(arreglos["area_piso"]):
+            return Casa().obtener_estadisticas()
+        costos = calcular_costos_arreglos(arreglos)
+        nombres = self.columna("nombre")[rango]
+        area_total = float(arreglos["area_piso"].sum())
+        costo_total = float(costos.sum())
+        return {
+            'cantidad_habitaciones': int(self.columna("cantidad")[rango].sum()),
+            'area_total': area_total,
+            'volumen_total': float(arreglos["volumen"].sum()),
+            'costo_total': costo_total,
+            'costo_por_m2': costo_total / area_total if area_total > 0 else 0,
+            'habitacion_mas_cara': str(nombres[int(np.argmax(costos))]),
+            'habitacion_mas_grande': str(nombres[int(np.argmax(arreglos["area_piso"]))]),
+        }
+
+    def cargar_casa(self, id_casa):
+        """Materializa una casa como objetos Casa/Habitacion (para editarla)"""
+        rango = self._rango(id_casa)
+        casa = Casa(self.casas[id_casa]["nombre"] if id_casa in self.casas else "Mi Casa")
+        materiales, sistemas = self.meta["materiales"], self.meta["sistemas"]
+        columnas = [self.columna(n)[rango].tolist() for n in
+                    ("id", "nombre", "ancho", "largo", "altura", "id_material_piso", "id_material_paredes",
+                     "id_sistema", "cantidad")]
+        for id_hab, nombre, ancho, largo, altura, id_piso, id_paredes, id_sistema, cantidad in zip(*columnas):
+            habitacion = Habitacion(nombre, ancho, largo, altura)
+            habitacion.id = id_hab
+            habitacion.cantidad = cantidad
+            habitacion.material_piso = MATERIALES_PISO.get(materiales.get(str(id_piso)))
+            habitacion.material_paredes = MATERIALES_PARED.get(materiales.get(str(id_paredes)))
+            habitacion.sistema_construccion = SISTEMAS_CONSTRUCCION.get(sistemas.get(str(id_sistema)))
+            casa.agregar_habitacion(habitacion)
+        return casa
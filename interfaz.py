@@ -4,10 +4,26 @@ Archivo: interfaz.py
 Interfaz gráfica principal con tkinter
 """
 
+import math
+import os
+import sqlite3
 import tkinter as tk
 import db  # Importar el módulo de base de datos
-from tkinter import ttk, messagebox, simpledialog
-from clases import Casa, Habitacion
+import perfilado
+import catalogos
+import cambios
+from tkinter import ttk, messagebox, simpledialog, filedialog
+from clases import Casa, Habitacion, Material, SistemaConstruccion
+from comandos import (
+    HistorialComandos,
+    AgregarHabitacion,
+    EliminarHabitacion,
+    ModificarHabitacion,
+    RenombrarHabitacion,
+    CambiarPrecioMaterial,
+    CambiarFactorSistema,
+    ComandoCompuesto
+)
 from datos import (
     listar_nombres_materiales_piso,
     listar_nombres_materiales_pared,
@@ -18,9 +34,14 @@ from datos import (
     obtener_sistema_construccion,
     obtener_dimensiones_tipo,
     formatear_precio,
+    formatear_precios,
     TIPOS_HABITACION
 )
 
+RETARDO_GUARDADO_MS = 500  # Espera tras la última edición antes de escribir el lote en SQLite
+RETARDO_REINTENTO_GUARDADO_MS = 5000  # Reintento si SQLite falló (base bloqueada, disco lleno)
+RETARDO_VISTA_PREVIA_MS = 10  # Agrupa teclas seguidas sin pasar de un cuadro (16 ms)
+
 class InterfazPrincipal:
     """Interfaz gráfica principal del sistema"""
     
@@ -42,6 +63,11 @@ class InterfazPrincipal:
         self.casa_actual = Casa("Mi Casa")  # Siempre inicializar con una casa por defecto
         self.casa_id = None
         self.habitacion_seleccionada = None
+        self.costo_total_casa = 0  # Último total calculado en actualizar_resumen
+        self._vista_previa_id = None
+        self._guardado_id = None
+        self._guardado_fallido = False  # El aviso de error se muestra una vez por racha
+        self.dashboard = None  # DashboardEmbebido, creado al abrir el panel por primera vez
 
         # Configurar estilo
         self.configurar_estilo()
@@ -49,8 +75,32 @@ class InterfazPrincipal:
         # Crear interfaz
         self.crear_interfaz()
 
+        # Asegurar esquema e índices antes de leer; una migración que cambió
+        # datos (solo la primera vez) se informa
+        informe = db.crear_tablas()
+        if informe:
+            messagebox.showinfo("Base de datos actualizada",
+                                "Se unificaron o renombraron datos repetidos:\n\n" + "\n".join(informe[:20])
+                                + (f"\n... y {len(informe) - 20} más" if len(informe) > 20 else ""))
+
         # Seleccionar casa al iniciar
         self.seleccionar_casa_al_iniciar()
+        self.reiniciar_historial()
+
+        # Deshacer/rehacer y guardado de cambios pendientes al cerrar
+        self.root.bind_all('<Control-z>', self.deshacer)
+        self.root.bind_all('<Control-y>', self.rehacer)
+        self.root.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+        # Cambios hechos por otros usuarios sobre la misma base
+        self.root.after(cambios.INTERVALO_CAMBIOS_MS, self.revisar_cambios)
+
+        # Recarga en caliente del catálogo externo (si hay uno configurado)
+        self.vigilante_catalogo = None
+        ruta_catalogo = catalogos.ruta_configurada()
+        if ruta_catalogo:
+            self.vigilante_catalogo = catalogos.VigilanteCatalogo(ruta_catalogo, self.al_recargar_catalogo)
+            self.root.after(catalogos.INTERVALO_RECARGA_MS, self.revisar_catalogo)
 
         # Actualizar vista inicial
         self.actualizar_lista_habitaciones()
@@ -74,6 +124,8 @@ class InterfazPrincipal:
 
     def crear_interfaz(self):
         """Crea la interfaz principal"""
+        self.crear_menu()
+
         # Cabecera destacada
         header = ttk.Frame(self.root, style='TFrame')
         header.pack(fill=tk.X)
@@ -98,6 +150,21 @@ class InterfazPrincipal:
         # Panel derecho - Resumen y controles
         self.crear_panel_resumen(main_frame)
 
+        # Panel inferior - Dashboard incrustado (se muestra con el botón del resumen)
+        self.main_frame = main_frame
+        self.frame_dashboard = ttk.Frame(self.root, padding="18 0 18 10", style='TFrame')
+
+    def crear_menu(self):
+        """Crea la barra de menú con las herramientas de rendimiento"""
+        barra = tk.Menu(self.root)
+        herramientas = tk.Menu(barra, tearoff=0)
+        self.var_perfilado = tk.BooleanVar(value=perfilado.ACTIVO)
+        herramientas.add_checkbutton(label="Perfilado de rendimiento", variable=self.var_perfilado,
+                                     command=self.alternar_perfilado)
+        herramientas.add_command(label="Estadísticas de rendimiento...", command=self.mostrar_panel_perfilado)
+        barra.add_cascade(label="Herramientas", menu=herramientas)
+        self.root.config(menu=barra)
+
     def crear_panel_habitaciones(self, parent):
         """Crea el panel de lista de habitaciones"""
         frame = ttk.LabelFrame(parent, text="Habitaciones", padding="14", style='TFrame')
@@ -114,7 +181,12 @@ class InterfazPrincipal:
         btn_frame.pack(fill=tk.X, pady=(0, 0))
         ttk.Button(btn_frame, text="➕ Nueva Habitación", command=self.nueva_habitacion).pack(fill=tk.X, pady=(0, 7))
         ttk.Button(btn_frame, text="🗑️ Eliminar Habitación", command=self.eliminar_habitacion).pack(fill=tk.X, pady=(0, 7))
-        ttk.Button(btn_frame, text="📄 Duplicar Habitación", command=self.duplicar_habitacion).pack(fill=tk.X)
+        ttk.Button(btn_frame, text="📄 Duplicar Habitación", command=self.duplicar_habitacion).pack(fill=tk.X, pady=(0, 7))
+        ttk.Button(btn_frame, text="✏️ Renombrar Habitación", command=self.renombrar_habitacion).pack(fill=tk.X, pady=(0, 7))
+        historial_frame = ttk.Frame(btn_frame, style='TFrame')
+        historial_frame.pack(fill=tk.X)
+        ttk.Button(historial_frame, text="↩️ Deshacer", command=self.deshacer).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 4))
+        ttk.Button(historial_frame, text="↪️ Rehacer", command=self.rehacer).pack(side=tk.LEFT, fill=tk.X, expand=True)
 
     def crear_panel_formulario(self, parent):
         """Crea el panel del formulario de habitación"""
@@ -156,6 +228,11 @@ class InterfazPrincipal:
         self.entry_altura = ttk.Entry(frame, width=30, font=('Segoe UI', 11))
         self.entry_altura.grid(row=6, column=1, sticky=(tk.W, tk.E), pady=2)
 
+        # Cantidad de habitaciones idénticas (una sola especificación)
+        self.entry_cantidad = ttk.Entry(frame, width=10, font=('Segoe UI', 11))
+        self.entry_cantidad.grid(row=6, column=2, sticky=tk.W, padx=(10, 0))
+        ttk.Label(frame, text="unidades", style='Info.TLabel').grid(row=6, column=3, sticky=tk.W, padx=(10, 0))
+
         # Materiales
         ttk.Label(frame, text="Materiales", style='Subtitle.TLabel').grid(
             row=7, column=0, columnspan=2, sticky=tk.W, pady=(20, 10))
@@ -196,6 +273,24 @@ class InterfazPrincipal:
         ttk.Button(btn_frame, text="💾 Guardar Cambios", command=self.guardar_habitacion).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(btn_frame, text="🧹 Limpiar Formulario", command=self.limpiar_formulario).pack(side=tk.LEFT)
 
+        # Vista previa del costo mientras se edita (no escribe en la base de datos)
+        self.label_vista_previa = ttk.Label(frame, text="", style='Info.TLabel', justify=tk.LEFT)
+        self.label_vista_previa.grid(row=12, column=0, columnspan=4, sticky=tk.W, pady=(15, 0))
+        self.configurar_vista_previa()
+
+    def configurar_vista_previa(self):
+        """Enlaza los campos editables del formulario con la vista previa del costo"""
+        campos = (self.entry_nombre, self.entry_ancho, self.entry_largo, self.entry_altura, self.entry_cantidad,
+                  self.combo_material_piso, self.entry_precio_piso,
+                  self.combo_material_paredes, self.entry_precio_paredes,
+                  self.combo_sistema, self.entry_factor_sistema)
+        self.variables_formulario = []
+        for campo in campos:
+            variable = tk.StringVar(self.root, value=campo.get())
+            campo.configure(textvariable=variable)
+            variable.trace_add('write', self.programar_vista_previa)
+            self.variables_formulario.append(variable)
+
     def crear_panel_resumen(self, parent):
         """Crea el panel de resumen"""
         frame = ttk.LabelFrame(parent, text="Resumen de Proyecto", padding="18", style='TFrame')
@@ -216,7 +311,8 @@ class InterfazPrincipal:
         self.label_estadisticas.pack(anchor=tk.W, pady=(0, 15))
 
         # Botones principales
-        ttk.Button(frame, text="📊 Ver Dashboard", command=self.abrir_dashboard).pack(fill=tk.X, pady=(0, 5))
+        self.boton_dashboard = ttk.Button(frame, text="📊 Ver Dashboard", command=self.abrir_dashboard)
+        self.boton_dashboard.pack(fill=tk.X, pady=(0, 5))
         ttk.Button(frame, text="📤 Exportar Reporte", command=self.exportar_reporte).pack(fill=tk.X, pady=(0, 5))
         ttk.Button(frame, text="🏠 Nueva Casa", command=self.nueva_casa).pack(fill=tk.X, pady=(0, 5))
 
@@ -252,36 +348,31 @@ class InterfazPrincipal:
             self.casa_id = casas[0][0]
             self.cargar_casa_desde_db(self.casa_id)
 
+    @perfilado.medir()
     def cargar_casa_desde_db(self, casa_id):
         """Carga la casa y todas sus habitaciones/materiales desde la base de datos."""
         conn = db.get_db_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT nombre FROM casa WHERE id=?", (casa_id,))
         row = cursor.fetchone()
+        conn.close()
         if not row:
             self.casa_actual = Casa("Mi Casa")
-            conn.close()
             return
         self.casa_actual = Casa(row[0])
         self.casa_id = casa_id
-        habitaciones_db = db.obtener_habitaciones_por_casa(self.casa_id)
-        for h in habitaciones_db:
-            habitacion = Habitacion(h[1], h[2], h[3], h[4])
-            rel = db.obtener_materiales_habitacion(h[0])
-            if rel:
-                id_piso, id_paredes, id_sistema = rel
-                materiales = db.obtener_materiales()
-                for m in materiales:
-                    if m[0] == id_piso:
-                        habitacion.material_piso = obtener_material_piso(m[1])
-                    if m[0] == id_paredes:
-                        habitacion.material_paredes = obtener_material_pared(m[1])
-                sistemas = db.obtener_sistemas_construccion()
-                for s in sistemas:
-                    if s[0] == id_sistema:
-                        habitacion.sistema_construccion = obtener_sistema_construccion(s[1])
+        # Habitaciones con los nombres de sus materiales en una sola consulta;
+        # los objetos se resuelven en el catálogo vigente de datos.py
+        for id_hab, nombre, ancho, largo, altura, version, piso, paredes, sistema, cantidad in \
+                db.obtener_habitaciones_con_materiales_por_casa(casa_id):
+            habitacion = Habitacion(nombre, ancho, largo, altura)
+            habitacion.id = id_hab
+            habitacion.version = version
+            habitacion.cantidad = cantidad
+            habitacion.material_piso = obtener_material_piso(piso) if piso else None
+            habitacion.material_paredes = obtener_material_pared(paredes) if paredes else None
+            habitacion.sistema_construccion = obtener_sistema_construccion(sistema) if sistema else None
             self.casa_actual.agregar_habitacion(habitacion)
-        conn.close()
         # Actualizar nombre en la interfaz
         if hasattr(self, 'entry_nombre_casa'):
             self.entry_nombre_casa.delete(0, tk.END)
@@ -292,47 +383,178 @@ class InterfazPrincipal:
         # Intentar cargar la primera casa existente
         conn = db.get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT id, nombre FROM casa ORDER BY id LIMIT 1")
+        cursor.execute("SELECT id FROM casa ORDER BY id LIMIT 1")
         row = cursor.fetchone()
+        conn.close()
         if row:
-            self.casa_id = row[0]
-            self.casa_actual = Casa(row[1])
-            # Cargar habitaciones
-            habitaciones_db = db.obtener_habitaciones_por_casa(self.casa_id)
-            for h in habitaciones_db:
-                habitacion = Habitacion(h[1], h[2], h[3], h[4])
-                # Cargar materiales y sistema
-                rel = db.obtener_materiales_habitacion(h[0])
-                if rel:
-                    id_piso, id_paredes, id_sistema = rel
-                    # Buscar por id en la tabla material/sistema
-                    materiales = db.obtener_materiales()
-                    for m in materiales:
-                        if m[0] == id_piso:
-                            habitacion.material_piso = obtener_material_piso(m[1])
-                        if m[0] == id_paredes:
-                            habitacion.material_paredes = obtener_material_pared(m[1])
-                    sistemas = db.obtener_sistemas_construccion()
-                    for s in sistemas:
-                        if s[0] == id_sistema:
-                            habitacion.sistema_construccion = obtener_sistema_construccion(s[1])
-                self.casa_actual.agregar_habitacion(habitacion)
+            self.cargar_casa_desde_db(row[0])
         else:
             # Si no hay casas, crear una nueva y guardarla
             self.casa_id = db.guardar_casa("Mi Casa")
             self.casa_actual = Casa("Mi Casa")
-        conn.close()
 
+    def revisar_catalogo(self):
+        """Revisa periódicamente si el archivo de catálogo cambió"""
+        self.vigilante_catalogo.revisar()
+        self.root.after(catalogos.INTERVALO_RECARGA_MS, self.revisar_catalogo)
+
+    @perfilado.medir()
+    def al_recargar_catalogo(self):
+        """Refresca listas y costos tras recargar precios, sistemas o tipos"""
+        self.combo_tipo['values'] = listar_tipos_habitacion()
+        self.combo_material_piso['values'] = listar_nombres_materiales_piso()
+        self.combo_material_paredes['values'] = listar_nombres_materiales_pared()
+        self.combo_sistema['values'] = listar_nombres_sistemas()
+        # Precios cambiados en sitio: los subtotales en caché se recalculan
+        self.casa_actual.raiz().recalcular_subtotales()
+        self.actualizar_lista_habitaciones()
+        self.actualizar_resumen()
+        self.programar_vista_previa()
+
+    def reiniciar_historial(self):
+        """Crea un historial de deshacer/rehacer nuevo para la casa actual"""
+        self.historial = HistorialComandos(self.casa_actual, self.casa_id,
+                                           lambda guardar: self.programar_guardado())
+        # Los cambios anteriores a la carga ya están en memoria
+        self.suscriptor_cambios = cambios.SuscriptorCambios(self.casa_id)
+
+    def revisar_cambios(self):
+        """Consulta periódicamente el registro de cambios y aplica solo los deltas"""
+        try:
+            # Con ediciones propias sin guardar se espera al lote: al guardarse
+            # la comprobación de versión detecta cualquier choque
+            if not self.historial.pendientes:
+                resultado = cambios.aplicar_cambios(self.casa_actual, self.suscriptor_cambios.consultar())
+                if resultado:
+                    self.aplicar_cambios_externos(resultado)
+        finally:
+            self.root.after(cambios.INTERVALO_CAMBIOS_MS, self.revisar_cambios)
+
+    @perfilado.medir()
+    def aplicar_cambios_externos(self, resultado):
+        """Refresca solo las filas de las habitaciones afectadas"""
+        if resultado.estructura:
+            self.actualizar_lista_habitaciones()
+        else:
+            seleccion = self.lista_habitaciones.curselection()
+            for h in resultado.afectadas:
+                indice = self.casa_actual.posicion(h)
+                self.lista_habitaciones.delete(indice)
+                self.lista_habitaciones.insert(indice, str(h))
+            for indice in seleccion:
+                self.lista_habitaciones.selection_set(indice)
+        if self.habitacion_seleccionada in resultado.eliminadas:
+            self.habitacion_seleccionada = None
+            self.limpiar_formulario()
+        elif self.habitacion_seleccionada in resultado.afectadas:
+            self.cargar_datos_habitacion()
+        if resultado.catalogo or self.habitacion_seleccionada in resultado.afectadas:
+            self.actualizar_detalle_habitacion()
+        # aplicar_cambios ya ajustó los subtotales con las habitaciones afectadas,
+        # agregadas y eliminadas: el resumen no recorre la casa (el dashboard se
+        # redibuja solo si está visible)
+        self.actualizar_resumen()
+        self.programar_vista_previa()
+
+    def programar_guardado(self, retardo=RETARDO_GUARDADO_MS):
+        """(Re)programa el guardado: cada edición pospone la escritura del lote"""
+        if self._guardado_id is not None:
+            self.root.after_cancel(self._guardado_id)
+        self._guardado_id = self.root.after(retardo, self.guardar_cambios)
+
+    def guardar_cambios(self):
+        """Escribe el lote pendiente; si otro usuario cambió la casa, la recarga.
+
+        Si SQLite falla el lote queda en la cola y se reintenta más tarde.
+
+        Returns:
+            True si se guardó sin conflicto ni error
+        """
+        if self._guardado_id is not None:
+            self.root.after_cancel(self._guardado_id)
+            self._guardado_id = None
+        try:
+            self.historial.guardar_pendientes()
+            self._guardado_fallido = False
+            return True
+        except sqlite3.Error as error:
+            self.programar_guardado(RETARDO_REINTENTO_GUARDADO_MS)
+            if not self._guardado_fallido:
+                self._guardado_fallido = True
+                messagebox.showwarning("Error al guardar",
+                                       f"No se pudieron guardar los cambios: {error}.\n"
+                                       "Se conservan y se reintentará automáticamente.")
+            return False
+        except db.ConflictoConcurrencia as error:
+            messagebox.showwarning("Cambios concurrentes",
+                                   f"{error}.\nSe recargará la casa con los datos actuales; "
+                                   "las ediciones no guardadas se descartan.")
+            self.cargar_casa_desde_db(self.casa_id)
+            self.reiniciar_historial()
+            self.refrescar_tras_historial()
+            return False
+
+    def ejecutar_comando(self, comando):
+        """Aplica un comando a la casa actual y refresca la vista"""
+        self.historial.ejecutar(comando)
+        self.actualizar_lista_habitaciones()
+        self.actualizar_resumen()
+
+    @perfilado.medir()
+    def deshacer(self, event=None):
+        """Deshace la última edición"""
+        try:
+            hecho = self.historial.deshacer()
+        except ValueError as error:
+            messagebox.showerror("No se puede deshacer", str(error))
+            return
+        if hecho:
+            self.refrescar_tras_historial()
+
+    @perfilado.medir()
+    def rehacer(self, event=None):
+        """Rehace la última edición deshecha"""
+        try:
+            hecho = self.historial.rehacer()
+        except ValueError as error:
+            messagebox.showerror("No se puede rehacer", str(error))
+            return
+        if hecho:
+            self.refrescar_tras_historial()
+
+    def refrescar_tras_historial(self):
+        """Refresca la vista tras deshacer/rehacer"""
+        if self.habitacion_seleccionada not in self.casa_actual.habitaciones:
+            self.habitacion_seleccionada = None
+            self.limpiar_formulario()
+        else:
+            self.cargar_datos_habitacion()
+        self.actualizar_lista_habitaciones()
+        self.actualizar_resumen()
+        self.actualizar_detalle_habitacion()
+
+    def cerrar(self):
+        """Guarda los cambios pendientes y cierra la ventana"""
+        if not self.guardar_cambios() and self.historial.pendientes:
+            if not messagebox.askyesno("Cambios sin guardar",
+                                       "No se pudieron guardar los cambios. ¿Cerrar de todas formas?"):
+                return
+            self.root.after_cancel(self._guardado_id)
+        self.root.destroy()
+
+    @perfilado.medir()
     def nueva_casa(self):
         """Crea una nueva casa y la guarda en la base de datos."""
         respuesta = messagebox.askyesno("Nueva Casa", 
-                                       "¿Crear una nueva casa? Se perderán los datos actuales.")
+                                       "¿Crear una nueva casa? Los cambios de la casa actual quedan guardados.")
         if respuesta:
             nombre = simpledialog.askstring("Nueva Casa", "Nombre de la nueva casa:", 
                                           initialvalue="Mi Casa")
             if nombre:
+                self.guardar_cambios()
                 self.casa_id = db.guardar_casa(nombre)
                 self.casa_actual = Casa(nombre)
+                self.reiniciar_historial()
                 self.habitacion_seleccionada = None
                 self.entry_nombre_casa.delete(0, tk.END)
                 self.entry_nombre_casa.insert(0, nombre)
@@ -340,54 +562,37 @@ class InterfazPrincipal:
                 self.actualizar_resumen()
                 self.limpiar_formulario()
 
+    @perfilado.medir()
     def nueva_habitacion(self):
-        """Crea una nueva habitación y la guarda en la base de datos."""
+        """Crea una nueva habitación; se guarda en la base de datos con el próximo lote."""
         nombre = simpledialog.askstring("Nueva Habitación", "Nombre de la habitación:")
         if nombre:
             if self.casa_actual.obtener_habitacion(nombre):
                 messagebox.showerror("Error", "Ya existe una habitación con ese nombre")
                 return
-            habitacion = Habitacion(nombre, 3.0, 3.0, 2.5)
-            # Guardar en base de datos
-            id_hab = db.guardar_habitacion(nombre, 3.0, 3.0, 2.5, self.casa_id)
-            # Guardar relación materiales/sistema (vacío por ahora)
-            db.guardar_habitacion_material(id_hab, None, None, None)
-            self.casa_actual.agregar_habitacion(habitacion)
-            self.actualizar_lista_habitaciones()
-            self.actualizar_resumen()
+            self.ejecutar_comando(AgregarHabitacion(Habitacion(nombre, 3.0, 3.0, 2.5)))
             # Seleccionar la nueva habitación
             index = len(self.casa_actual.habitaciones) - 1
             self.lista_habitaciones.selection_set(index)
             self.seleccionar_habitacion(None)
 
+    @perfilado.medir()
     def eliminar_habitacion(self):
-        """Elimina la habitación seleccionada de la base de datos y de la casa."""
+        """Elimina la habitación seleccionada de la casa (se puede deshacer)."""
         if not self.habitacion_seleccionada:
             messagebox.showwarning("Advertencia", "Seleccione una habitación para eliminar")
             return
         respuesta = messagebox.askyesno("Confirmar", 
                                        f"¿Eliminar la habitación '{self.habitacion_seleccionada.nombre}'?")
         if respuesta:
-            # Eliminar de la base de datos
-            conn = db.get_db_connection()
-            cursor = conn.cursor()
-            # Buscar id de la habitacion en la base de datos
-            cursor.execute("SELECT id FROM habitacion WHERE nombre = ? AND id_casa = ?", (self.habitacion_seleccionada.nombre, self.casa_id))
-            row = cursor.fetchone()
-            if row:
-                id_hab = row[0]
-                cursor.execute("DELETE FROM habitacion_material WHERE id_habitacion = ?", (id_hab,))
-                cursor.execute("DELETE FROM habitacion WHERE id = ?", (id_hab,))
-                conn.commit()
-            conn.close()
-            self.casa_actual.eliminar_habitacion(self.habitacion_seleccionada.nombre)
+            posicion = self.casa_actual.posicion(self.habitacion_seleccionada)
+            self.ejecutar_comando(EliminarHabitacion(self.habitacion_seleccionada, posicion))
             self.habitacion_seleccionada = None
-            self.actualizar_lista_habitaciones()
-            self.actualizar_resumen()
             self.limpiar_formulario()
 
+    @perfilado.medir()
     def guardar_habitacion(self):
-        """Guarda los cambios de la habitación y los sincroniza con la base de datos."""
+        """Guarda los cambios de la habitación como un solo paso de deshacer."""
         nombre = self.entry_nombre.get().strip()
         if not nombre:
             messagebox.showerror("Error", "El nombre es obligatorio")
@@ -396,12 +601,21 @@ class InterfazPrincipal:
             ancho = float(self.entry_ancho.get())
             largo = float(self.entry_largo.get())
             altura = float(self.entry_altura.get())
+            if not all(map(math.isfinite, (ancho, largo, altura))):
+                raise ValueError
             if ancho <= 0 or largo <= 0 or altura <= 0:
                 messagebox.showerror("Error", "Las dimensiones deben ser positivas")
                 return
         except ValueError:
             messagebox.showerror("Error", "Las dimensiones deben ser números válidos")
             return
+        try:
+            cantidad = int(self.entry_cantidad.get() or 1)
+            if cantidad < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "La cantidad debe ser un entero positivo")
+            return
         material_piso = self.combo_material_piso.get()
         precio_piso = self.entry_precio_piso.get()
         if material_piso:
@@ -423,123 +637,82 @@ class InterfazPrincipal:
                 factor_sistema = float(factor_sistema)
             except ValueError:
                 factor_sistema = 1.0
+        comandos = []
+        # Materiales y sistema del catálogo, con los precios editados
+        objeto_piso = obtener_material_piso(material_piso) if material_piso else None
+        if objeto_piso and objeto_piso.precio_m2 != precio_piso:
+            comandos.append(CambiarPrecioMaterial(objeto_piso, precio_piso))
+        objeto_paredes = obtener_material_pared(material_paredes) if material_paredes else None
+        if objeto_paredes and objeto_paredes.precio_m2 != precio_paredes:
+            comandos.append(CambiarPrecioMaterial(objeto_paredes, precio_paredes))
+        objeto_sistema = obtener_sistema_construccion(sistema) if sistema else None
+        if objeto_sistema and objeto_sistema.factor_costo != factor_sistema:
+            comandos.append(CambiarFactorSistema(objeto_sistema, factor_sistema))
         # Buscar si la habitación ya existe
         habitacion_existente = self.casa_actual.obtener_habitacion(nombre)
         if habitacion_existente:
-            # Editar existente
-            habitacion = habitacion_existente
-            habitacion.ancho = ancho
-            habitacion.largo = largo
-            habitacion.altura = altura
+            # Editar existente: solo los campos indicados en el formulario
+            cambios = {"ancho": ancho, "largo": largo, "altura": altura, "cantidad": cantidad}
+            if material_piso:
+                cambios["material_piso"] = objeto_piso
+            if material_paredes:
+                cambios["material_paredes"] = objeto_paredes
+            if sistema:
+                cambios["sistema_construccion"] = objeto_sistema
+            modificacion = ModificarHabitacion.desde_valores(habitacion_existente, **cambios)
+            if modificacion:
+                comandos.append(modificacion)
         else:
             # Crear nueva
             habitacion = Habitacion(nombre, ancho, largo, altura)
-            self.casa_actual.agregar_habitacion(habitacion)
-        # Asignar materiales y sistema
-        if material_piso:
-            habitacion.asignar_material_piso(obtener_material_piso(material_piso))
-            if habitacion.material_piso:
-                habitacion.material_piso.precio_m2 = precio_piso
-        if material_paredes:
-            habitacion.asignar_material_paredes(obtener_material_pared(material_paredes))
-            if habitacion.material_paredes:
-                habitacion.material_paredes.precio_m2 = precio_paredes
-        if sistema:
-            habitacion.asignar_sistema_construccion(obtener_sistema_construccion(sistema))
-            if habitacion.sistema_construccion:
-                habitacion.sistema_construccion.factor_costo = factor_sistema
-        # Guardar en base de datos
-        conn = db.get_db_connection()
-        cursor = conn.cursor()
-        # Buscar id de la habitacion
-        cursor.execute("SELECT id FROM habitacion WHERE nombre = ? AND id_casa = ?", (nombre, self.casa_id))
-        row = cursor.fetchone()
-        if row:
-            id_hab = row[0]
-            cursor.execute("UPDATE habitacion SET ancho=?, largo=?, altura=? WHERE id=?", (ancho, largo, altura, id_hab))
-        else:
-            id_hab = db.guardar_habitacion(nombre, ancho, largo, altura, self.casa_id)
-        # Buscar o insertar material piso
-        id_piso = id_paredes = id_sistema = None
-        if material_piso:
-            cursor.execute("SELECT id FROM material WHERE nombre=?", (material_piso,))
-            r = cursor.fetchone()
-            if not r:
-                id_piso = db.guardar_material(material_piso, precio_piso, 'piso')
-            else:
-                id_piso = r[0]
-                cursor.execute("UPDATE material SET precio_m2=? WHERE id=?", (precio_piso, id_piso))
-        if material_paredes:
-            cursor.execute("SELECT id FROM material WHERE nombre=?", (material_paredes,))
-            r = cursor.fetchone()
-            if not r:
-                id_paredes = db.guardar_material(material_paredes, precio_paredes, 'pared')
-            else:
-                id_paredes = r[0]
-                cursor.execute("UPDATE material SET precio_m2=? WHERE id=?", (precio_paredes, id_paredes))
-        if sistema:
-            cursor.execute("SELECT id FROM sistema_construccion WHERE nombre=?", (sistema,))
-            r = cursor.fetchone()
-            if not r:
-                id_sistema = db.guardar_sistema_construccion(sistema, factor_sistema, habitacion.sistema_construccion.descripcion if habitacion.sistema_construccion else "")
-            else:
-                id_sistema = r[0]
-                cursor.execute("UPDATE sistema_construccion SET factor_costo=? WHERE id=?", (factor_sistema, id_sistema))
-        # Actualizar o insertar relación
-        cursor.execute("SELECT id FROM habitacion_material WHERE id_habitacion=?", (id_hab,))
-        if cursor.fetchone():
-            cursor.execute("UPDATE habitacion_material SET id_material_piso=?, id_material_paredes=?, id_sistema_construccion=? WHERE id_habitacion=?", (id_piso, id_paredes, id_sistema, id_hab))
-        else:
-            db.guardar_habitacion_material(id_hab, id_piso, id_paredes, id_sistema)
-        conn.commit()
-        conn.close()
-        self.actualizar_lista_habitaciones()
-        self.actualizar_resumen()
+            habitacion.cantidad = cantidad
+            habitacion.asignar_material_piso(objeto_piso)
+            habitacion.asignar_material_paredes(objeto_paredes)
+            habitacion.asignar_sistema_construccion(objeto_sistema)
+            comandos.append(AgregarHabitacion(habitacion))
+        if comandos:
+            self.ejecutar_comando(ComandoCompuesto(comandos, f"Guardar '{nombre}'"))
         self.actualizar_detalle_habitacion()
         messagebox.showinfo("Éxito", "Habitación guardada correctamente")
+
+    @perfilado.medir()
     def duplicar_habitacion(self):
-        """Duplica la habitación seleccionada y la guarda en la base de datos."""
-        if not self.habitacion_seleccionada:
+        """Agrega copias idénticas de la habitación seleccionada (se puede deshacer).
+
+        Las copias no son filas nuevas: aumentan la cantidad de la misma
+        especificación, que se costea una sola vez.
+        """
+        h = self.habitacion_seleccionada
+        if not h:
             messagebox.showwarning("Advertencia", "Seleccione una habitación para duplicar")
             return
-        nombre = simpledialog.askstring("Duplicar Habitación", 
-                                       "Nombre para la habitación duplicada:",
-                                       initialvalue=f"{self.habitacion_seleccionada.nombre} - Copia")
-        if nombre:
-            if self.casa_actual.obtener_habitacion(nombre):
-                messagebox.showerror("Error", "Ya existe una habitación con ese nombre")
-                return
-            nueva = Habitacion(nombre, 
-                             self.habitacion_seleccionada.ancho,
-                             self.habitacion_seleccionada.largo,
-                             self.habitacion_seleccionada.altura)
-            nueva.material_piso = self.habitacion_seleccionada.material_piso
-            nueva.material_paredes = self.habitacion_seleccionada.material_paredes
-            nueva.sistema_construccion = self.habitacion_seleccionada.sistema_construccion
-            # Guardar en base de datos
-            id_hab = db.guardar_habitacion(nombre, nueva.ancho, nueva.largo, nueva.altura, self.casa_id)
-            # Buscar ids de materiales y sistema
-            conn = db.get_db_connection()
-            cursor = conn.cursor()
-            id_piso = id_paredes = id_sistema = None
-            if nueva.material_piso:
-                cursor.execute("SELECT id FROM material WHERE nombre=?", (nueva.material_piso.nombre,))
-                r = cursor.fetchone()
-                if r: id_piso = r[0]
-            if nueva.material_paredes:
-                cursor.execute("SELECT id FROM material WHERE nombre=?", (nueva.material_paredes.nombre,))
-                r = cursor.fetchone()
-                if r: id_paredes = r[0]
-            if nueva.sistema_construccion:
-                cursor.execute("SELECT id FROM sistema_construccion WHERE nombre=?", (nueva.sistema_construccion.nombre,))
-                r = cursor.fetchone()
-                if r: id_sistema = r[0]
-            db.guardar_habitacion_material(id_hab, id_piso, id_paredes, id_sistema)
-            conn.close()
-            self.casa_actual.agregar_habitacion(nueva)
-            self.actualizar_lista_habitaciones()
-            self.actualizar_resumen()
+        copias = simpledialog.askinteger("Duplicar Habitación",
+                                         f"Copias idénticas de '{h.nombre}' a agregar:",
+                                         initialvalue=1, minvalue=1)
+        if copias:
+            self.ejecutar_comando(ModificarHabitacion.desde_valores(h, cantidad=h.cantidad + copias))
+            self.cargar_datos_habitacion()
+            self.actualizar_detalle_habitacion()
     
+    @perfilado.medir()
+    def renombrar_habitacion(self):
+        """Cambia el nombre de la habitación seleccionada (se puede deshacer)."""
+        h = self.habitacion_seleccionada
+        if not h:
+            messagebox.showwarning("Advertencia", "Seleccione una habitación para renombrar")
+            return
+        nombre = simpledialog.askstring("Renombrar Habitación", "Nuevo nombre:", initialvalue=h.nombre)
+        nombre = nombre.strip() if nombre else ""
+        if not nombre or nombre == h.nombre:
+            return
+        if self.casa_actual.obtener_habitacion(nombre):
+            messagebox.showerror("Error", "Ya existe una habitación con ese nombre")
+            return
+        self.ejecutar_comando(RenombrarHabitacion(h, nombre))
+        self.cargar_datos_habitacion()
+        self.actualizar_detalle_habitacion()
+
+    @perfilado.medir()
     def seleccionar_habitacion(self, event):
         """Maneja la selección de habitación"""
         selection = self.lista_habitaciones.curselection()
@@ -568,6 +741,9 @@ class InterfazPrincipal:
         
         self.entry_altura.delete(0, tk.END)
         self.entry_altura.insert(0, str(h.altura))
+
+        self.entry_cantidad.delete(0, tk.END)
+        self.entry_cantidad.insert(0, str(h.cantidad))
         
         # Materiales
         if h.material_piso:
@@ -585,6 +761,26 @@ class InterfazPrincipal:
         else:
             self.combo_sistema.set("")
     
+    @perfilado.medir()
+    def actualizar_detalle_habitacion(self):
+        """Muestra el detalle de la habitación seleccionada en el panel de resumen"""
+        if not hasattr(self, 'label_detalle_habitacion'):
+            return
+        h = self.habitacion_seleccionada
+        if not h:
+            self.label_detalle_habitacion.config(text="")
+            return
+        resumen = h.obtener_resumen()
+        texto = (f"{resumen['nombre']} ({resumen['dimensiones']})\n"
+                 f"Piso: {resumen['material_piso']}\n"
+                 f"Paredes: {resumen['material_paredes']}\n"
+                 f"Sistema: {resumen['sistema']}\n"
+                 f"Costo: {formatear_precio(resumen['costo_total'])}")
+        if resumen['cantidad'] > 1:
+            texto += f" ({resumen['cantidad']} × {formatear_precio(resumen['costo_unitario'])})"
+        self.label_detalle_habitacion.config(text=texto)
+
+    @perfilado.medir()
     def aplicar_tipo_habitacion(self, event):
         """Aplica las dimensiones del tipo de habitación seleccionado"""
         tipo = self.combo_tipo.get()
@@ -606,11 +802,80 @@ class InterfazPrincipal:
         self.entry_ancho.delete(0, tk.END)
         self.entry_largo.delete(0, tk.END)
         self.entry_altura.delete(0, tk.END)
+        self.entry_cantidad.delete(0, tk.END)
         self.combo_tipo.set("")
         self.combo_material_piso.set("")
         self.combo_material_paredes.set("")
         self.combo_sistema.set("")
     
+    def programar_vista_previa(self, *args):
+        """Reprograma el recálculo de la vista previa (debounce con root.after)"""
+        if self._vista_previa_id is not None:
+            self.root.after_cancel(self._vista_previa_id)
+        self._vista_previa_id = self.root.after(RETARDO_VISTA_PREVIA_MS, self.actualizar_vista_previa)
+
+    def habitacion_desde_formulario(self):
+        """Construye una habitación temporal con los valores del formulario.
+
+        Los materiales y el sistema son copias con el precio/factor escrito,
+        de modo que el catálogo no se modifica. Devuelve None si las
+        dimensiones o la cantidad aún no son válidas (las mismas reglas que
+        guardar_habitacion, que muestra el mensaje).
+        """
+        try:
+            ancho = float(self.entry_ancho.get())
+            largo = float(self.entry_largo.get())
+            altura = float(self.entry_altura.get())
+        except ValueError:
+            return None
+        if not all(math.isfinite(valor) and valor > 0 for valor in (ancho, largo, altura)):
+            return None
+        try:
+            cantidad = float(self.entry_cantidad.get() or 1)
+        except ValueError:
+            return None
+        if not math.isfinite(cantidad) or cantidad < 1 or not cantidad.is_integer():
+            return None
+        habitacion = Habitacion(self.entry_nombre.get().strip(), ancho, largo, altura)
+        habitacion.cantidad = int(cantidad)
+        piso = obtener_material_piso(self.combo_material_piso.get())
+        if piso:
+            habitacion.material_piso = Material(piso.nombre, self._leer_numero(self.entry_precio_piso, piso.precio_m2), piso.tipo)
+        paredes = obtener_material_pared(self.combo_material_paredes.get())
+        if paredes:
+            habitacion.material_paredes = Material(paredes.nombre, self._leer_numero(self.entry_precio_paredes, paredes.precio_m2), paredes.tipo)
+        sistema = obtener_sistema_construccion(self.combo_sistema.get())
+        if sistema:
+            habitacion.sistema_construccion = SistemaConstruccion(
+                sistema.nombre, self._leer_numero(self.entry_factor_sistema, sistema.factor_costo), sistema.descripcion)
+        return habitacion
+
+    @staticmethod
+    def _leer_numero(entry, por_defecto):
+        # Vacío, texto, NaN o infinito: el valor por defecto
+        try:
+            numero = float(entry.get())
+        except ValueError:
+            return por_defecto
+        return numero if math.isfinite(numero) else por_defecto
+
+    @perfilado.medir()
+    def actualizar_vista_previa(self):
+        """Recalcula solo la habitación editada y la diferencia sobre el total de la casa"""
+        self._vista_previa_id = None
+        habitacion = self.habitacion_desde_formulario()
+        if habitacion is None:
+            self.label_vista_previa.config(text="")
+            return
+        costo = habitacion.calcular_costo_total()
+        existente = self.casa_actual.obtener_habitacion(habitacion.nombre) if habitacion.nombre else None
+        diferencia = costo - (existente.calcular_costo_total() if existente else 0)
+        signo = "+" if diferencia >= 0 else "-"
+        self.label_vista_previa.config(
+            text=f"Vista previa — Habitación: {formatear_precio(costo)}\n"
+                 f"Casa: {formatear_precio(self.costo_total_casa + diferencia)} "
+                 f"({signo}{formatear_precio(abs(diferencia))})")
+
     def cambiar_nombre_casa(self):
         """Cambia el nombre de la casa"""
         nuevo_nombre = self.entry_nombre_casa.get().strip()
@@ -619,29 +884,107 @@ class InterfazPrincipal:
             self.actualizar_resumen()
             messagebox.showinfo("Éxito", "Nombre de proyecto actualizado")
     
+    @perfilado.medir()
     def abrir_dashboard(self):
-        """Abre el dashboard de gráficos"""
+        """Muestra u oculta el dashboard incrustado bajo los paneles principales"""
+        if self.frame_dashboard.winfo_manager():
+            self.frame_dashboard.pack_forget()
+            self.boton_dashboard.config(text="📊 Ver Dashboard")
+            return
         if not self.casa_actual.habitaciones:
             messagebox.showwarning("Advertencia", "Agregue al menos una habitación para ver el dashboard")
             return
-        
-        try:
-            from graficos import Dashboard
-            dashboard = Dashboard(self.casa_actual)
-            dashboard.mostrar()
-        except ImportError:
-            messagebox.showerror("Error", "No se pudo cargar el módulo de gráficos")
-    
+
+        if self.dashboard is None:
+            try:
+                from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+                from graficos import DashboardEmbebido
+            except ImportError:
+                messagebox.showerror("Error", "No se pudo cargar el módulo de gráficos")
+                return
+            # La figura y el lienzo se crean una sola vez; después solo se actualizan
+            self.dashboard = DashboardEmbebido(figsize=(12.4, 3.2))
+            lienzo = FigureCanvasTkAgg(self.dashboard.figura, master=self.frame_dashboard)
+            lienzo.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.frame_dashboard.pack(side=tk.BOTTOM, fill=tk.X, before=self.main_frame)
+        self.boton_dashboard.config(text="📊 Ocultar Dashboard")
+        self.actualizar_dashboard()
+
+    @perfilado.medir()
+    def actualizar_dashboard(self):
+        """Refleja la casa actual en el dashboard, si está visible (en sitio, sin rehacer la figura)"""
+        if self.dashboard is not None and self.frame_dashboard.winfo_manager():
+            self.dashboard.actualizar(self.casa_actual)
+
     def exportar_reporte(self):
         """Exporta un reporte del proyecto"""
         messagebox.showinfo("Funcionalidad", "Función de exportar reporte en desarrollo")
     
+    def alternar_perfilado(self):
+        """Activa o desactiva el perfilado desde el menú"""
+        if self.var_perfilado.get():
+            perfilado.activar()
+        else:
+            perfilado.desactivar()
+
+    def mostrar_panel_perfilado(self):
+        """Muestra una ventana con los tiempos medidos y los contadores de SQLite"""
+        ventana = tk.Toplevel(self.root)
+        ventana.title("Estadísticas de rendimiento")
+        ventana.geometry("760x460")
+        frame = ttk.Frame(ventana, padding="12", style='TFrame')
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        label_contadores = ttk.Label(frame, text="", style='Info.TLabel')
+        label_contadores.pack(anchor=tk.W, pady=(0, 8))
+
+        columnas = ("llamadas", "total_ms", "promedio_ms", "max_ms")
+        tabla = ttk.Treeview(frame, columns=columnas, height=15)
+        tabla.heading("#0", text="Función")
+        tabla.column("#0", width=300)
+        for columna, titulo in zip(columnas, ("Llamadas", "Total (ms)", "Promedio (ms)", "Máx (ms)")):
+            tabla.heading(columna, text=titulo)
+            tabla.column(columna, width=100, anchor=tk.E)
+        tabla.pack(fill=tk.BOTH, expand=True)
+
+        def refrescar():
+            tabla.delete(*tabla.get_children())
+            for fila in perfilado.obtener_estadisticas():
+                tabla.insert("", "end", text=fila["nombre"], values=(
+                    fila["llamadas"], f"{fila['total_ms']:.2f}",
+                    f"{fila['promedio_ms']:.3f}", f"{fila['max_ms']:.2f}"))
+            contadores = perfilado.obtener_contadores()
+            estado = "activo" if perfilado.ACTIVO else "inactivo"
+            label_contadores.config(text=f"Perfilado {estado} — Conexiones: {contadores['conexiones']}  "
+                                         f"Sentencias SQL: {contadores['sentencias_sql']}  "
+                                         f"Commits: {contadores['commits']}")
+
+        def reiniciar():
+            perfilado.reiniciar()
+            refrescar()
+
+        def exportar():
+            ruta = filedialog.asksaveasfilename(parent=ventana, defaultextension=".json",
+                                                initialfile="traza_perfilado.json",
+                                                filetypes=[("Traza Chrome", "*.json")])
+            if ruta:
+                perfilado.exportar_traza_chrome(ruta)
+                perfilado.exportar_json(os.path.splitext(ruta)[0] + ".stats.json")
+                messagebox.showinfo("Éxito", f"Traza exportada en {ruta}", parent=ventana)
+
+        btn_frame = ttk.Frame(frame, style='TFrame')
+        btn_frame.pack(fill=tk.X, pady=(8, 0))
+        ttk.Button(btn_frame, text="🔄 Actualizar", command=refrescar).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(btn_frame, text="🧹 Reiniciar", command=reiniciar).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(btn_frame, text="📤 Exportar traza", command=exportar).pack(side=tk.LEFT)
+        refrescar()
+
     def mostrar_precio_material_piso(self, event=None):
         nombre = self.combo_material_piso.get()
         material = obtener_material_piso(nombre)
         if hasattr(self, 'label_precio_piso'):
             if material:
-                self.label_precio_piso.config(text=f"{material.precio_m2:,.0f} $/m²")
+                self.label_precio_piso.config(text=f"{formatear_precio(material.precio_m2)}/m²")
                 self.entry_precio_piso.delete(0, tk.END)
                 self.entry_precio_piso.insert(0, str(material.precio_m2))
             else:
@@ -653,7 +996,7 @@ class InterfazPrincipal:
         material = obtener_material_pared(nombre)
         if hasattr(self, 'label_precio_paredes'):
             if material:
-                self.label_precio_paredes.config(text=f"{material.precio_m2:,.0f} $/m²")
+                self.label_precio_paredes.config(text=f"{formatear_precio(material.precio_m2)}/m²")
                 self.entry_precio_paredes.delete(0, tk.END)
                 self.entry_precio_paredes.insert(0, str(material.precio_m2))
             else:
@@ -670,19 +1013,34 @@ class InterfazPrincipal:
             else:
                 self.entry_factor_sistema.delete(0, tk.END)
     
+    @perfilado.medir()
     def actualizar_lista_habitaciones(self):
         """Actualiza la lista de habitaciones en la interfaz"""
         if hasattr(self, 'lista_habitaciones'):
             self.lista_habitaciones.delete(0, 'end')
-            for habitacion in self.casa_actual.habitaciones:
-                self.lista_habitaciones.insert('end', str(habitacion))
+            habitaciones = self.casa_actual.habitaciones
+            if habitaciones:
+                # Mismo texto que Habitacion.__str__, con costos y formato por lotes
+                costos = formatear_precios(self.casa_actual.calcular_costos_lote())
+                self.lista_habitaciones.insert('end', *(
+                    f"{h.nombre} ({h.ancho}x{h.largo}m){f' ×{h.cantidad}' if h.cantidad > 1 else ''} - {costo}"
+                    for h, costo in zip(habitaciones, costos)))
 
+    @perfilado.medir()
     def actualizar_resumen(self):
-        """Actualiza el resumen del proyecto en la interfaz"""
+        """Actualiza el resumen del proyecto en la interfaz
+
+        Lee los subtotales en caché de la casa (Casa.obtener_subtotales), que
+        los comandos y los cambios externos ajustan por habitación: no
+        recorre todas las habitaciones en cada refresco.
+        """
         if hasattr(self, 'label_estadisticas'):
-            stats = self.casa_actual.obtener_estadisticas() if hasattr(self.casa_actual, 'obtener_estadisticas') else {}
+            stats = self.casa_actual.obtener_subtotales()
+            stats['costo_por_m2'] = stats['costo_total'] / stats['area_total'] if stats['area_total'] > 0 else 0
+            self.costo_total_casa = stats.get('costo_total', 0)
             texto = f"Habitaciones: {stats.get('cantidad_habitaciones', 0)}\nÁrea Total: {stats.get('area_total', 0):.1f} m²\nVolumen Total: {stats.get('volumen_total', 0):.1f} m³\nCosto Total: {formatear_precio(stats.get('costo_total', 0))}\nCosto por m²: {formatear_precio(stats.get('costo_por_m2', 0))}"
             self.label_estadisticas.config(text=texto)
+        self.actualizar_dashboard()
 
     def ejecutar(self):
         """Ejecuta la interfaz"""
@@ -691,7 +1049,18 @@ class InterfazPrincipal:
 
 # Función principal para ejecutar la interfaz
 def main():
+    perfilado.activar_desde_entorno()
+    error_catalogo = None
+    try:
+        catalogos.cargar_desde_entorno()
+    except catalogos.ERRORES_CATALOGO as error:
+        # Un catálogo externo dañado no impide abrir la aplicación
+        error_catalogo = error
     app = InterfazPrincipal()
+    if error_catalogo is not None:
+        messagebox.showwarning("Catálogo no cargado",
+                               f"No se pudo leer {catalogos.ruta_configurada()}:\n{error_catalogo}\n\n"
+                               "Se usa el catálogo incorporado.", parent=app.root)
     app.ejecutar()
 
 if __name__ == "__main__":
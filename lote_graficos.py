@@ -0,0 +1,169 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: lote_graficos.py
+Renderizado en paralelo de los gráficos de todas las casas (reportes mensuales)
+
+Cada casa produce tres imágenes: el Dashboard y los gráficos de eficiencia
+de pintura y costo-beneficio de GraficosIndividuales. Matplotlib no es
+seguro entre hilos y pyplot guarda estado global, así que las casas se
+reparten entre procesos y cada proceso dibuja con la API orientada a
+objetos (Figure + FigureCanvasAgg, sin pyplot) y escribe sus imágenes
+directamente: entre procesos solo viajan ids de casa y rutas de archivo.
+
+Los procesos se crean con el contexto spawn (no heredan la interfaz Tk ni
+conexiones abiertas) y cargan las casas desde la base por su cuenta.
+
+Uso:
+    python lote_graficos.py --salida reportes/2026-10
+    python lote_graficos.py --salida reportes --procesos 4 --casas 1 2 3
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import db
+
+FORMATO_POR_DEFECTO = "png"
+DPI_POR_DEFECTO = 100
+TAMANOS_FIGURA = {
+    "dashboard": (18, 10),
+    "eficiencia_pintura": (12, 6),
+    "costo_beneficio": (10, 8),
+}
+
+
+def cargar_casa(id_casa, nombre="Mi Casa"):
+    """Carga una casa con sus materiales desde la base (una consulta, sin interfaz)
+
+    Los materiales y sistemas se resuelven por nombre en el catálogo vigente
+    de datos.py, igual que al cargar la casa en la interfaz.
+    """
+    from clases import Casa, Habitacion
+    from datos import obtener_material_pared, obtener_material_piso, obtener_sistema_construccion
+
+    casa = Casa(nombre)
+    for id_hab, nombre_hab, ancho, largo, altura, version, piso, paredes, sistema, cantidad in \
+            db.obtener_habitaciones_con_materiales_por_casa(id_casa):
+        habitacion = Habitacion(nombre_hab, ancho, largo, altura)
+        habitacion.id = id_hab
+        habitacion.version = version
+        habitacion.cantidad = cantidad
+        habitacion.material_piso = obtener_material_piso(piso) if piso else None
+        habitacion.material_paredes = obtener_material_pared(paredes) if paredes else None
+        habitacion.sistema_construccion = obtener_sistema_construccion(sistema) if sistema else None
+        casa.agregar_habitacion(habitacion)
+    return casa
+
+
+def _iniciar_proceso(ruta_db):
+    # Se ejecuta una vez en cada proceso del grupo, antes de importar graficos
+    import matplotlib
+    matplotlib.use("Agg")
+    import catalogos
+    db.DB_PATH = ruta_db
+    catalogos.cargar_desde_entorno()
+
+
+def renderizar_casa(id_casa, nombre, directorio, formato=FORMATO_POR_DEFECTO, dpi=DPI_POR_DEFECTO):
+    """Dibuja y guarda las imágenes de una casa
+
+    Returns:
+        Rutas de las imágenes escritas (vacío si la casa no tiene habitaciones)
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from graficos import Dashboard, DatosPintura, GraficosIndividuales
+
+    casa = cargar_casa(id_casa, nombre)
+    if not casa.habitaciones:
+        return []
+
+    rutas = []
+
+    def guardar(clave, dibujar):
+        figura = Figure(figsize=TAMANOS_FIGURA[clave])
+        FigureCanvasAgg(figura)
+        dibujar(figura)
+        ruta = os.path.join(directorio, f"casa_{id_casa}_{clave}.{formato}")
+        figura.savefig(ruta, dpi=dpi)
+        rutas.append(ruta)
+
+    graficos = GraficosIndividuales(DatosPintura.desde_casa(casa))
+    guardar("dashboard", Dashboard(casa).dibujar)
+    guardar("eficiencia_pintura", graficos.grafico_eficiencia_pintura)
+    guardar("costo_beneficio", graficos.grafico_costo_beneficio)
+    return rutas
+
+
+def renderizar_lote(directorio, id_casas=None, procesos=None, formato=FORMATO_POR_DEFECTO,
+                    dpi=DPI_POR_DEFECTO):
+    """Renderiza las imágenes de varias casas repartidas en un grupo de procesos
+
+    Args:
+        directorio: Carpeta de salida (se crea si no existe)
+        id_casas: Casas a renderizar (por defecto todas las de la base)
+        procesos: Procesos del grupo (por defecto uno por núcleo)
+        formato: Formato de imagen de matplotlib (png, svg, pdf...)
+        dpi: Resolución de las imágenes
+
+    Returns:
+        Diccionario con casas, omitidas (sin habitaciones), imagenes,
+        segundos, imagenes_por_segundo, procesos y archivos
+    """
+    os.makedirs(directorio, exist_ok=True)
+    # Migración del esquema una sola vez, antes de que los procesos lean
+    # columnas nuevas (version, cantidad...) de una base anterior
+    db.crear_tablas()
+    casas = db.obtener_casas()
+    if id_casas is not None:
+        seleccion = set(id_casas)
+        casas = [casa for casa in casas if casa[0] in seleccion]
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(casas) or 1))
+
+    inicio = time.perf_counter()
+    archivos, omitidas = [], 0
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto, initializer=_iniciar_proceso,
+                             initargs=(os.path.abspath(db.DB_PATH),)) as ejecutor:
+        # Una tarea por casa: los procesos libres toman la siguiente, así
+        # las casas grandes no dejan a los demás esperando
+        futuros = [ejecutor.submit(renderizar_casa, id_casa, nombre, directorio, formato, dpi)
+                   for id_casa, nombre in casas]
+        for futuro in futuros:
+            rutas = futuro.result()
+            archivos.extend(rutas)
+            omitidas += not rutas
+    segundos = time.perf_counter() - inicio
+
+    return {
+        "casas": len(casas) - omitidas,
+        "omitidas": omitidas,
+        "imagenes": len(archivos),
+        "segundos": segundos,
+        "imagenes_por_segundo": len(archivos) / segundos if segundos > 0 else 0.0,
+        "procesos": procesos,
+        "archivos": archivos,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gráficos de todas las casas en paralelo")
+    parser.add_argument("--salida", required=True, help="Carpeta donde escribir las imágenes")
+    parser.add_argument("--casas", type=int, nargs="*", help="Ids de casa (por defecto todas)")
+    parser.add_argument("--procesos", type=int, help="Procesos (por defecto uno por núcleo)")
+    parser.add_argument("--formato", default=FORMATO_POR_DEFECTO)
+    parser.add_argument("--dpi", type=int, default=DPI_POR_DEFECTO)
+    args = parser.parse_args()
+
+    resultado = renderizar_lote(args.salida, args.casas, args.procesos, args.formato, args.dpi)
+    print(f"✅ {resultado['imagenes']} imágenes de {resultado['casas']} casas en {resultado['segundos']:.1f} s "
+          f"({resultado['imagenes_por_segundo']:.1f} imágenes/s, {resultado['procesos']} procesos)")
+    if resultado["omitidas"]:
+        print(f"   {resultado['omitidas']} casas sin habitaciones omitidas")
+
+
+if __name__ == "__main__":
+    main()
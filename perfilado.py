@@ -0,0 +1,225 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: perfilado.py
+Instrumentación de rendimiento: tiempos por función y contadores de SQLite
+
+Se activa con la variable de entorno CONSTRUCCION_PERFILADO=1 o desde el
+menú Herramientas de la interfaz. Mientras está apagado no hay envoltorios
+instalados sobre db/clases, así que su costo es nulo; los callbacks de la
+interfaz usan el decorador medir(), que solo consulta una bandera.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+VARIABLE_ENTORNO = "CONSTRUCCION_PERFILADO"
+VARIABLE_SALIDA = "CONSTRUCCION_PERFILADO_SALIDA"
+MAX_EVENTOS = 200_000  # Límite de eventos guardados para la traza Chrome
+
+ACTIVO = False
+
+_estadisticas = {}  # nombre -> [llamadas, tiempo_total, tiempo_maximo]
+_eventos = []
+_contadores = {"conexiones": 0, "sentencias_sql": 0, "commits": 0}
+_originales = []  # (objeto, atributo, valor original) para desinstalar
+_inicio = time.perf_counter()
+
+# Métodos de cálculo instrumentados al activar
+METODOS_HABITACION = [
+    "calcular_area_piso", "calcular_area_paredes", "calcular_volumen",
+    "calcular_costo_piso", "calcular_costo_paredes", "calcular_costo_total",
+    "obtener_resumen",
+]
+METODOS_CASA = [
+    "calcular_area_total", "calcular_volumen_total", "calcular_costo_total",
+    "calcular_costo_por_m2", "obtener_estadisticas", "obtener_resumen_completo",
+]
+
+
+def _registrar(nombre, inicio, duracion):
+    """Acumula una medición y, si hay espacio, la agrega a la traza"""
+    estadistica = _estadisticas.get(nombre)
+    if estadistica is None:
+        _estadisticas[nombre] = [1, duracion, duracion]
+    else:
+        estadistica[0] += 1
+        estadistica[1] += duracion
+        if duracion > estadistica[2]:
+            estadistica[2] = duracion
+    if len(_eventos) < MAX_EVENTOS:
+        _eventos.append((nombre, inicio, duracion, threading.get_ident()))
+
+
+def _envolver(nombre, funcion):
+    @functools.wraps(funcion)
+    def envoltorio(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            _registrar(nombre, inicio, time.perf_counter() - inicio)
+    envoltorio.__perfilado_original__ = funcion
+    return envoltorio
+
+
+def medir(nombre=None):
+    """Decorador para callbacks: mide la llamada solo si el perfilado está activo.
+
+    Args:
+        nombre: Nombre a registrar (por defecto el nombre calificado de la función)
+    """
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltorio(*args, **kwargs):
+            if not ACTIVO:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                _registrar(etiqueta, inicio, time.perf_counter() - inicio)
+        return envoltorio
+    return decorador
+
+
+class bloque:
+    """Context manager para medir un bloque de código arbitrario"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ACTIVO:
+            _registrar(self.nombre, self.inicio, time.perf_counter() - self.inicio)
+        return False
+
+
+def _rastrear_sentencia(sql):
+    """Callback de sqlite3.set_trace_callback"""
+    comando = sql.lstrip()[:8].upper()
+    if comando.startswith("COMMIT"):
+        _contadores["commits"] += 1
+    elif not comando.startswith(("BEGIN", "ROLLBACK")):
+        _contadores["sentencias_sql"] += 1
+
+
+def _envolver_conexion(get_db_connection):
+    @functools.wraps(get_db_connection)
+    def envoltorio(*args, **kwargs):
+        conn = get_db_connection(*args, **kwargs)
+        _contadores["conexiones"] += 1
+        conn.set_trace_callback(_rastrear_sentencia)
+        return conn
+    envoltorio.__perfilado_original__ = get_db_connection
+    return envoltorio
+
+
+def _instalar(objeto, atributo, envoltorio):
+    _originales.append((objeto, atributo, objeto.__dict__[atributo]))
+    setattr(objeto, atributo, envoltorio)
+
+
+def activar():
+    """Instala los envoltorios sobre db, Casa y Habitacion"""
+    global ACTIVO
+    if ACTIVO:
+        return
+    import db
+    from clases import Casa, Habitacion
+
+    _instalar(db, "get_db_connection", _envolver_conexion(db.get_db_connection))
+    for nombre, valor in list(vars(db).items()):
+        if (callable(valor) and not nombre.startswith("_") and nombre != "get_db_connection"
+                and getattr(valor, "__module__", None) == db.__name__):
+            _instalar(db, nombre, _envolver(f"db.{nombre}", valor))
+    for clase, metodos in ((Habitacion, METODOS_HABITACION), (Casa, METODOS_CASA)):
+        for metodo in metodos:
+            _instalar(clase, metodo, _envolver(f"{clase.__name__}.{metodo}", clase.__dict__[metodo]))
+    ACTIVO = True
+
+
+def desactivar():
+    """Restaura las funciones originales; las estadísticas se conservan"""
+    global ACTIVO
+    while _originales:
+        objeto, atributo, original = _originales.pop()
+        setattr(objeto, atributo, original)
+    ACTIVO = False
+
+
+def reiniciar():
+    """Borra estadísticas, eventos y contadores"""
+    global _inicio
+    _estadisticas.clear()
+    _eventos.clear()
+    for clave in _contadores:
+        _contadores[clave] = 0
+    _inicio = time.perf_counter()
+
+
+def obtener_estadisticas():
+    """Devuelve las estadísticas ordenadas por tiempo total descendente"""
+    filas = [
+        {
+            "nombre": nombre,
+            "llamadas": llamadas,
+            "total_ms": total * 1000,
+            "promedio_ms": total * 1000 / llamadas,
+            "max_ms": maximo * 1000,
+        }
+        for nombre, (llamadas, total, maximo) in _estadisticas.items()
+    ]
+    filas.sort(key=lambda f: f["total_ms"], reverse=True)
+    return filas
+
+
+def obtener_contadores():
+    """Devuelve una copia de los contadores de conexiones, sentencias y commits"""
+    return dict(_contadores)
+
+
+def exportar_json(ruta):
+    """Exporta estadísticas y contadores a un archivo JSON"""
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({"funciones": obtener_estadisticas(), "contadores": obtener_contadores()},
+                  archivo, indent=2, ensure_ascii=False)
+
+
+def exportar_traza_chrome(ruta):
+    """Exporta los eventos en formato Chrome trace (chrome://tracing, Perfetto)"""
+    pid = os.getpid()
+    eventos = [
+        {"name": nombre, "cat": nombre.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+         "ts": (inicio - _inicio) * 1e6, "dur": duracion * 1e6}
+        for nombre, inicio, duracion, tid in _eventos
+    ]
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({"traceEvents": eventos, "otherData": obtener_contadores()}, archivo)
+
+
+def activar_desde_entorno():
+    """Activa el perfilado si CONSTRUCCION_PERFILADO está definida.
+
+    Si además se define CONSTRUCCION_PERFILADO_SALIDA, al salir se escribe la
+    traza Chrome en esa ruta y las estadísticas en la misma ruta con .stats.json.
+    """
+    if os.environ.get(VARIABLE_ENTORNO, "") not in ("", "0"):
+        activar()
+        salida = os.environ.get(VARIABLE_SALIDA)
+        if salida:
+            import atexit
+
+            def exportar_al_salir():
+                exportar_traza_chrome(salida)
+                exportar_json(os.path.splitext(salida)[0] + ".stats.json")
+            atexit.register(exportar_al_salir)
+    return ACTIVO
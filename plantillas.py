@@ -0,0 +1,222 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: plantillas.py
+Casas completas a partir de plantillas y barrido paramétrico de variantes
+
+Una plantilla (datos.PLANTILLAS_CASA) es una lista de tipos de habitación
+(datos.TIPOS_HABITACION) más una especificación de materiales; un nivel de
+acabado (datos.NIVELES_ACABADO) reemplaza esa especificación. crear_casa()
+arma la Casa y guardar_casas() persiste muchas en una sola transacción.
+
+barrido_parametrico() explora miles de variantes (escala de la planta,
+nivel de acabado, sistema) sin construir una Casa por variante: como escalar
+la planta por k multiplica el piso por k² y las paredes por k, el costo de
+cada variante sale de dos sumas precalculadas por plantilla y nivel.
+"""
+
+import numpy as np
+
+import db
+import geometria
+from clases import Casa, Habitacion
+from datos import (
+    NIVELES_ACABADO,
+    PLANTILLAS_CASA,
+    obtener_dimensiones_tipo,
+    obtener_material_pared,
+    obtener_material_piso,
+    obtener_sistema_construccion,
+)
+
+ESCALAS_POR_DEFECTO = np.round(np.arange(0.80, 1.2001, 0.01), 2)
+
+
+def _especificacion(nombre_plantilla, nivel=None):
+    plantilla = PLANTILLAS_CASA.get(nombre_plantilla)
+    if plantilla is None:
+        raise ValueError(f"Plantilla de casa desconocida: {nombre_plantilla}")
+    if nivel is None:
+        return plantilla, plantilla["materiales"]
+    if nivel not in NIVELES_ACABADO:
+        raise ValueError(f"Nivel de acabado desconocido: {nivel}")
+    return plantilla, NIVELES_ACABADO[nivel]
+
+
+def nombres_habitaciones(tipos):
+    """Nombre de cada habitación: el tipo, numerado si el tipo se repite"""
+    totales, vistos, nombres = {}, {}, []
+    for tipo in tipos:
+        totales[tipo] = totales.get(tipo, 0) + 1
+    for tipo in tipos:
+        vistos[tipo] = vistos.get(tipo, 0) + 1
+        nombres.append(f"{tipo} {vistos[tipo]}" if totales[tipo] > 1 else tipo)
+    return nombres
+
+
+def materiales_tipo(especificacion, tipo):
+    """(piso, paredes, sistema) por nombre para un tipo de habitación"""
+    reemplazo = especificacion.get("por_tipo", {}).get(tipo, {})
+    return (reemplazo.get("piso", especificacion.get("piso")),
+            reemplazo.get("paredes", especificacion.get("paredes")),
+            reemplazo.get("sistema", especificacion.get("sistema")))
+
+
+def crear_casa(nombre_plantilla, nombre=None, escala=1.0, nivel=None, sistema=None, unidades=1):
+    """Crea una Casa con las habitaciones y materiales de una plantilla
+
+    Args:
+        nombre_plantilla: Clave de datos.PLANTILLAS_CASA
+        nombre: Nombre de la casa (por defecto el de la plantilla)
+        escala: Factor sobre ancho y largo de cada habitación (la altura no cambia)
+        nivel: Nivel de acabado (datos.NIVELES_ACABADO) en lugar de los
+            materiales de la plantilla
+        sistema: Sistema de construcción para todas las habitaciones
+        unidades: Copias idénticas de la plantilla (p. ej. apartamentos de
+            una torre); cada habitación queda con esa cantidad
+
+    Returns:
+        Casa
+    """
+    plantilla, especificacion = _especificacion(nombre_plantilla, nivel)
+    casa = Casa(nombre or nombre_plantilla)
+    tipos = plantilla["habitaciones"]
+    for tipo, nombre_habitacion in zip(tipos, nombres_habitaciones(tipos)):
+        dimensiones = obtener_dimensiones_tipo(tipo)
+        habitacion = Habitacion(nombre_habitacion, dimensiones["ancho"] * escala, dimensiones["largo"] * escala,
+                                dimensiones["altura"])
+        habitacion.cantidad = unidades
+        piso, paredes, sistema_tipo = materiales_tipo(especificacion, tipo)
+        habitacion.asignar_material_piso(obtener_material_piso(piso))
+        habitacion.asignar_material_paredes(obtener_material_pared(paredes))
+        habitacion.asignar_sistema_construccion(obtener_sistema_construccion(sistema or sistema_tipo))
+        casa.agregar_habitacion(habitacion)
+    return casa
+
+
+def guardar_casas(casas):
+    """Persiste casas nuevas con una inserción en bloque (db.guardar_casas_completas)
+
+    Returns:
+        Ids de las casas en el mismo orden
+    """
+    filas, materiales, sistemas = filas_casas(casas)
+    ids = db.guardar_casas_completas(filas, materiales, sistemas)
+    for casa, id_casa in zip(casas, ids):
+        casa.id = id_casa
+    return ids
+
+
+def filas_casas(casas):
+    """Filas de db.guardar_casas_completas para casas en memoria
+
+    Returns:
+        (filas, materiales, sistemas)
+    """
+    materiales, sistemas, filas = {}, {}, []
+    for casa in casas:
+        habitaciones = []
+        for h in casa.habitaciones:
+            for material in (h.material_piso, h.material_paredes):
+                if material is not None:
+                    materiales[material.nombre] = (material.nombre, material.precio_m2, material.tipo)
+            s = h.sistema_construccion
+            if s is not None:
+                sistemas[s.nombre] = (s.nombre, s.factor_costo, s.descripcion)
+            habitaciones.append((h.nombre, h.ancho, h.largo, h.altura,
+                                 h.material_piso.nombre if h.material_piso else None,
+                                 h.material_paredes.nombre if h.material_paredes else None,
+                                 s.nombre if s else None, h.cantidad))
+        filas.append((casa.nombre, casa.fecha_creacion, casa.observaciones, habitaciones))
+    return filas, list(materiales.values()), list(sistemas.values())
+
+
+# =============================================================================
+# BARRIDO PARAMÉTRICO
+# =============================================================================
+
+def _sumas_plantilla(nombre_plantilla, nivel):
+    """Sumas de la plantilla sin escalar para un nivel
+
+    Returns:
+        Diccionario con area (piso total), y por sistema fijo o no:
+        piso, paredes (Σ área * precio, sin factor) y piso_factor,
+        paredes_factor (con el factor de cada habitación)
+    """
+    plantilla, especificacion = _especificacion(nombre_plantilla, nivel)
+    tipos = plantilla["habitaciones"]
+    dimensiones = [obtener_dimensiones_tipo(tipo) for tipo in tipos]
+    n = len(tipos)
+    arreglos = geometria.evaluar_rectangulos(np.fromiter((d["ancho"] for d in dimensiones), float, n),
+                                             np.fromiter((d["largo"] for d in dimensiones), float, n),
+                                             np.fromiter((d["altura"] for d in dimensiones), float, n))
+    precio_piso, precio_paredes, factor = np.zeros(n), np.zeros(n), np.ones(n)
+    for i, tipo in enumerate(tipos):
+        piso, paredes, sistema = materiales_tipo(especificacion, tipo)
+        piso, paredes, sistema = (obtener_material_piso(piso), obtener_material_pared(paredes),
+                                  obtener_sistema_construccion(sistema))
+        precio_piso[i] = piso.precio_m2 if piso else 0.0
+        precio_paredes[i] = paredes.precio_m2 if paredes else 0.0
+        factor[i] = sistema.factor_costo if sistema else 1.0
+    costo_piso = arreglos["area_piso"] * precio_piso
+    costo_paredes = arreglos["area_paredes"] * precio_paredes
+    return {
+        "area": arreglos["area_piso"].sum(),
+        "piso": costo_piso.sum(),
+        "paredes": costo_paredes.sum(),
+        "piso_factor": costo_piso @ factor,
+        "paredes_factor": costo_paredes @ factor,
+    }
+
+
+def barrido_parametrico(plantillas=None, escalas=None, niveles=None, sistemas=None):
+    """Costo de todas las combinaciones de plantilla, escala, nivel y sistema
+
+    Args:
+        plantillas: Nombres de plantillas (por defecto todas)
+        escalas: Factores sobre ancho y largo (por defecto 0.80 a 1.20 cada 0.01)
+        niveles: Niveles de acabado (por defecto todos); None dentro de la
+            lista usa los materiales de la plantilla
+        sistemas: Sistemas para todas las habitaciones (por defecto solo
+            None: el sistema de la plantilla o del nivel)
+
+    Returns:
+        Diccionario de arreglos, uno por variante: plantilla, escala, nivel,
+        sistema, area, costo y costo_m2. crear_variante() arma la Casa de
+        cualquiera de ellas
+    """
+    plantillas = list(PLANTILLAS_CASA) if plantillas is None else list(plantillas)
+    escalas = ESCALAS_POR_DEFECTO if escalas is None else np.asarray(escalas, dtype=float)
+    niveles = list(NIVELES_ACABADO) if niveles is None else list(niveles)
+    sistemas = [None] if sistemas is None else list(sistemas)
+    factores = np.array([obtener_sistema_construccion(s).factor_costo if s else np.nan for s in sistemas])
+
+    # Una fila por (plantilla, nivel) y una columna por sistema; las escalas se difunden
+    combinaciones = [(p, n) for p in plantillas for n in niveles]
+    sumas = [_sumas_plantilla(p, n) for p, n in combinaciones]
+    area = np.array([s["area"] for s in sumas])
+    piso = np.array([[s["piso_factor"] if np.isnan(f) else s["piso"] * f for f in factores] for s in sumas])
+    paredes = np.array([[s["paredes_factor"] if np.isnan(f) else s["paredes"] * f for f in factores]
+                        for s in sumas])
+
+    # Forma (combinación, sistema, escala): piso * k² + paredes * k
+    costo = piso[:, :, None] * escalas ** 2 + paredes[:, :, None] * escalas
+    area = np.broadcast_to(area[:, None, None] * escalas ** 2, costo.shape)
+    forma = costo.shape
+    indice_combinacion, indice_sistema, indice_escala = np.indices(forma).reshape(3, -1)
+    return {
+        "plantilla": np.array([p for p, _ in combinaciones], dtype=object)[indice_combinacion],
+        "nivel": np.array([n for _, n in combinaciones], dtype=object)[indice_combinacion],
+        "sistema": np.array(sistemas, dtype=object)[indice_sistema],
+        "escala": escalas[indice_escala],
+        "area": area.ravel(),
+        "costo": costo.ravel(),
+        "costo_m2": costo.ravel() / area.ravel(),
+    }
+
+
+def crear_variante(resultado, indice, nombre=None):
+    """Casa de la variante en la posición indicada de barrido_parametrico()"""
+    plantilla = resultado["plantilla"][indice]
+    escala = float(resultado["escala"][indice])
+    return crear_casa(plantilla, nombre or f"{plantilla} x{escala:.2f}", escala,
+                      resultado["nivel"][indice], resultado["sistema"][indice])
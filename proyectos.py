@@ -0,0 +1,111 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: proyectos.py
+Proyectos jerárquicos: proyecto → edificio → piso → unidad (Casa) → habitación
+
+clases.NodoProyecto guarda en cada nivel la suma de sus hijos; cambiar una
+habitación ajusta solo el camino hasta la raíz, así que el total de una
+torre no se vuelve a sumar. En la base, nodo_proyecto guarda la estructura
+(id_padre) y casa.id_nodo cuelga cada unidad de su piso; los costos no se
+guardan porque dependen del catálogo vigente.
+
+Uso:
+    proyecto = NodoProyecto("Ciudadela Norte")
+    crear_edificio("Torre 1", pisos=20, unidades_por_piso=8,
+                   plantilla="Apartamento 2 alcobas", proyecto=proyecto)
+    guardar_proyecto(proyecto)
+    proyecto.obtener_subtotales()
+"""
+
+import db
+import plantillas
+from clases import Casa, Habitacion, NodoProyecto
+from datos import obtener_material_pared, obtener_material_piso, obtener_sistema_construccion
+
+
+def crear_edificio(nombre, pisos, unidades_por_piso, plantilla, proyecto=None, **opciones):
+    """Edificio de pisos iguales con unidades creadas desde una plantilla
+
+    Args:
+        nombre: Nombre del edificio
+        pisos: Número de pisos
+        unidades_por_piso: Unidades (casas) por piso
+        plantilla: Clave de datos.PLANTILLAS_CASA de cada unidad
+        proyecto: NodoProyecto al que se agrega el edificio (opcional)
+        **opciones: escala, nivel o sistema para plantillas.crear_casa
+
+    Returns:
+        NodoProyecto del edificio
+    """
+    edificio = NodoProyecto(nombre, "edificio")
+    for numero_piso in range(1, pisos + 1):
+        piso = edificio.agregar_hijo(NodoProyecto(f"Piso {numero_piso}", "piso"))
+        for numero_unidad in range(1, unidades_por_piso + 1):
+            piso.agregar_hijo(plantillas.crear_casa(plantilla, f"Apto {numero_piso}{numero_unidad:02d}", **opciones))
+    if proyecto is not None:
+        proyecto.agregar_hijo(edificio)
+    return edificio
+
+
+def guardar_proyecto(raiz):
+    """Guarda un proyecto nuevo (nodos, casas y habitaciones) en una transacción
+
+    Asigna el id de la base a cada nodo y casa.
+
+    Returns:
+        Id del nodo raíz
+    """
+    nodos, casas, posiciones = [], [], {}
+    for nodo in raiz.recorrer():
+        indice_padre = None if nodo is raiz else posiciones[id(nodo.padre)]
+        if isinstance(nodo, Casa):
+            casas.append((nodo, indice_padre))
+        else:
+            posiciones[id(nodo)] = len(nodos)
+            nodos.append((nodo.nombre, nodo.nivel, indice_padre))
+    filas, materiales, sistemas = plantillas.filas_casas([casa for casa, _ in casas])
+    filas = [fila + (indice,) for fila, (_, indice) in zip(filas, casas)]
+    ids_nodos, ids_casas = db.guardar_proyecto_completo(nodos, filas, materiales, sistemas)
+    for nodo, id_nodo in zip((n for n in raiz.recorrer() if not isinstance(n, Casa)), ids_nodos):
+        nodo.id = id_nodo
+    for (casa, _), id_casa in zip(casas, ids_casas):
+        casa.id = id_casa
+    return raiz.id
+
+
+def cargar_proyecto(id_nodo):
+    """Carga un nodo con todo su subárbol (db.obtener_arbol_proyecto, tres consultas)
+
+    Los materiales y sistemas se resuelven por nombre en el catálogo vigente.
+
+    Returns:
+        NodoProyecto, o None si el nodo no existe
+    """
+    filas_nodos, filas_casas, filas_habitaciones = db.obtener_arbol_proyecto(id_nodo)
+    if not filas_nodos:
+        return None
+    nodos = {}
+    for id_fila, id_padre, nivel, nombre in filas_nodos:
+        nodo = NodoProyecto(nombre, nivel)
+        nodo.id = id_fila
+        nodos[id_fila] = nodo
+        if id_fila != id_nodo:
+            nodos[id_padre].agregar_hijo(nodo)
+
+    casas = {}
+    for id_casa, nombre, _ in filas_casas:
+        casas[id_casa] = Casa(nombre)
+        casas[id_casa].id = id_casa
+    for id_casa, id_hab, nombre, ancho, largo, altura, version, piso, paredes, sistema, cantidad in filas_habitaciones:
+        habitacion = Habitacion(nombre, ancho, largo, altura)
+        habitacion.id = id_hab
+        habitacion.version = version
+        habitacion.cantidad = cantidad
+        habitacion.material_piso = obtener_material_piso(piso) if piso else None
+        habitacion.material_paredes = obtener_material_pared(paredes) if paredes else None
+        habitacion.sistema_construccion = obtener_sistema_construccion(sistema) if sistema else None
+        casas[id_casa].agregar_habitacion(habitacion)
+    # Las casas se cuelgan ya completas: un solo cálculo vectorizado por casa
+    for id_casa, _, id_padre in filas_casas:
+        nodos[id_padre].agregar_hijo(casas[id_casa])
+    return nodos[id_nodo]
@@ -0,0 +1,434 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: servicio.py
+Servicio HTTP/JSON local de cotizaciones
+
+Recibe la especificación de una casa (habitaciones, dimensiones y nombres
+de materiales del catálogo) y responde con Casa.obtener_resumen_completo()
+más los totales con IVA, administración y utilidad.
+
+Endpoints:
+- POST /cotizar        una especificación -> una cotización
+- POST /cotizar/lote   {"casas": [especificación, ...]} -> {"cotizaciones": [...]}
+- GET  /catalogo       nombres de materiales, sistemas y tipos de habitación
+- GET  /salud          estado, versión del catálogo y estadísticas del caché
+
+Las respuestas se guardan ya serializadas en un caché LRU cuya clave es un
+hash SHA-256 de la especificación normalizada, la versión del catálogo y la
+configuración vigente: un cambio de precios invalida las entradas viejas.
+
+Especificación:
+
+    {"nombre": "Casa Norte",
+     "habitaciones": [
+        {"nombre": "Sala", "ancho": 4, "largo": 5, "altura": 2.5,
+         "material_piso": "Porcelanato Básico", "material_paredes": "Pintura Premium",
+         "sistema_construccion": "Mampostería Tradicional",
+         "aberturas": [{"ancho": 0.9, "alto": 2.1, "tipo": "puerta"}]},
+        {"nombre": "Baño", "tipo": "Baño Social", "cantidad": 2}]}
+
+Uso: python servicio.py --puerto 8765
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import catalogos
+from clases import Casa, Habitacion
+from geometria import Abertura
+from datos import (
+    CONFIGURACION,
+    TIPOS_HABITACION,
+    calcular_precio_con_impuestos,
+    listar_nombres_materiales_pared,
+    listar_nombres_materiales_piso,
+    listar_nombres_sistemas,
+    listar_tipos_habitacion,
+    obtener_dimensiones_tipo,
+    obtener_material_pared,
+    obtener_material_piso,
+    obtener_sistema_construccion,
+)
+from impuestos import aplicar_impuestos_portafolio
+
+HOST_POR_DEFECTO = "127.0.0.1"
+PUERTO_POR_DEFECTO = 8765
+CAPACIDAD_CACHE = 1024
+MAXIMO_CUERPO = 10 * 1024 * 1024
+
+
+class ErrorEspecificacion(ValueError):
+    """La especificación recibida no es válida"""
+
+
+class CuerpoDemasiadoGrande(ErrorEspecificacion):
+    """El cuerpo de la petición supera MAXIMO_CUERPO"""
+
+
+# =============================================================================
+# ESPECIFICACIONES
+# =============================================================================
+
+def _numero(valor, campo, positivo=True):
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ErrorEspecificacion(f"'{campo}' debe ser numérico") from None
+    if not math.isfinite(numero):
+        raise ErrorEspecificacion(f"'{campo}' debe ser un número finito")
+    if positivo and numero <= 0:
+        raise ErrorEspecificacion(f"'{campo}' debe ser mayor que cero")
+    return numero
+
+
+def _entero(valor, campo):
+    numero = _numero(valor, campo)
+    if isinstance(valor, bool) or not numero.is_integer():
+        raise ErrorEspecificacion(f"'{campo}' debe ser un entero positivo")
+    return int(numero)
+
+
+def _nombre_catalogo(valor, existe, campo):
+    if valor is None:
+        return None
+    if not existe(valor):
+        raise ErrorEspecificacion(f"'{campo}' desconocido: {valor}")
+    return valor
+
+
+def _normalizar_habitacion(espec, indice):
+    if not isinstance(espec, dict):
+        raise ErrorEspecificacion(f"La habitación {indice} debe ser un objeto")
+    nombre = str(espec.get("nombre") or f"Habitación {indice + 1}")
+    dimensiones = {}
+    if espec.get("tipo") is not None:
+        # obtener_dimensiones_tipo devuelve 3x3 para un tipo que no existe
+        if espec["tipo"] not in TIPOS_HABITACION:
+            raise ErrorEspecificacion(f"'tipo' desconocido: {espec['tipo']}")
+        dimensiones = obtener_dimensiones_tipo(espec["tipo"])
+    habitacion = {"nombre": nombre}
+    for campo in ("ancho", "largo", "altura"):
+        valor = espec.get(campo, dimensiones.get(campo, 2.5 if campo == "altura" else None))
+        if valor is None:
+            raise ErrorEspecificacion(f"Falta '{campo}' en '{nombre}'")
+        habitacion[campo] = _numero(valor, campo)
+    habitacion["cantidad"] = _entero(espec.get("cantidad", 1), "cantidad")
+    habitacion["altura_maxima"] = (_numero(espec["altura_maxima"], "altura_maxima")
+                                   if espec.get("altura_maxima") is not None else None)
+    vertices = espec.get("vertices")
+    if vertices is not None:
+        try:
+            habitacion["vertices"] = [[float(x), float(y)] for x, y in vertices]
+        except (TypeError, ValueError):
+            raise ErrorEspecificacion(f"'vertices' inválidos en '{nombre}'") from None
+        if len(habitacion["vertices"]) < 3:
+            raise ErrorEspecificacion(f"'vertices' de '{nombre}' necesita al menos 3 puntos")
+    else:
+        habitacion["vertices"] = None
+    aberturas = espec.get("aberturas") or []
+    if not isinstance(aberturas, list) or not all(isinstance(a, dict) for a in aberturas):
+        raise ErrorEspecificacion(f"'aberturas' de '{nombre}' debe ser una lista de objetos")
+    habitacion["aberturas"] = [
+        {"ancho": _numero(a.get("ancho"), "ancho"), "alto": _numero(a.get("alto"), "alto"),
+         "cantidad": _entero(a.get("cantidad", 1), "cantidad"), "tipo": str(a.get("tipo", "ventana"))}
+        for a in aberturas
+    ]
+    habitacion["material_piso"] = _nombre_catalogo(espec.get("material_piso"), obtener_material_piso, "material_piso")
+    habitacion["material_paredes"] = _nombre_catalogo(espec.get("material_paredes"), obtener_material_pared,
+                                                      "material_paredes")
+    habitacion["sistema_construccion"] = _nombre_catalogo(espec.get("sistema_construccion"),
+                                                          obtener_sistema_construccion, "sistema_construccion")
+    return habitacion
+
+
+def normalizar_especificacion(espec):
+    """Valida la especificación y la lleva a una forma canónica (tipos y valores por defecto)
+
+    Dos especificaciones equivalentes (4 frente a 4.0, claves en otro orden,
+    dimensiones tomadas de un tipo) producen la misma forma normalizada.
+
+    Raises:
+        ErrorEspecificacion: Si falta un dato, un nombre no está en el catálogo o
+            dos habitaciones tienen el mismo nombre
+    """
+    if not isinstance(espec, dict):
+        raise ErrorEspecificacion("La especificación debe ser un objeto JSON")
+    habitaciones = espec.get("habitaciones")
+    if not isinstance(habitaciones, list):
+        raise ErrorEspecificacion("'habitaciones' debe ser una lista")
+    normalizadas = [_normalizar_habitacion(h, i) for i, h in enumerate(habitaciones)]
+    nombres = set()
+    for habitacion in normalizadas:
+        if habitacion["nombre"] in nombres:
+            raise ErrorEspecificacion(f"Habitación repetida: '{habitacion['nombre']}'")
+        nombres.add(habitacion["nombre"])
+    return {
+        "nombre": str(espec.get("nombre") or "Mi Casa"),
+        "habitaciones": normalizadas,
+    }
+
+
+def construir_casa(normalizada):
+    """Crea la Casa a partir de una especificación normalizada"""
+    casa = Casa(normalizada["nombre"])
+    for espec in normalizada["habitaciones"]:
+        habitacion = Habitacion(espec["nombre"], espec["ancho"], espec["largo"], espec["altura"])
+        habitacion.altura_maxima = espec["altura_maxima"]
+        habitacion.cantidad = espec["cantidad"]
+        if espec["vertices"] is not None:
+            habitacion.asignar_planta([tuple(v) for v in espec["vertices"]])
+        for abertura in espec["aberturas"]:
+            habitacion.agregar_abertura(Abertura(abertura["ancho"], abertura["alto"], abertura["cantidad"],
+                                                 abertura["tipo"]))
+        if espec["material_piso"]:
+            habitacion.material_piso = obtener_material_piso(espec["material_piso"])
+        if espec["material_paredes"]:
+            habitacion.material_paredes = obtener_material_pared(espec["material_paredes"])
+        if espec["sistema_construccion"]:
+            habitacion.sistema_construccion = obtener_sistema_construccion(espec["sistema_construccion"])
+        casa.agregar_habitacion(habitacion)
+    return casa
+
+
+def clave_cache(normalizada):
+    """Hash canónico de la especificación, la versión del catálogo y la configuración"""
+    canonica = json.dumps([normalizada, catalogos.version_catalogo, CONFIGURACION],
+                          sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonica.encode("utf-8")).hexdigest()
+
+
+def cotizar_casas(normalizadas):
+    """Cotiza varias casas; los impuestos se aplican a todas en una sola pasada
+
+    Returns:
+        Lista de diccionarios (resumen, impuestos, precio_con_impuestos,
+        version_catalogo), uno por casa
+    """
+    casas = [construir_casa(n) for n in normalizadas]
+    impuestos = aplicar_impuestos_portafolio(casas)
+    cotizaciones = []
+    for casa, liquidacion in zip(casas, impuestos):
+        resumen = casa.obtener_resumen_completo()
+        cotizaciones.append({
+            "resumen": resumen,
+            "impuestos": liquidacion["totales"],
+            "precio_con_impuestos": calcular_precio_con_impuestos(resumen["estadisticas"]["costo_total"]),
+            "version_catalogo": catalogos.version_catalogo,
+        })
+    return cotizaciones
+
+
+# =============================================================================
+# CACHÉ
+# =============================================================================
+
+class CacheRespuestas:
+    """Caché LRU de respuestas ya serializadas (bytes), seguro entre hilos"""
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self._bloqueo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._bloqueo:
+            valor = self._entradas.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        with self._bloqueo:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._bloqueo:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._bloqueo:
+            return {"entradas": len(self._entradas), "capacidad": self.capacidad,
+                    "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+def _serializar(objeto):
+    return json.dumps(objeto, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def cotizar_con_cache(especificaciones, cache):
+    """Cotiza una lista de especificaciones reutilizando las respuestas en caché
+
+    Returns:
+        Lista de respuestas JSON (bytes) en el mismo orden
+    """
+    normalizadas = [normalizar_especificacion(e) for e in especificaciones]
+    claves = [clave_cache(n) for n in normalizadas]
+    respuestas = [cache.obtener(c) for c in claves]
+    # Las que faltan se calculan juntas, una vez por clave distinta
+    pendientes = {}
+    for i, respuesta in enumerate(respuestas):
+        if respuesta is None:
+            pendientes.setdefault(claves[i], normalizadas[i])
+    if pendientes:
+        for clave, cotizacion in zip(list(pendientes), cotizar_casas(list(pendientes.values()))):
+            pendientes[clave] = _serializar(cotizacion)
+            cache.guardar(clave, pendientes[clave])
+        respuestas = [r if r is not None else pendientes[c] for r, c in zip(respuestas, claves)]
+    return respuestas
+
+
+# =============================================================================
+# SERVIDOR HTTP
+# =============================================================================
+
+class ManejadorCotizacion(BaseHTTPRequestHandler):
+    """Atiende las peticiones; el caché vive en el servidor"""
+
+    protocol_version = "HTTP/1.1"  # Conexiones persistentes
+    disable_nagle_algorithm = True  # Encabezados y cuerpo van en escrituras separadas
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_peticiones:
+            super().log_message(formato, *args)
+
+    def _responder(self, estado, cuerpo):
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _error(self, estado, mensaje):
+        self._responder(estado, _serializar({"error": mensaje}))
+
+    def _leer_json(self):
+        # El cuerpo no se lee si el largo es inválido o excesivo; la conexión
+        # se cierra para no interpretar sus bytes como otra petición
+        try:
+            largo = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            largo = -1
+        if largo < 0:
+            self.close_connection = True
+            raise ErrorEspecificacion("Content-Length inválido")
+        if largo > MAXIMO_CUERPO:
+            self.close_connection = True
+            raise CuerpoDemasiadoGrande(f"Cuerpo demasiado grande (máximo {MAXIMO_CUERPO} bytes)")
+        try:
+            return json.loads(self.rfile.read(largo) or b"null")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise ErrorEspecificacion("JSON inválido") from None
+
+    def do_GET(self):
+        if self.path == "/salud":
+            self._responder(200, _serializar({"estado": "ok", "version_catalogo": catalogos.version_catalogo,
+                                              "cache": self.server.cache.estadisticas()}))
+        elif self.path == "/catalogo":
+            self._responder(200, _serializar({
+                "materiales_piso": listar_nombres_materiales_piso(),
+                "materiales_pared": listar_nombres_materiales_pared(),
+                "sistemas_construccion": listar_nombres_sistemas(),
+                "tipos_habitacion": listar_tipos_habitacion(),
+            }))
+        else:
+            self._error(404, f"Ruta desconocida: {self.path}")
+
+    def do_POST(self):
+        try:
+            if self.path == "/cotizar":
+                cuerpo = cotizar_con_cache([self._leer_json()], self.server.cache)[0]
+            elif self.path == "/cotizar/lote":
+                datos = self._leer_json()
+                if not isinstance(datos, dict) or not isinstance(datos.get("casas"), list):
+                    raise ErrorEspecificacion("Se esperaba {\"casas\": [...]}")
+                cuerpo = b'{"cotizaciones":[' + b",".join(cotizar_con_cache(datos["casas"], self.server.cache)) + b"]}"
+            else:
+                self._error(404, f"Ruta desconocida: {self.path}")
+                return
+        except CuerpoDemasiadoGrande as error:
+            self._error(413, str(error))
+            return
+        except ErrorEspecificacion as error:
+            self._error(400, str(error))
+            return
+        except Exception as error:
+            self._error(500, f"Error interno: {error}")
+            return
+        self._responder(200, cuerpo)
+
+
+class ServicioCotizacion:
+    """Servidor de cotizaciones en un hilo propio (útil también para pruebas locales)
+
+    Con puerto=0 el sistema asigna uno libre; ver `url`.
+    """
+
+    def __init__(self, host=HOST_POR_DEFECTO, puerto=PUERTO_POR_DEFECTO, capacidad_cache=CAPACIDAD_CACHE,
+                 registrar_peticiones=False):
+        self.servidor = ThreadingHTTPServer((host, puerto), ManejadorCotizacion)
+        self.servidor.daemon_threads = True
+        self.servidor.cache = CacheRespuestas(capacidad_cache)
+        self.servidor.registrar_peticiones = registrar_peticiones
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self.servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    @property
+    def cache(self):
+        return self.servidor.cache
+
+    def iniciar(self):
+        """Atiende peticiones en un hilo de fondo"""
+        self._hilo = threading.Thread(target=self.servidor.serve_forever, name="servicio_cotizacion", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        if self._hilo:
+            self._hilo.join()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excepcion):
+        self.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de cotizaciones")
+    parser.add_argument("--host", default=HOST_POR_DEFECTO)
+    parser.add_argument("--puerto", type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument("--cache", type=int, default=CAPACIDAD_CACHE, help="Respuestas en caché")
+    args = parser.parse_args()
+
+    catalogos.cargar_desde_entorno()
+    servicio = ServicioCotizacion(args.host, args.puerto, args.cache, registrar_peticiones=True)
+    print(f"Servicio de cotizaciones en {servicio.url}")
+    try:
+        servicio.servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
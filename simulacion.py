@@ -0,0 +1,268 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: simulacion.py
+Simulación Monte Carlo del riesgo de costo (precios, factores y medidas inciertos)
+
+Una cotización es un solo número, pero los precios de los materiales y los
+factores de los sistemas cambian. Se muestrean todos los escenarios a la
+vez como matrices NumPy (escenarios x materiales, escenarios x sistemas) y
+el costo de cada escenario sale de un producto de matrices:
+
+    costo = Σ_s F[:, s] * (P @ A.T)[:, s]
+
+donde A[s, m] es el área (de piso o de paredes) de las habitaciones con
+sistema s cubierta por el material m. A se arma una sola vez, así que el
+costo no depende de cuántas habitaciones haya. Las habitaciones con
+tolerancia de medidas se evalúan aparte, con sus áreas muestreadas.
+
+Uso:
+    distribuciones = incertidumbre_relativa(casa, precio=0.15, factor=0.05)
+    resultado = SimulacionCostos(casa, distribuciones).ejecutar(100_000)
+    resultado.percentil(90), resultado.valor_en_riesgo(0.95)
+"""
+
+import numpy as np
+
+from clases import evaluar_habitaciones, indexar_por_identidad
+
+ESCENARIOS_POR_DEFECTO = 100_000
+ESCENARIOS_POR_BLOQUE = 20_000
+
+
+# =============================================================================
+# DISTRIBUCIONES
+# =============================================================================
+
+class Normal:
+    """Normal (recortada en 0: no hay precios ni factores negativos)"""
+
+    def __init__(self, media, desviacion):
+        self.media = media
+        self.desviacion = desviacion
+
+    def muestrear(self, generador, cantidad):
+        return np.maximum(generador.normal(self.media, self.desviacion, cantidad), 0.0)
+
+
+class Triangular:
+    """Triangular: mínimo, valor más probable y máximo (estimación de tres puntos)"""
+
+    def __init__(self, minimo, moda, maximo):
+        self.minimo = minimo
+        self.moda = moda
+        self.maximo = maximo
+
+    def muestrear(self, generador, cantidad):
+        if self.minimo == self.maximo:
+            return np.full(cantidad, float(self.moda))
+        return generador.triangular(self.minimo, self.moda, self.maximo, cantidad)
+
+
+class Uniforme:
+    def __init__(self, minimo, maximo):
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def muestrear(self, generador, cantidad):
+        return generador.uniform(self.minimo, self.maximo, cantidad)
+
+
+class LogNormal:
+    """Log-normal por su mediana y la desviación del logaritmo (sesgada hacia alzas)"""
+
+    def __init__(self, mediana, sigma):
+        self.mediana = mediana
+        self.sigma = sigma
+
+    def muestrear(self, generador, cantidad):
+        return self.mediana * generador.lognormal(0.0, self.sigma, cantidad)
+
+
+def incertidumbre_relativa(casas, precio=0.10, factor=0.05):
+    """Distribuciones triangulares ±X% alrededor del valor actual
+
+    Args:
+        casas: Casa o lista de casas (portafolio)
+        precio: Variación relativa de cada precio_m2 (0.10 = ±10%)
+        factor: Variación relativa de cada factor_costo
+
+    Returns:
+        Diccionario {Material o SistemaConstruccion: distribución} con todos
+        los que usan las habitaciones
+    """
+    distribuciones = {}
+    for h in _habitaciones(casas):
+        for material in (h.material_piso, h.material_paredes):
+            if material is not None and material not in distribuciones:
+                valor = material.precio_m2
+                distribuciones[material] = Triangular(valor * (1 - precio), valor, valor * (1 + precio))
+        sistema = h.sistema_construccion
+        if sistema is not None and sistema not in distribuciones:
+            valor = sistema.factor_costo
+            distribuciones[sistema] = Triangular(valor * (1 - factor), valor, valor * (1 + factor))
+    return distribuciones
+
+
+# =============================================================================
+# SIMULACIÓN
+# =============================================================================
+
+class SimulacionCostos:
+    """Muestrea escenarios de precios y factores y calcula el costo de cada uno"""
+
+    def __init__(self, casas, distribuciones, tolerancias=None, semilla=None):
+        """
+        Args:
+            casas: Casa o lista de casas; en un portafolio, un mismo material
+                tiene el mismo precio en todas las casas de cada escenario
+            distribuciones: {Material o SistemaConstruccion: distribución};
+                los que no aparecen quedan fijos en su valor actual
+            tolerancias: {Habitacion: desviación relativa de las medidas}
+                (0.02 = 2%); el ancho y largo se escalan juntos y la altura
+                por separado
+            semilla: Semilla del generador (resultados reproducibles)
+        """
+        habitaciones = _habitaciones(casas)
+        tolerancias = tolerancias or {}
+        self.distribuciones = distribuciones
+        self.generador = np.random.default_rng(semilla)
+
+        # Columnas de parámetros: materiales y sistemas distintos (por identidad)
+        n = len(habitaciones)
+        self.materiales, indices = indexar_por_identidad([h.material_piso for h in habitaciones]
+                                                         + [h.material_paredes for h in habitaciones])
+        ind_piso, ind_paredes = indices[:n], indices[n:]
+        self.sistemas, ind_sistema = indexar_por_identidad([h.sistema_construccion for h in habitaciones])
+        m, s = len(self.materiales), len(self.sistemas)
+        # Columnas fijas al final: precio 0 (sin material) y factor 1 (sin sistema)
+        ind_piso[ind_piso < 0] = m
+        ind_paredes[ind_paredes < 0] = m
+        ind_sistema[ind_sistema < 0] = s
+        self.precios_base = np.array([x.precio_m2 for x in self.materiales] + [0.0], dtype=float)
+        self.factores_base = np.array([x.factor_costo for x in self.sistemas] + [1.0], dtype=float)
+
+        arreglos = evaluar_habitaciones(habitaciones)
+        con_tolerancia = np.fromiter((h in tolerancias for h in habitaciones), bool, n)
+        fijas = ~con_tolerancia
+
+        # A[s, m]: área de las habitaciones sin tolerancia por sistema y material
+        celdas = (s + 1) * (m + 1)
+        areas = np.bincount(ind_sistema[fijas] * (m + 1) + ind_piso[fijas],
+                            weights=arreglos['area_piso'][fijas], minlength=celdas)
+        areas += np.bincount(ind_sistema[fijas] * (m + 1) + ind_paredes[fijas],
+                             weights=arreglos['area_paredes'][fijas], minlength=celdas)
+        self.areas = areas.reshape(s + 1, m + 1)
+
+        # Habitaciones con tolerancia: geometría base y columnas de cada una
+        variables = np.flatnonzero(con_tolerancia)
+        self.tolerancias = np.array([tolerancias[habitaciones[i]] for i in variables], dtype=float)
+        self.area_piso_variable = arreglos['area_piso'][variables]
+        self.paredes_bruta_variable = arreglos['area_paredes_bruta'][variables]
+        self.aberturas_variable = arreglos['area_aberturas'][variables]
+        self.piso_variable = ind_piso[variables]
+        self.paredes_variable = ind_paredes[variables]
+        self.sistema_variable = ind_sistema[variables]
+
+        unos = np.ones((1, len(variables)))
+        self.costo_base = float(self._costos(self.precios_base[None, :], self.factores_base[None, :], unos, unos)[0])
+
+    def muestrear(self, escenarios):
+        """Matrices de un bloque de escenarios
+
+        Returns:
+            (precios, factores, plano, altura): escenarios x (materiales + 1),
+            escenarios x (sistemas + 1) y las escalas de medidas de las
+            habitaciones con tolerancia (escenarios x habitaciones)
+        """
+        precios = np.tile(self.precios_base, (escenarios, 1))
+        factores = np.tile(self.factores_base, (escenarios, 1))
+        for columna, material in enumerate(self.materiales):
+            distribucion = self.distribuciones.get(material)
+            if distribucion is not None:
+                precios[:, columna] = distribucion.muestrear(self.generador, escenarios)
+        for columna, sistema in enumerate(self.sistemas):
+            distribucion = self.distribuciones.get(sistema)
+            if distribucion is not None:
+                factores[:, columna] = distribucion.muestrear(self.generador, escenarios)
+        forma = (escenarios, len(self.tolerancias))
+        plano = 1 + self.generador.standard_normal(forma) * self.tolerancias
+        altura = 1 + self.generador.standard_normal(forma) * self.tolerancias
+        return precios, factores, plano, altura
+
+    def _costos(self, precios, factores, plano, altura):
+        # Un producto de matrices para todas las habitaciones sin tolerancia
+        costos = np.einsum('ks,ks->k', precios @ self.areas.T, factores)
+        if len(self.tolerancias):
+            # Escalar la planta por k multiplica el piso por k² y el perímetro por k
+            area_piso = self.area_piso_variable * plano ** 2
+            area_paredes = np.maximum(self.paredes_bruta_variable * plano * altura - self.aberturas_variable, 0.0)
+            costos += ((area_piso * precios[:, self.piso_variable]
+                        + area_paredes * precios[:, self.paredes_variable])
+                       * factores[:, self.sistema_variable]).sum(axis=1)
+        return costos
+
+    def iterar(self, escenarios=ESCENARIOS_POR_DEFECTO, bloque=ESCENARIOS_POR_BLOQUE):
+        """Costos por bloques de escenarios (memoria acotada en portafolios grandes)
+
+        Yields:
+            Arreglo con el costo de cada escenario del bloque
+        """
+        for inicio in range(0, escenarios, bloque):
+            yield self._costos(*self.muestrear(min(bloque, escenarios - inicio)))
+
+    def ejecutar(self, escenarios=ESCENARIOS_POR_DEFECTO, bloque=ESCENARIOS_POR_BLOQUE):
+        """Simula los escenarios (por bloques) y devuelve un ResultadoSimulacion"""
+        costos = np.empty(escenarios)
+        inicio = 0
+        for parte in self.iterar(escenarios, bloque):
+            costos[inicio:inicio + len(parte)] = parte
+            inicio += len(parte)
+        return ResultadoSimulacion(costos, self.costo_base)
+
+
+class ResultadoSimulacion:
+    """Distribución del costo simulado frente a la cotización determinística"""
+
+    def __init__(self, costos, costo_base):
+        self.costos = costos
+        self.costo_base = costo_base
+
+    def percentil(self, p):
+        """Costo que no se supera en el p% de los escenarios (P50, P90...)"""
+        return float(np.percentile(self.costos, p))
+
+    def valor_en_riesgo(self, nivel=0.95):
+        """Sobrecosto sobre la cotización que no se supera con la confianza dada (VaR)"""
+        return self.percentil(nivel * 100) - self.costo_base
+
+    def valor_en_riesgo_condicional(self, nivel=0.95):
+        """Sobrecosto promedio en el peor (1 - nivel) de los escenarios (CVaR)"""
+        umbral = self.percentil(nivel * 100)
+        return float(self.costos[self.costos >= umbral].mean()) - self.costo_base
+
+    def probabilidad_sobrecosto(self, presupuesto=None):
+        """Fracción de escenarios que superan el presupuesto (por defecto la cotización)"""
+        limite = self.costo_base if presupuesto is None else presupuesto
+        return float((self.costos > limite).mean())
+
+    def resumen(self, nivel=0.95):
+        p50, p90 = np.percentile(self.costos, [50, 90])
+        return {
+            'escenarios': len(self.costos),
+            'costo_base': self.costo_base,
+            'media': float(self.costos.mean()),
+            'desviacion': float(self.costos.std()),
+            'p50': float(p50),
+            'p90': float(p90),
+            'var': self.valor_en_riesgo(nivel),
+            'cvar': self.valor_en_riesgo_condicional(nivel),
+            'nivel': nivel,
+            'probabilidad_sobrecosto': self.probabilidad_sobrecosto(),
+        }
+
+
+def _habitaciones(casas):
+    if hasattr(casas, 'habitaciones'):
+        return list(casas.habitaciones)
+    return [h for casa in casas for h in casa.habitaciones]
+
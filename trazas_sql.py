@@ -0,0 +1,307 @@
+"""
+Sistema de Cálculo de Costos de Construcción
+Archivo: trazas_sql.py
+Trazador de consultas SQL: registro, agrupación y detección de N+1
+
+Envuelve las conexiones que devuelve db.get_db_connection para registrar
+cada sentencia con sus parámetros, duración y sitio de llamada. Sirve
+también como modo de prueba con limite_consultas().
+
+Ejemplo:
+    with TrazadorSQL() as trazador:
+        with trazador.operacion("cargar_casa"):
+            app.cargar_casa_desde_db(casa_id)
+    print(trazador.reporte())
+"""
+
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+import db
+
+_ESTE_ARCHIVO = os.path.abspath(__file__)
+_ARCHIVO_DB = os.path.abspath(db.__file__)
+_ESPACIOS = re.compile(r"\s+")
+
+
+class ExcesoConsultas(AssertionError):
+    """Se lanza cuando una operación supera el máximo de consultas permitido"""
+
+
+class ConsultaRegistrada:
+    """Una sentencia ejecutada y su contexto"""
+
+    __slots__ = ("sql", "parametros", "duracion", "sitio", "origen", "operacion")
+
+    def __init__(self, sql, parametros, duracion, sitio, origen, operacion):
+        self.sql = sql
+        self.parametros = parametros
+        self.duracion = duracion
+        self.sitio = sitio  # Primer marco fuera del trazador (normalmente db.py)
+        self.origen = origen  # Primer marco fuera de db.py: quien pidió los datos
+        self.operacion = operacion
+
+    def __repr__(self):
+        return f"<{self.sql!r} {self.parametros!r} {self.duracion * 1000:.3f}ms @ {self.origen}>"
+
+
+def normalizar_sql(sql):
+    """Colapsa espacios para que sentencias idénticas se agrupen"""
+    return _ESPACIOS.sub(" ", sql).strip()
+
+
+def _sitios_de_llamada():
+    """Devuelve (sitio, origen) como 'archivo:línea (función)'"""
+    marco = sys._getframe(2)
+    sitio = origen = None
+    while marco is not None:
+        archivo = os.path.abspath(marco.f_code.co_filename)
+        if archivo != _ESTE_ARCHIVO:
+            descripcion = f"{os.path.basename(archivo)}:{marco.f_lineno} ({marco.f_code.co_name})"
+            if sitio is None:
+                sitio = descripcion
+            if archivo != _ARCHIVO_DB:
+                origen = descripcion
+                break
+        marco = marco.f_back
+    return sitio, origen or sitio
+
+
+class CursorTrazado:
+    """Cursor que registra execute/executemany en el trazador"""
+
+    def __init__(self, cursor, trazador):
+        self._cursor = cursor
+        self._trazador = trazador
+
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        try:
+            self._cursor.execute(sql, parametros)
+        finally:
+            self._trazador._registrar(sql, parametros, time.perf_counter() - inicio)
+        return self
+
+    def executemany(self, sql, secuencia):
+        secuencia = list(secuencia)
+        inicio = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, secuencia)
+        finally:
+            self._trazador._registrar(sql, f"<{len(secuencia)} filas>", time.perf_counter() - inicio)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class ConexionTrazada:
+    """Proxy de sqlite3.Connection cuyos cursores quedan trazados"""
+
+    def __init__(self, conexion, trazador):
+        self._conexion = conexion
+        self._trazador = trazador
+
+    def cursor(self):
+        return CursorTrazado(self._conexion.cursor(), self._trazador)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, secuencia):
+        return self.cursor().executemany(sql, secuencia)
+
+    def __enter__(self):
+        self._conexion.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conexion.__exit__(*exc)
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+
+class TrazadorSQL:
+    """Registra las sentencias ejecutadas a través de db.get_db_connection"""
+
+    def __init__(self, umbral_n_mas_1=5, explicar=True):
+        """
+        Args:
+            umbral_n_mas_1: Repeticiones de una misma sentencia desde el mismo
+                origen, dentro de una operación, a partir de las cuales se
+                considera un patrón N+1
+            explicar: Si se ejecuta EXPLAIN QUERY PLAN al generar el reporte
+        """
+        self.umbral_n_mas_1 = umbral_n_mas_1
+        self.explicar = explicar
+        self.consultas = []
+        self._operacion = None
+        self._original = None
+
+    # -- instalación ---------------------------------------------------------
+
+    def instalar(self):
+        """Reemplaza db.get_db_connection por una versión trazada"""
+        if self._original is not None:
+            return self
+        self._original = db.get_db_connection
+        original = self._original
+
+        def get_db_connection_trazada(*args, **kwargs):
+            return ConexionTrazada(original(*args, **kwargs), self)
+        db.get_db_connection = get_db_connection_trazada
+        return self
+
+    def desinstalar(self):
+        """Restaura la función original de db"""
+        if self._original is not None:
+            db.get_db_connection = self._original
+            self._original = None
+
+    def __enter__(self):
+        return self.instalar()
+
+    def __exit__(self, *exc):
+        self.desinstalar()
+        return False
+
+    @contextmanager
+    def operacion(self, nombre):
+        """Agrupa las consultas ejecutadas dentro del bloque bajo un nombre"""
+        anterior = self._operacion
+        self._operacion = nombre
+        try:
+            yield self
+        finally:
+            self._operacion = anterior
+
+    def _registrar(self, sql, parametros, duracion):
+        sitio, origen = _sitios_de_llamada()
+        self.consultas.append(ConsultaRegistrada(sql, parametros, duracion, sitio, origen, self._operacion))
+
+    def reiniciar(self):
+        self.consultas.clear()
+
+    # -- análisis ------------------------------------------------------------
+
+    def contar(self, operacion=None):
+        """Cuenta las consultas, opcionalmente solo las de una operación"""
+        if operacion is None:
+            return len(self.consultas)
+        return sum(1 for c in self.consultas if c.operacion == operacion)
+
+    def agrupar(self):
+        """Agrupa consultas idénticas.
+
+        Returns:
+            Lista de diccionarios (sql, veces, tiempo_total, parametros_distintos,
+            origenes) ordenada por tiempo total descendente
+        """
+        grupos = {}
+        for consulta in self.consultas:
+            clave = normalizar_sql(consulta.sql)
+            grupo = grupos.setdefault(clave, {"sql": clave, "veces": 0, "tiempo_total": 0.0,
+                                              "parametros": set(), "origenes": set(),
+                                              "ejemplo": consulta.parametros})
+            grupo["veces"] += 1
+            grupo["tiempo_total"] += consulta.duracion
+            grupo["parametros"].add(repr(consulta.parametros))
+            grupo["origenes"].add(consulta.origen)
+        resultado = []
+        for grupo in grupos.values():
+            grupo["parametros_distintos"] = len(grupo.pop("parametros"))
+            grupo["origenes"] = sorted(o for o in grupo["origenes"] if o)
+            resultado.append(grupo)
+        resultado.sort(key=lambda g: g["tiempo_total"], reverse=True)
+        return resultado
+
+    def detectar_n_mas_1(self):
+        """Detecta sentencias repetidas con distintos parámetros desde un mismo origen.
+
+        Returns:
+            Lista de diccionarios (operacion, sql, origen, veces)
+        """
+        conteos = {}
+        for consulta in self.consultas:
+            clave = (consulta.operacion, normalizar_sql(consulta.sql), consulta.origen)
+            conteos[clave] = conteos.get(clave, 0) + 1
+        patrones = [
+            {"operacion": operacion, "sql": sql, "origen": origen, "veces": veces}
+            for (operacion, sql, origen), veces in conteos.items()
+            if veces >= self.umbral_n_mas_1
+        ]
+        patrones.sort(key=lambda p: p["veces"], reverse=True)
+        return patrones
+
+    def detectar_escaneos(self):
+        """Ejecuta EXPLAIN QUERY PLAN sobre las sentencias con WHERE y
+        reporta las que recorren la tabla completa sin usar un índice.
+
+        Returns:
+            Lista de diccionarios (sql, plan)
+        """
+        obtener_conexion = self._original or db.get_db_connection
+        conn = obtener_conexion()
+        escaneos = []
+        try:
+            for grupo in self.agrupar():
+                sql = grupo["sql"]
+                if " WHERE " not in sql.upper() or not sql.upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                    continue
+                parametros = grupo["ejemplo"] if isinstance(grupo["ejemplo"], (tuple, list, dict)) else ()
+                try:
+                    plan = [fila[3] for fila in conn.execute("EXPLAIN QUERY PLAN " + sql, parametros)]
+                except Exception:
+                    continue
+                if any(p.startswith("SCAN") and "INDEX" not in p for p in plan):
+                    escaneos.append({"sql": sql, "plan": plan})
+        finally:
+            conn.close()
+        return escaneos
+
+    def reporte(self):
+        """Genera un reporte de texto con grupos, patrones N+1 y escaneos"""
+        lineas = [f"Consultas ejecutadas: {len(self.consultas)}",
+                  f"Tiempo total: {sum(c.duracion for c in self.consultas) * 1000:.2f} ms", ""]
+        lineas.append("Sentencias agrupadas:")
+        for grupo in self.agrupar():
+            lineas.append(f"  {grupo['veces']:>6}x {grupo['tiempo_total'] * 1000:>9.2f} ms  {grupo['sql']}")
+        patrones = self.detectar_n_mas_1()
+        if patrones:
+            lineas.append("")
+            lineas.append("⚠️ Posibles patrones N+1:")
+            for patron in patrones:
+                lineas.append(f"  {patron['veces']}x desde {patron['origen']} "
+                              f"[{patron['operacion'] or 'sin operación'}]: {patron['sql']}")
+        if self.explicar:
+            escaneos = self.detectar_escaneos()
+            if escaneos:
+                lineas.append("")
+                lineas.append("⚠️ Escaneos completos sin índice:")
+                for escaneo in escaneos:
+                    lineas.append(f"  {escaneo['sql']}")
+                    for paso in escaneo["plan"]:
+                        lineas.append(f"      {paso}")
+        return "\n".join(lineas)
+
+
+@contextmanager
+def limite_consultas(maximo, operacion="operación"):
+    """Modo de prueba: falla si el bloque ejecuta más de `maximo` consultas.
+
+    Ejemplo:
+        with limite_consultas(5, "cargar_casa"):
+            app.cargar_casa_desde_db(casa_id)
+    """
+    with TrazadorSQL(explicar=False) as trazador:
+        yield trazador
+    if len(trazador.consultas) > maximo:
+        raise ExcesoConsultas(f"{operacion}: {len(trazador.consultas)} consultas (máximo {maximo})\n"
+                              + trazador.reporte())